@@ -0,0 +1,56 @@
+# -*- coding: utf-8 -*-
+
+"""
+Check combined privileges
+
+This recomputes the combined privilege of each user over each resource from the
+user, group and membership privilege tables and reports records that disagree.
+
+* By default, checks all resources and prints differences on stdout.
+* Optional resource ids limit the check to those resources.
+* Optional argument --fix repairs the differences found.
+"""
+
+from django.core.management.base import BaseCommand
+from hs_access_control.models import PrivilegeCodes, UserResourceCombinedPrivilege
+from hs_core.models import BaseResource
+
+
+class Command(BaseCommand):
+    help = "Check combined privileges against user and group privileges."
+
+    def add_arguments(self, parser):
+
+        # a list of resource id's, or none to check all resources
+        parser.add_argument('resource_ids', nargs='*', type=str)
+
+        # Named (optional) arguments
+        parser.add_argument(
+            '--fix',
+            action='store_true',  # True for presence, False for absence
+            dest='fix',           # value is options['fix']
+            help='repair combined privileges that differ',
+        )
+
+    def handle(self, *args, **options):
+        if len(options['resource_ids']) > 0:  # an array of resource short_id to check.
+            resources = list(BaseResource.objects.filter(short_id__in=options['resource_ids']))
+            found = set(r.short_id for r in resources)
+            for rid in options['resource_ids']:
+                if rid not in found:
+                    print("Resource with id {} not found in Django Resources".format(rid))
+            print("CHECKING COMBINED PRIVILEGES FOR {} RESOURCES".format(len(resources)))
+        else:  # check all resources
+            resources = None
+            print("CHECKING COMBINED PRIVILEGES FOR ALL RESOURCES")
+
+        differences = UserResourceCombinedPrivilege.differences(resources=resources)
+        for user_id, resource_id, stored, computed in differences:
+            print("user {} resource {}: stored {}, computed {}"
+                  .format(user_id, resource_id,
+                          PrivilegeCodes.NAMES[stored], PrivilegeCodes.NAMES[computed]))
+        print("{} DIFFERENCES FOUND".format(len(differences)))
+
+        if options['fix'] and differences:
+            fixed = UserResourceCombinedPrivilege.refresh(resources=resources)
+            print("{} RECORDS REPAIRED".format(fixed))
@@ -0,0 +1,59 @@
+# -*- coding: utf-8 -*-
+from __future__ import unicode_literals
+
+from django.db import migrations, models
+from django.conf import settings
+
+
+def populate_combined_privilege(apps, schema_editor):
+    """
+    Compute combined privileges from existing user and group privileges
+
+    There is one record per user and resource, containing the highest (numerically lowest)
+    privilege granted to the user directly or via an active group.
+    """
+    UserResourcePrivilege = apps.get_model("hs_access_control", "UserResourcePrivilege")
+    GroupResourcePrivilege = apps.get_model("hs_access_control", "GroupResourcePrivilege")
+    UserResourceCombinedPrivilege = apps.get_model("hs_access_control",
+                                                   "UserResourceCombinedPrivilege")
+
+    combined = {}
+    for user_id, resource_id, privilege in UserResourcePrivilege.objects\
+            .values_list('user_id', 'resource_id', 'privilege'):
+        combined[(user_id, resource_id)] = privilege
+    for user_id, resource_id, privilege in GroupResourcePrivilege.objects\
+            .filter(group__gaccess__active=True, group__g2ugp__isnull=False)\
+            .values_list('group__g2ugp__user_id', 'resource_id', 'privilege'):
+        key = (user_id, resource_id)
+        combined[key] = min(combined.get(key, privilege), privilege)
+
+    UserResourceCombinedPrivilege.objects.bulk_create(
+        [UserResourceCombinedPrivilege(user_id=pair[0], resource_id=pair[1], privilege=privilege)
+         for pair, privilege in combined.items()],
+        batch_size=1000)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+        ('hs_core', '0039_coveragegeometry'),
+        ('hs_access_control', '0022_resourceaccess_require_download_agreement'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='UserResourceCombinedPrivilege',
+            fields=[
+                ('id', models.AutoField(verbose_name='ID', serialize=False, auto_created=True, primary_key=True)),
+                ('privilege', models.IntegerField(default=3, editable=False, db_index=True, choices=[(1, b'Owner'), (2, b'Change'), (3, b'View')])),
+                ('resource', models.ForeignKey(related_name='r2ucrp', editable=False, to='hs_core.BaseResource', help_text=b'resource to which privilege applies')),
+                ('user', models.ForeignKey(related_name='u2ucrp', editable=False, to=settings.AUTH_USER_MODEL, help_text=b'user holding privilege')),
+            ],
+        ),
+        migrations.AlterUniqueTogether(
+            name='userresourcecombinedprivilege',
+            unique_together=set([('user', 'resource')]),
+        ),
+        migrations.RunPython(populate_combined_privilege, migrations.RunPython.noop),
+    ]
@@ -40,10 +40,14 @@ Notes and quandaries
   effective VIEW privilege.
 """
 
+from collections import namedtuple
+
 from django.contrib.auth.models import User, Group
 from django.db import models
 from django.db.models import Q, F, Max
 from django.db import transaction
+from django.db.models.signals import post_save
+from django.dispatch import receiver
 from django.core.exceptions import PermissionDenied
 
 from hs_core.models import BaseResource
@@ -162,6 +166,9 @@ class PrivilegeBase(models.Model):
             del kwargs['grantor']
             cls.objects.filter(**kwargs) \
                .delete()
+        # keep combined privileges in step with this change
+        UserResourceCombinedPrivilege.update_for(**kwargs)
+        invalidate_privilege_caches()
 
     @classmethod
     def share(cls, **kwargs):
@@ -678,6 +685,266 @@ class GroupResourcePrivilege(PrivilegeBase):
         return GroupResourceProvenance.get_undo_groups(**kwargs)
 
 
+class UserResourceCombinedPrivilege(models.Model):
+    """
+    Combined privilege of a user over a resource, via user and group privilege.
+
+    This is a denormalization of UserResourcePrivilege, GroupResourcePrivilege and
+    UserGroupPrivilege: there is one record for each user that holds any privilege
+    over a resource, containing the highest (numerically lowest) privilege granted
+    to the user directly or through an active group. It allows "my resources" and
+    authorization checks to be single indexed lookups instead of multi-way joins.
+
+    Resource flags (particularly 'immutable') change independently of privilege and are
+    not folded into this table; effective privilege is computed from this record and the
+    flags when queried.
+
+    The table is maintained by PrivilegeBase.update, which is called by every share,
+    unshare and undo_share, and by changes in group status. The management command
+    check_combined_privilege verifies it against the privilege tables.
+
+    **This is a system table** and should never be modified directly.
+    """
+    privilege = models.IntegerField(choices=PrivilegeCodes.CHOICES,
+                                    editable=False,
+                                    default=PrivilegeCodes.VIEW,
+                                    db_index=True)
+
+    user = models.ForeignKey(User,
+                             null=False,
+                             editable=False,
+                             related_name='u2ucrp',
+                             help_text='user holding privilege')
+
+    resource = models.ForeignKey(BaseResource,
+                                 null=False,
+                                 editable=False,
+                                 related_name='r2ucrp',
+                                 help_text='resource to which privilege applies')
+
+    class Meta:
+        unique_together = ('user', 'resource')
+
+    def __str__(self):
+        """ Return printed depiction for debugging """
+        return str.format("<user '{}' (id={}) holds combined {} ({})" +
+                          " over resource '{}' (id={})>",
+                          str(self.user.username), str(self.user.id),
+                          PrivilegeCodes.NAMES[self.privilege],
+                          str(self.privilege),
+                          str(self.resource.title).encode('ascii'),
+                          str(self.resource.short_id).encode('ascii'))
+
+    @classmethod
+    def get_privilege(cls, user, resource):
+        """
+        Get the combined privilege of a user over a resource, before resource flags.
+
+        :param user: user to check.
+        :param resource: resource to check.
+        :return: integer privilege 1-4
+        """
+        try:
+            return cls.objects.get(user=user, resource=resource).privilege
+        except cls.DoesNotExist:
+            return PrivilegeCodes.NONE
+
+    @classmethod
+    def compute(cls, users=None, resources=None):
+        """
+        Compute combined privileges from the privilege tables.
+
+        :param users: users to consider (a list or QuerySet), or None for all users.
+        :param resources: resources to consider (a list or QuerySet), or None for all.
+        :return: dict mapping (user id, resource id) to privilege.
+        """
+        uscope = {}
+        gscope = {'group__gaccess__active': True, 'group__g2ugp__isnull': False}
+        if users is not None:
+            uscope['user__in'] = users
+            gscope['group__g2ugp__user__in'] = users
+        if resources is not None:
+            uscope['resource__in'] = resources
+            gscope['resource__in'] = resources
+
+        combined = {}
+        for user_id, resource_id, privilege in UserResourcePrivilege.objects\
+                .filter(**uscope).values_list('user_id', 'resource_id', 'privilege'):
+            combined[(user_id, resource_id)] = privilege
+        for user_id, resource_id, privilege in GroupResourcePrivilege.objects\
+                .filter(**gscope)\
+                .values_list('group__g2ugp__user_id', 'resource_id', 'privilege'):
+            key = (user_id, resource_id)
+            combined[key] = min(combined.get(key, PrivilegeCodes.NONE), privilege)
+        return combined
+
+    @classmethod
+    def __get_stored(cls, users=None, resources=None):
+        """ Return a dict mapping (user id, resource id) to (record id, stored privilege) """
+        scope = {}
+        if users is not None:
+            scope['user__in'] = users
+        if resources is not None:
+            scope['resource__in'] = resources
+        return {(user_id, resource_id): (record_id, privilege)
+                for record_id, user_id, resource_id, privilege in cls.objects
+                .filter(**scope).values_list('id', 'user_id', 'resource_id', 'privilege')}
+
+    @classmethod
+    def differences(cls, users=None, resources=None):
+        """
+        Compare stored combined privileges with those computed from the privilege tables.
+
+        :param users: users to consider (a list or QuerySet), or None for all users.
+        :param resources: resources to consider (a list or QuerySet), or None for all.
+        :return: list of (user id, resource id, stored privilege, computed privilege)
+            for each pair where these differ, using PrivilegeCodes.NONE for missing records.
+        """
+        stored = cls.__get_stored(users=users, resources=resources)
+        computed = cls.compute(users=users, resources=resources)
+        result = []
+        for key in set(stored) | set(computed):
+            old = stored[key][1] if key in stored else PrivilegeCodes.NONE
+            new = computed.get(key, PrivilegeCodes.NONE)
+            if old != new:
+                result.append((key[0], key[1], old, new))
+        return result
+
+    @classmethod
+    def refresh(cls, users=None, resources=None):
+        """
+        Bring stored combined privileges into agreement with the privilege tables.
+
+        :param users: users to refresh (a list or QuerySet), or None for all users.
+        :param resources: resources to refresh (a list or QuerySet), or None for all.
+        :return: number of records created, changed or deleted.
+
+        **This is a system routine** and not recommended for use in application code.
+        """
+        with transaction.atomic():
+            stored = cls.__get_stored(users=users, resources=resources)
+            computed = cls.compute(users=users, resources=resources)
+            stale = [record_id for key, (record_id, privilege) in stored.items()
+                     if key not in computed]
+            changed = {}
+            created = []
+            for key, privilege in computed.items():
+                if key not in stored:
+                    created.append(cls(user_id=key[0], resource_id=key[1], privilege=privilege))
+                elif stored[key][1] != privilege:
+                    changed.setdefault(privilege, []).append(stored[key][0])
+            if stale:
+                cls.objects.filter(id__in=stale).delete()
+            for privilege, record_ids in changed.items():
+                cls.objects.filter(id__in=record_ids).update(privilege=privilege)
+            if created:
+                cls.objects.bulk_create(created)
+        return len(stale) + sum(len(ids) for ids in changed.values()) + len(created)
+
+    @classmethod
+    def update_for(cls, **kwargs):
+        """
+        Refresh combined privileges affected by a change in one privilege record.
+
+        This works for the same pairs of keys as PrivilegeBase.update:
+
+            * UserResourceCombinedPrivilege.update_for(user={X}, resource={Y})
+            * UserResourceCombinedPrivilege.update_for(group={X}, resource={Y})
+            * UserResourceCombinedPrivilege.update_for(user={X}, group={Y})
+
+        **This is a system routine** and not recommended for use in application code.
+        """
+        if 'user' in kwargs and 'resource' in kwargs:
+            cls.refresh(users=[kwargs['user']], resources=[kwargs['resource']])
+        elif 'group' in kwargs and 'resource' in kwargs:
+            cls.refresh(users=User.objects.filter(u2ugp__group=kwargs['group']),
+                        resources=[kwargs['resource']])
+        elif 'user' in kwargs and 'group' in kwargs:
+            cls.refresh(users=[kwargs['user']],
+                        resources=BaseResource.objects.filter(r2grp__group=kwargs['group']))
+        else:
+            raise PolymorphismError("update_for requires two of user, group, and resource")
+
+    @classmethod
+    def update_for_group(cls, group):
+        """
+        Refresh combined privileges of all members over all resources held by a group.
+
+        This is needed when group status changes or the group is deleted.
+
+        **This is a system routine** and not recommended for use in application code.
+        """
+        cls.refresh(users=list(User.objects.filter(u2ugp__group=group)),
+                    resources=list(BaseResource.objects.filter(r2grp__group=group)))
+
+
+# Incremented whenever privileges, group status or resource flags change, so that
+# ResourcePrivilegeCache instances can tell that their contents are stale.
+_privilege_generation = [0]
+
+
+def invalidate_privilege_caches():
+    """ Mark all ResourcePrivilegeCache contents as stale """
+    _privilege_generation[0] += 1
+
+
+ResourceFlags = namedtuple('ResourceFlags',
+                           ['public', 'discoverable', 'shareable', 'published', 'immutable'])
+
+
+class ResourcePrivilegeCache(object):
+    """
+    Memoized combined privilege and resource flags of one user, keyed by resource id.
+
+    An instance is kept on UserAccess, so that it lives as long as the user object: for
+    request.user, this is the life of the request. Within that time, authorization checks
+    for a resource cost at most one lookup of privilege and one of flags, however many
+    times they are made.
+
+    Any share, unshare or undo, and any change of resource flags or group status,
+    invalidates all instances; use invalidate() to drop an instance's contents explicitly.
+    hits and misses count lookups of this instance; total_hits and total_misses
+    accumulate over all instances in this process.
+    """
+    total_hits = 0
+    total_misses = 0
+
+    def __init__(self, user):
+        self.user = user
+        self.hits = 0
+        self.misses = 0
+        self.__entries = {}
+        self.__generation = _privilege_generation[0]
+
+    def invalidate(self):
+        """ Forget everything cached so far """
+        self.__entries = {}
+        self.__generation = _privilege_generation[0]
+
+    def get(self, this_resource):
+        """
+        Get the combined privilege of the user over a resource, and the resource flags.
+
+        :param this_resource: resource to check.
+        :return: tuple (privilege 1-4 before resource flags, ResourceFlags)
+        """
+        if self.__generation != _privilege_generation[0]:
+            self.invalidate()
+        try:
+            entry = self.__entries[this_resource.id]
+        except KeyError:
+            self.misses += 1
+            ResourcePrivilegeCache.total_misses += 1
+            access_resource = this_resource.raccess
+            flags = ResourceFlags(*[getattr(access_resource, f) for f in ResourceFlags._fields])
+            privilege = UserResourceCombinedPrivilege.get_privilege(self.user, this_resource.id)
+            entry = self.__entries[this_resource.id] = (privilege, flags)
+        else:
+            self.hits += 1
+            ResourcePrivilegeCache.total_hits += 1
+        return entry
+
+
 class ProvenanceBase(models.Model):
     """Methods reused by all provenance classes
 
@@ -1268,6 +1535,25 @@ class UserAccess(models.Model):
                                 related_name='uaccess',
                                 related_query_name='uaccess')
 
+    @property
+    def privilege_cache(self):
+        """
+        Cache of this user's privilege over resources, for the life of this object.
+
+        :return: ResourcePrivilegeCache
+        """
+        cache = getattr(self, '_privilege_cache', None)
+        if cache is None:
+            cache = self._privilege_cache = ResourcePrivilegeCache(self.user)
+        return cache
+
+    @privilege_cache.setter
+    def privilege_cache(self, cache):
+        """ Share a cache between objects for the same user, e.g., within one request """
+        if __debug__:
+            assert cache.user.pk == self.user.pk
+        self._privilege_cache = cache
+
     ##########################################
     # PUBLIC METHODS: groups
     ##########################################
@@ -1471,7 +1757,12 @@ class UserAccess(models.Model):
             # GroupResourcePrivilege.objects.filter(group=this_group).delete()
             # access_group.delete()
 
+            # ...but the cascade does not maintain combined privileges.
+            members = list(User.objects.filter(u2ugp__group=this_group))
+            resources = list(BaseResource.objects.filter(r2grp__group=this_group))
             this_group.delete()
+            UserResourceCombinedPrivilege.refresh(users=members, resources=resources)
+            invalidate_privilege_caches()
         else:
             raise PermissionDenied("User must own group")
 
@@ -2168,10 +2459,8 @@ class UserAccess(models.Model):
         if not self.user.is_active:
             raise PermissionDenied("Requesting user is not active")
 
-        # need distinct due to duplicates invoked via Q expressions
-        return BaseResource.objects.filter(Q(r2urp__user=self.user) |
-                                           Q(r2grp__group__gaccess__active=True,
-                                               r2grp__group__g2ugp__user=self.user)).distinct()
+        # combined privilege accounts for user and active group privilege
+        return BaseResource.objects.filter(r2ucrp__user=self.user)
 
     @property
     def owned_resources(self):
@@ -2202,13 +2491,9 @@ class UserAccess(models.Model):
         if not self.user.is_active:
             raise PermissionDenied("Requesting user is not active")
 
-        return BaseResource.objects.filter(Q(raccess__immutable=False) &
-                                           (Q(r2urp__user=self.user,
-                                              r2urp__privilege__lte=PrivilegeCodes.CHANGE) |
-                                            Q(r2grp__group__gaccess__active=True,
-                                                r2grp__group__g2ugp__user=self.user,
-                                              r2grp__privilege__lte=PrivilegeCodes.CHANGE)))\
-                                   .distinct()
+        return BaseResource.objects.filter(raccess__immutable=False,
+                                           r2ucrp__user=self.user,
+                                           r2ucrp__privilege__lte=PrivilegeCodes.CHANGE)
 
     def get_resources_with_explicit_access(self, this_privilege, via_user=True, via_group=False):
         """
@@ -2270,22 +2555,11 @@ class UserAccess(models.Model):
         # CHANGE does not include immutable resources
         elif this_privilege == PrivilegeCodes.CHANGE:
             if via_user and via_group:
-                uquery = Q(raccess__immutable=False,
-                           r2urp__privilege=PrivilegeCodes.CHANGE,
-                           r2urp__user=self.user)
-
-                gquery = Q(raccess__immutable=False,
-                           r2grp__privilege=PrivilegeCodes.CHANGE,
-                           r2grp__group__g2ugp__user=self.user)
-
-                # exclude owners; immutability doesn't matter for them
-                uexcl = Q(r2urp__privilege=PrivilegeCodes.OWNER,
-                          r2urp__user=self.user)
-
+                # combined privilege already excludes owners
                 return BaseResource.objects\
-                    .filter(uquery | gquery)\
-                    .exclude(pk__in=BaseResource.objects
-                             .filter(uexcl)).distinct()
+                    .filter(raccess__immutable=False,
+                            r2ucrp__privilege=PrivilegeCodes.CHANGE,
+                            r2ucrp__user=self.user)
 
             elif via_user:
                 query = Q(raccess__immutable=False,
@@ -2311,40 +2585,14 @@ class UserAccess(models.Model):
 
             if via_user and via_group:
 
-                uquery = \
-                    Q(r2urp__privilege=PrivilegeCodes.VIEW,
-                      r2urp__user=self.user) | \
-                    Q(raccess__immutable=True,
-                      r2urp__privilege=PrivilegeCodes.CHANGE,
-                      r2urp__user=self.user)
-
-                gquery = \
-                    Q(r2grp__privilege=PrivilegeCodes.VIEW,
-                      r2grp__group__g2ugp__user=self.user,
-                      r2grp__group__gaccess__active=True) | \
+                # combined privilege already resolves CHANGE and OWNER over VIEW
+                query = \
+                    Q(r2ucrp__privilege=PrivilegeCodes.VIEW) | \
                     Q(raccess__immutable=True,
-                      r2grp__privilege=PrivilegeCodes.CHANGE,
-                      r2grp__group__g2ugp__user=self.user,
-                      r2grp__group__gaccess__active=True)
-
-                # pick up change and owner, use to override VIEW for groups
-                uexcl = \
-                    Q(raccess__immutable=False,
-                      r2urp__privilege=PrivilegeCodes.CHANGE,
-                      r2urp__user=self.user) | \
-                    Q(r2urp__privilege=PrivilegeCodes.OWNER,
-                      r2urp__user=self.user)
-
-                # pick up non-immutable CHANGE, use to override VIEW for groups
-                gexcl = Q(raccess__immutable=False,
-                          r2grp__privilege=PrivilegeCodes.CHANGE,
-                          r2grp__group__g2ugp__user=self.user,
-                          r2grp__group__gaccess__active=True)
+                      r2ucrp__privilege=PrivilegeCodes.CHANGE)
 
                 return BaseResource.objects\
-                    .filter(uquery | gquery)\
-                    .exclude(pk__in=BaseResource.objects
-                             .filter(uexcl | gexcl)).distinct()
+                    .filter(query, r2ucrp__user=self.user)
 
             elif via_user:
 
@@ -2397,9 +2645,8 @@ class UserAccess(models.Model):
         if not self.user.is_active:
             raise PermissionDenied("Requesting user is not active")
 
-        return UserResourcePrivilege.objects.filter(resource=this_resource,
-                                                    privilege=PrivilegeCodes.OWNER,
-                                                    user=self.user).exists()
+        privilege, flags = self.privilege_cache.get(this_resource)
+        return privilege == PrivilegeCodes.OWNER
 
     def can_change_resource(self, this_resource):
         """
@@ -2429,25 +2676,15 @@ class UserAccess(models.Model):
         if not self.user.is_active:
             raise PermissionDenied("Requesting user is not active")
 
-        access_resource = this_resource.raccess
-
         if self.user.is_superuser:
             return True
 
-        if access_resource.immutable:
-            return False
+        privilege, flags = self.privilege_cache.get(this_resource)
 
-        if UserResourcePrivilege.objects.filter(resource=this_resource,
-                                                privilege__lte=PrivilegeCodes.CHANGE,
-                                                user=self.user).exists():
-            return True
-
-        if GroupResourcePrivilege.objects.filter(resource=this_resource,
-                                                 privilege__lte=PrivilegeCodes.CHANGE,
-                                                 group__g2ugp__user=self.user).exists():
-            return True
+        if flags.immutable:
+            return False
 
-        return False
+        return privilege <= PrivilegeCodes.CHANGE
 
     def can_change_resource_flags(self, this_resource):
         """
@@ -2469,8 +2706,11 @@ class UserAccess(models.Model):
         if not self.user.is_active:
             raise PermissionDenied("Requesting user is not active")
 
-        return self.user.is_superuser or \
-            (not this_resource.raccess.published and self.owns_resource(this_resource))
+        if self.user.is_superuser:
+            return True
+
+        privilege, flags = self.privilege_cache.get(this_resource)
+        return not flags.published and privilege == PrivilegeCodes.OWNER
 
     def can_view_resource(self, this_resource):
         """
@@ -2493,25 +2733,15 @@ class UserAccess(models.Model):
         if not self.user.is_active:
             raise PermissionDenied("Requesting user is not active")
 
-        access_resource = this_resource.raccess
+        privilege, flags = self.privilege_cache.get(this_resource)
 
-        if access_resource.public:
+        if flags.public:
             return True
 
         if self.user.is_superuser:
             return True
 
-        if UserResourcePrivilege.objects.filter(resource=this_resource,
-                                                privilege__lte=PrivilegeCodes.VIEW,
-                                                user=self.user).exists():
-            return True
-
-        if GroupResourcePrivilege.objects.filter(resource=this_resource,
-                                                 privilege__lte=PrivilegeCodes.VIEW,
-                                                 group__g2ugp__user=self.user).exists():
-            return True
-
-        return False
+        return privilege <= PrivilegeCodes.VIEW
 
     def can_delete_resource(self, this_resource):
         """
@@ -2534,7 +2764,8 @@ class UserAccess(models.Model):
         if self.user.is_superuser:
             return True
 
-        return self.owns_resource(this_resource) and not this_resource.raccess.published
+        privilege, flags = self.privilege_cache.get(this_resource)
+        return privilege == PrivilegeCodes.OWNER and not flags.published
 
     ##########################################
     # check sharing rights
@@ -3701,6 +3932,13 @@ class GroupAccess(models.Model):
             return PrivilegeCodes.NONE
 
 
+@receiver(post_save, sender=GroupAccess)
+def refresh_group_combined_privilege(sender, instance, **kwargs):
+    """ Group status determines whether group privileges count toward combined privilege """
+    UserResourceCombinedPrivilege.update_for_group(instance.group)
+    invalidate_privilege_caches()
+
+
 class ResourceAccess(models.Model):
     """ Resource model for access control
     """
@@ -3973,9 +4211,14 @@ class ResourceAccess(models.Model):
         if not this_user.is_active:
             raise PermissionDenied("Grantee user is not active")
 
-        user_priv = self.get_effective_user_privilege(this_user)
-        group_priv = self.get_effective_group_privilege(this_user)
-        return min(user_priv, group_priv)
+        if this_user.is_superuser:
+            return PrivilegeCodes.OWNER
+
+        privilege = UserResourceCombinedPrivilege.get_privilege(this_user, self.resource_id)
+        if self.immutable and privilege == PrivilegeCodes.CHANGE:
+            return PrivilegeCodes.VIEW
+        else:
+            return privilege
 
     @property
     def sharing_status(self):
@@ -3988,3 +4231,9 @@ class ResourceAccess(models.Model):
             return "discoverable"
         else:
             return "private"
+
+
+@receiver(post_save, sender=ResourceAccess)
+def invalidate_resource_flags(sender, instance, **kwargs):
+    """ Resource flags are cached along with privilege """
+    invalidate_privilege_caches()
@@ -0,0 +1,140 @@
+from django.test import TestCase
+from django.contrib.auth.models import Group
+from django.core.management import call_command
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+
+from hs_access_control.models import PrivilegeCodes, UserResourceCombinedPrivilege
+
+from hs_core import hydroshare
+from hs_core.testing import MockIRODSTestCaseMixin
+
+from hs_access_control.tests.utilities import global_reset
+
+
+class T18CombinedPrivilege(MockIRODSTestCaseMixin, TestCase):
+    """ combined privilege follows user, group and membership privilege """
+
+    def setUp(self):
+        super(T18CombinedPrivilege, self).setUp()
+        global_reset()
+        self.group, _ = Group.objects.get_or_create(name='Hydroshare Author')
+
+        self.dog = hydroshare.create_account(
+            'dog@gmail.com',
+            username='dog',
+            first_name='a little arfer',
+            last_name='last_name_dog',
+            superuser=False,
+            groups=[]
+        )
+
+        self.cat = hydroshare.create_account(
+            'cat@gmail.com',
+            username='cat',
+            first_name='not a dog',
+            last_name='last_name_cat',
+            superuser=False,
+            groups=[]
+        )
+
+        self.scratching = hydroshare.create_resource(
+            resource_type='GenericResource',
+            owner=self.dog,
+            title='all about sofas as scratching posts',
+            metadata=[],
+        )
+
+        self.felines = self.dog.uaccess.create_group(
+            title='felines', description="We are the felines")
+
+    def assertCombined(self, privilege):
+        self.assertEqual(
+            UserResourceCombinedPrivilege.get_privilege(self.cat, self.scratching), privilege)
+        self.assertEqual(UserResourceCombinedPrivilege.differences(), [])
+
+    def test_user_and_group_privilege(self):
+        dog = self.dog
+        cat = self.cat
+        scratching = self.scratching
+        felines = self.felines
+
+        self.assertEqual(
+            UserResourceCombinedPrivilege.get_privilege(dog, scratching), PrivilegeCodes.OWNER)
+        self.assertCombined(PrivilegeCodes.NONE)
+
+        dog.uaccess.share_resource_with_user(scratching, cat, PrivilegeCodes.VIEW)
+        self.assertCombined(PrivilegeCodes.VIEW)
+        self.assertIn(scratching, cat.uaccess.view_resources)
+        self.assertNotIn(scratching, cat.uaccess.edit_resources)
+
+        # group privilege only counts for members
+        dog.uaccess.share_resource_with_group(scratching, felines, PrivilegeCodes.CHANGE)
+        self.assertCombined(PrivilegeCodes.VIEW)
+        dog.uaccess.share_group_with_user(felines, cat, PrivilegeCodes.VIEW)
+        self.assertCombined(PrivilegeCodes.CHANGE)
+        self.assertIn(scratching, cat.uaccess.edit_resources)
+
+        # an inactive group confers no privilege
+        felines.gaccess.active = False
+        felines.gaccess.save()
+        self.assertCombined(PrivilegeCodes.VIEW)
+        felines.gaccess.active = True
+        felines.gaccess.save()
+        self.assertCombined(PrivilegeCodes.CHANGE)
+
+        # immutability is applied when effective privilege is computed
+        scratching.raccess.immutable = True
+        scratching.raccess.save()
+        self.assertEqual(scratching.raccess.get_effective_privilege(cat), PrivilegeCodes.VIEW)
+        self.assertNotIn(scratching, cat.uaccess.edit_resources)
+        scratching.raccess.immutable = False
+        scratching.raccess.save()
+
+        dog.uaccess.unshare_resource_with_user(scratching, cat)
+        self.assertCombined(PrivilegeCodes.CHANGE)
+        dog.uaccess.unshare_resource_with_group(scratching, felines)
+        self.assertCombined(PrivilegeCodes.NONE)
+        self.assertNotIn(scratching, cat.uaccess.view_resources)
+
+    def test_undo_and_group_deletion(self):
+        dog = self.dog
+        cat = self.cat
+        scratching = self.scratching
+        felines = self.felines
+
+        dog.uaccess.share_resource_with_user(scratching, cat, PrivilegeCodes.CHANGE)
+        self.assertCombined(PrivilegeCodes.CHANGE)
+        dog.uaccess.undo_share_resource_with_user(scratching, cat)
+        self.assertCombined(PrivilegeCodes.NONE)
+
+        dog.uaccess.share_group_with_user(felines, cat, PrivilegeCodes.VIEW)
+        dog.uaccess.share_resource_with_group(scratching, felines, PrivilegeCodes.VIEW)
+        self.assertCombined(PrivilegeCodes.VIEW)
+        dog.uaccess.delete_group(felines)
+        self.assertCombined(PrivilegeCodes.NONE)
+
+    def test_single_query_authorization(self):
+        self.dog.uaccess.share_group_with_user(self.felines, self.cat, PrivilegeCodes.VIEW)
+        self.dog.uaccess.share_resource_with_group(self.scratching, self.felines,
+                                                   PrivilegeCodes.CHANGE)
+        raccess = self.scratching.raccess
+        with CaptureQueriesContext(connection) as ctx:
+            self.assertEqual(raccess.get_effective_privilege(self.cat), PrivilegeCodes.CHANGE)
+        self.assertEqual(len(ctx.captured_queries), 1)
+
+    def test_consistency_checker(self):
+        self.dog.uaccess.share_resource_with_user(self.scratching, self.cat,
+                                                  PrivilegeCodes.VIEW)
+        UserResourceCombinedPrivilege.objects.filter(user=self.cat).delete()
+        UserResourceCombinedPrivilege.objects.filter(user=self.dog)\
+            .update(privilege=PrivilegeCodes.VIEW)
+        self.assertEqual(len(UserResourceCombinedPrivilege.differences()), 2)
+
+        call_command('check_combined_privilege')
+        self.assertEqual(len(UserResourceCombinedPrivilege.differences()), 2)
+        call_command('check_combined_privilege', self.scratching.short_id, fix=True)
+        self.assertCombined(PrivilegeCodes.VIEW)
+        self.assertEqual(
+            UserResourceCombinedPrivilege.get_privilege(self.dog, self.scratching),
+            PrivilegeCodes.OWNER)
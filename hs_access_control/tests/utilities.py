@@ -15,7 +15,8 @@ from pprint import pprint
 
 from hs_access_control.models import UserAccess, GroupAccess, ResourceAccess, \
     UserResourcePrivilege, GroupResourcePrivilege, UserGroupPrivilege, PrivilegeCodes, \
-    UserResourceProvenance, GroupResourceProvenance, UserGroupProvenance
+    UserResourceProvenance, GroupResourceProvenance, UserGroupProvenance, \
+    UserResourceCombinedPrivilege
 
 
 # from hs_core import hydroshare
@@ -27,6 +28,7 @@ def global_reset():
     UserResourcePrivilege.objects.all().delete()
     UserGroupPrivilege.objects.all().delete()
     GroupResourcePrivilege.objects.all().delete()
+    UserResourceCombinedPrivilege.objects.all().delete()
     UserResourceProvenance.objects.all().delete()
     UserGroupProvenance.objects.all().delete()
     GroupResourceProvenance.objects.all().delete()
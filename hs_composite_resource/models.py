@@ -47,20 +47,16 @@ class CompositeResource(BaseResource):
         """ if this resource allows associating resource file objects with logical file"""
         return True
 
-    def get_metadata_xml(self, pretty_print=True, include_format_elements=True):
+    def _get_metadata_xml(self, pretty_print=True, include_format_elements=True):
         from lxml import etree
 
-        # get resource level core metadata as xml string
+        # get resource level core metadata as an xml tree
         # for composite resource we don't want the format elements at the resource level
         # as they are included at the file level xml node
-        xml_string = super(CompositeResource, self).get_metadata_xml(pretty_print=False,
-                                                                     include_format_elements=False)
-        # add file type metadata xml
+        RDF_ROOT = self.metadata.get_xml_root(include_format_elements=False)
 
-        # create an etree xml object
-        RDF_ROOT = etree.fromstring(xml_string)
-
-        # get root 'Description' element that contains all other elements
+        # add file type metadata xml to the root 'Description' element that contains all
+        # other elements
         container = RDF_ROOT.find('rdf:Description', namespaces=self.metadata.NAMESPACES)
 
         for lf in self.logical_files:
@@ -1,6 +1,7 @@
 from haystack.forms import FacetedSearchForm
 from haystack.query import SQ
 from django import forms
+from hs_core.search_indexes import coverage_day, COVERAGE_DAY_MAX
 from hs_core.discovery_parser import ParseSQ, MatchingBracketsNotFoundError, \
     FieldNotRecognizedError, InequalityNotAllowedError, MalformedDateError
 
@@ -68,44 +69,24 @@ class DiscoveryForm(FacetedSearchForm):
                 self.parse_error = "{} No matches. Please try again.".format(e.value)
                 return sqs
 
-        geo_sq = None
-        if self.cleaned_data['NElng'] and self.cleaned_data['SWlng']:
-            if float(self.cleaned_data['NElng']) > float(self.cleaned_data['SWlng']):
-                geo_sq = SQ(east__lte=float(self.cleaned_data['NElng']))
-                geo_sq.add(SQ(east__gte=float(self.cleaned_data['SWlng'])), SQ.AND)
-            else:
-                geo_sq = SQ(east__gte=float(self.cleaned_data['SWlng']))
-                geo_sq.add(SQ(east__lte=float(180)), SQ.OR)
-                geo_sq.add(SQ(east__lte=float(self.cleaned_data['NElng'])), SQ.AND)
-                geo_sq.add(SQ(east__gte=float(-180)), SQ.AND)
-
-        if self.cleaned_data['NElat'] and self.cleaned_data['SWlat']:
-            # latitude might be specified without longitude
-            if geo_sq is None:
-                geo_sq = SQ(north__lte=float(self.cleaned_data['NElat']))
-            else:
-                geo_sq.add(SQ(north__lte=float(self.cleaned_data['NElat'])), SQ.AND)
-            geo_sq.add(SQ(north__gte=float(self.cleaned_data['SWlat'])), SQ.AND)
-
-        if geo_sq is not None:
-            sqs = sqs.filter(geo_sq)
+        # Spatial and temporal intersection with every coverage of a resource are Solr
+        # filter queries on the spatial fields defined in search_configuration/solr.xml.
+        bbox = self.coverage_bbox()
+        if bbox is not None:
+            sqs = sqs.narrow('coverage_geometry:"Intersects({} {} {} {})"'.format(*bbox))
 
         # Check to see if a start_date was chosen.
         start_date = self.cleaned_data['start_date']
         end_date = self.cleaned_data['end_date']
 
-        # allow overlapping ranges
-        # cs < s < ce OR s < cs => s < ce
-        # AND
-        # cs < e < ce OR e > ce => cs < e
-        if start_date and end_date:
-            sqs = sqs.filter(SQ(end_date__gte=start_date) &
-                             SQ(start_date__lte=end_date))
-        elif start_date:
-            sqs = sqs.filter(SQ(end_date__gte=start_date))
-
-        elif end_date:
-            sqs = sqs.filter(SQ(start_date__lte=end_date))
+        # allow overlapping ranges: a coverage period (cs, ce) overlaps (s, e) when
+        # cs <= e and ce >= s, i.e., when the point (cs, ce) is in the rectangle
+        # (0, s) - (e, max).
+        if start_date or end_date:
+            s = coverage_day(start_date) if start_date else 0
+            e = coverage_day(end_date) if end_date else COVERAGE_DAY_MAX
+            sqs = sqs.narrow('coverage_period:"Intersects(0 {} {} {})"'
+                             .format(s, e, COVERAGE_DAY_MAX))
 
         if self.cleaned_data['coverage_type']:
             sqs = sqs.filter(coverage_types__in=[self.cleaned_data['coverage_type']])
@@ -181,3 +162,20 @@ class DiscoveryForm(FacetedSearchForm):
             sqs = sqs.filter(availability_sq)
 
         return sqs
+
+    def coverage_bbox(self):
+        """
+        Return the map bounds of the search as (west, south, east, north), or None.
+
+        Longitude or latitude may be given without the other. A west bound greater
+        than the east bound denotes a box that crosses the dateline.
+        """
+        ne_lng, sw_lng = self.cleaned_data['NElng'], self.cleaned_data['SWlng']
+        ne_lat, sw_lat = self.cleaned_data['NElat'], self.cleaned_data['SWlat']
+        has_lng = bool(ne_lng and sw_lng)
+        has_lat = bool(ne_lat and sw_lat)
+        if not has_lng and not has_lat:
+            return None
+        west, east = (float(sw_lng), float(ne_lng)) if has_lng else (-180.0, 180.0)
+        south, north = (float(sw_lat), float(ne_lat)) if has_lat else (-90.0, 90.0)
+        return west, south, east, north
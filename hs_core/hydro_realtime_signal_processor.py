@@ -1,10 +1,6 @@
-from django.db import models
+from django.conf import settings
 from haystack.signals import RealtimeSignalProcessor
-from haystack.exceptions import NotHandled
 import logging
-import types
-from haystack.query import SearchQuerySet
-from haystack.utils import get_identifier
 
 logger = logging.getLogger(__name__)
 
@@ -18,67 +14,44 @@ class HydroRealtimeSignalProcessor(RealtimeSignalProcessor):
     1. RealtimeSignalProcessor already plumbs in all class updates. We might want to be more specific. 
     2. The class sent to this is a subclass of BaseResource, or another class. 
     3. Thus, we want to capture cases in which it is an appropriate instance, and respond. 
+    4. Solr is not updated here. The resource is queued and hs_core.tasks.process_solr_index_queue
+       sends queued resources to Solr in batches, SOLR_INDEX_DELAY seconds after the first
+       change. Repeated saves of a resource in the meantime cost nothing in Solr.
     """
 
+    def enqueue(self, resource_id):
+        """ Queue a resource for indexing and schedule processing of a new queue entry """
+        from hs_core.models import SolrIndexQueue
+        from hs_core.tasks import process_solr_index_queue
+
+        if SolrIndexQueue.enqueue(resource_id):
+            process_solr_index_queue.apply_async(
+                countdown=getattr(settings, 'SOLR_INDEX_DELAY', 5))
+
     def handle_save(self, sender, instance, **kwargs):
         """
-        Given an individual model instance, determine which backends the
-        update should be sent to & update the object on those backends.
+        Given an individual model instance, queue the resource it describes for
+        update in (or removal from) the index.
         """
         from hs_core.models import BaseResource
         from hs_access_control.models import ResourceAccess
-    
+
         if isinstance(instance, BaseResource):
-            if hasattr(instance, 'raccess') and hasattr(instance, 'metadata'): 
-                # work around for failure of super(BaseResource, instance) to work properly.
-                # this always succeeds because this is a post-save object action. 
-                newinstance = BaseResource.objects.get(pk=instance.pk)
-                newsender = BaseResource
-                using_backends = self.connection_router.for_write(instance=newinstance)
-                for using in using_backends:
-                    # if object is public/discoverable or becoming public/discoverable, index it 
-                    if instance.raccess.public or instance.raccess.discoverable: 
-                        try:
-                            index = self.connections[using].get_unified_index().get_index(newsender)
-                            index.update_object(newinstance, using=using)
-                        except NotHandled:
-                            logger.exception("Failure: changes to %s with short_id %s not added to Solr Index.", str(type(instance)), newinstance.short_id)
-                    # if object is private or becoming private, delete from index
-                    else:
-                        try:
-                            index = self.connections[using].get_unified_index().get_index(newsender)
-                            index.remove_object(newinstance, using=using)
-                        except NotHandled:
-                            logger.exception("Failure: delete of %s with short_id %s failed.", str(type(instance)), newinstance.short_id)
+            if hasattr(instance, 'raccess') and hasattr(instance, 'metadata'):
+                self.enqueue(instance.pk)
 
         elif isinstance(instance, ResourceAccess):
-            # automatically a BaseResource; just call the routine on it. 
-            newinstance = instance.resource
-            newsender = BaseResource
-            self.handle_save(newsender, newinstance)
-
+            self.enqueue(instance.resource_id)
 
     def handle_delete(self, sender, instance, **kwargs):
         """
-        Given an individual model instance, determine which backends the
-        delete should be sent to & delete the object on those backends.
+        Given an individual model instance, queue the resource it describes for
+        removal from the index.
         """
-        from hs_core.models import BaseResource
         from hs_access_control.models import ResourceAccess
 
         # only delete the SOLR instance when the raccess field is recursively deleted.
-        # At this point, the resource still exists.
-        # Thus, the BaseResource is literally available and can be unindexed.
-        # Trying to delete as a result of deleting the Resource fails, because
-        # it is not possible to recover the BaseResource object.
+        # The queued entry is processed after the resource is gone, and is unindexed
+        # by identifier.
         if isinstance(instance, ResourceAccess):
-            newinstance = instance.resource # automatically a BaseResource
-            newsender = BaseResource
-            # self.handle_delete(newsender, newinstance)
-            using_backends = self.connection_router.for_write(instance=newinstance)
-            for using in using_backends:
-                try:
-                    index = self.connections[using].get_unified_index().get_index(newsender)
-                    index.remove_object(newinstance, using=using)
-                except NotHandled:
-                    logger.exception("Failure: delete of %s with short_id %s failed.", str(type(instance)), newinstance.short_id)
+            self.enqueue(instance.resource_id)
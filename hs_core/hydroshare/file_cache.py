@@ -0,0 +1,167 @@
+"""
+A bounded local disk cache of files copied from iRODS.
+
+Metadata extraction and SQLite updates work on local copies of resource files, and
+transferring a multi-GB file from iRODS takes minutes. The cache keeps one local copy of each
+version of a file, identified by its storage path together with the size, modification time
+and checksum recorded by iRODS, so an unchanged file is transferred only once. Callers always
+get their own working copy of the cached file, since they may modify, move or delete it.
+
+The cache lives in FILE_CACHE_DIR (default: a file_cache folder in TEMP_FILE_DIR) and is shared
+by all web and celery processes on a host:
+
+* each entry is a folder holding the cached file, named by a hash of the file version;
+* a process using an entry holds a shared lock on the entry's lock file;
+* least recently used entries are evicted once the cache holds more than FILE_CACHE_SIZE
+  bytes (default 20GB), skipping entries that any process is using.
+
+Files larger than the whole cache are not cached, and a FILE_CACHE_SIZE of 0 turns the cache
+off.
+"""
+import errno
+import fcntl
+import hashlib
+import logging
+import os
+import shutil
+import tempfile
+import time
+from contextlib import contextmanager
+
+from django.conf import settings
+
+logger = logging.getLogger(__name__)
+
+# incoming downloads left behind by processes that died are removed after this many seconds
+STALE_DOWNLOAD_AGE = 24 * 60 * 60
+
+# counts for this process
+_stats = {'hits': 0, 'misses': 0, 'evictions': 0, 'bytes_transferred': 0}
+
+
+def cache_dir():
+    """Return the folder that holds the cache."""
+    return getattr(settings, 'FILE_CACHE_DIR',
+                   os.path.join(settings.TEMP_FILE_DIR, 'file_cache'))
+
+
+def cache_size():
+    """Return the maximum number of bytes held by the cache."""
+    return getattr(settings, 'FILE_CACHE_SIZE', 20 * 1024 ** 3)
+
+
+def entry_key(storage_path, stat):
+    """Return the cache key of the version of a file described by an IrodsFileStat."""
+    version = u'|'.join([storage_path, str(stat.size), str(stat.modified), stat.checksum or ''])
+    return hashlib.sha1(version.encode('utf-8')).hexdigest()
+
+
+@contextmanager
+def _entry_in_use(key):
+    """
+    Hold a shared lock on an entry so that it is not evicted; yield (lock file, entry folder).
+    """
+    root = cache_dir()
+    # lock files are never removed: a process may be waiting to lock one
+    with open(os.path.join(root, key + '.lock'), 'a') as lock:
+        fcntl.flock(lock, fcntl.LOCK_SH)
+        yield lock, os.path.join(root, key)
+
+
+def fetch(storage_path, stat, download, destination):
+    """
+    Make a local copy of a version of a file, transferring it only if it is not cached.
+
+    :param storage_path: the storage path of the file
+    :param stat: the IrodsFileStat of the file, identifying its current version
+    :param download: a function that transfers the file to the local path it is given
+    :param destination: the local path of the copy to make
+    """
+    if stat.size > cache_size():
+        download(destination)
+        _stats['misses'] += 1
+        _stats['bytes_transferred'] += stat.size
+        return
+
+    root = cache_dir()
+    try:
+        os.makedirs(root)
+    except OSError as ex:
+        if ex.errno != errno.EEXIST:
+            raise
+
+    file_name = os.path.basename(destination)
+    with _entry_in_use(entry_key(storage_path, stat)) as (lock, entry):
+        if not os.path.exists(entry):
+            # only one process transfers a version; others wait for it and then use its copy
+            fcntl.flock(lock, fcntl.LOCK_EX)
+        if os.path.exists(entry):
+            _stats['hits'] += 1
+            # the folder modification time orders entries for eviction
+            os.utime(entry, None)
+        else:
+            _stats['misses'] += 1
+            _stats['bytes_transferred'] += stat.size
+            incoming = tempfile.mkdtemp(prefix='.incoming-', dir=root)
+            try:
+                download(os.path.join(incoming, file_name))
+            except Exception:
+                shutil.rmtree(incoming, ignore_errors=True)
+                raise
+            # the entry appears only once it is complete
+            os.rename(incoming, entry)
+        cached_name = os.listdir(entry)[0]
+        shutil.copyfile(os.path.join(entry, cached_name), destination)
+    evict()
+
+
+def _entries():
+    """Return a list of (last used time, size in bytes, key) of the cache entries."""
+    root = cache_dir()
+    entries = []
+    now = time.time()
+    for name in os.listdir(root) if os.path.isdir(root) else []:
+        path = os.path.join(root, name)
+        if name.startswith('.incoming-'):
+            if now - os.path.getmtime(path) > STALE_DOWNLOAD_AGE:
+                shutil.rmtree(path, ignore_errors=True)
+        elif os.path.isdir(path):
+            size = sum(os.path.getsize(os.path.join(path, f)) for f in os.listdir(path))
+            entries.append((os.path.getmtime(path), size, name))
+    return entries
+
+
+def evict():
+    """Remove least recently used entries that are not in use until the cache fits its size."""
+    entries = sorted(_entries())
+    total = sum(size for _, size, _ in entries)
+    limit = cache_size()
+    root = cache_dir()
+    for _, size, key in entries:
+        if total <= limit:
+            break
+        with open(os.path.join(root, key + '.lock'), 'a') as lock:
+            try:
+                fcntl.flock(lock, fcntl.LOCK_EX | fcntl.LOCK_NB)
+            except IOError:
+                continue  # in use
+            shutil.rmtree(os.path.join(root, key), ignore_errors=True)
+        total -= size
+        _stats['evictions'] += 1
+    if total > limit:
+        logger.warning("file cache holds {} bytes in use, more than its size of {} bytes"
+                       .format(total, limit))
+
+
+def stats():
+    """
+    Return a dict of cache statistics.
+
+    'entries' and 'bytes' describe the cache on disk; 'hits', 'misses', 'evictions' and
+    'bytes_transferred' count the activity of this process.
+    """
+    entries = _entries()
+    data = dict(_stats)
+    data['entries'] = len(entries)
+    data['bytes'] = sum(size for _, size, _ in entries)
+    return data
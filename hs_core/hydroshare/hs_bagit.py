@@ -1,14 +1,13 @@
 import os
 import shutil
-import errno
 import tempfile
 import mimetypes
 import zipfile
 
-from uuid import uuid4
+from multiprocessing.pool import ThreadPool
+from xml.sax.saxutils import escape
 
-from foresite import utils, Aggregation, AggregatedResource, RdfLibSerializer
-from rdflib import Namespace, URIRef
+from django.utils.timezone import now
 
 import bagit
 from mezzanine.conf import settings
@@ -42,151 +41,199 @@ def delete_files_and_bag(resource):
         bag.delete()
 
 
-def create_bag_files(resource):
-    """
-    create and update files needed by bagit operation that is conducted on iRODS server;
-    no bagit operation is performed, only files that will be included in the bag are created
-    or updated.
+RESOURCE_MAP_NAMESPACES = (
+    ('citoterms', 'http://purl.org/spar/cito/'),
+    ('dc', 'http://purl.org/dc/elements/1.1/'),
+    ('dcterms', 'http://purl.org/dc/terms/'),
+    ('foaf', 'http://xmlns.com/foaf/0.1/'),
+    ('ore', 'http://www.openarchives.org/ore/terms/'),
+    ('rdf', 'http://www.w3.org/1999/02/22-rdf-syntax-ns#'),
+    ('rdfs1', 'http://www.w3.org/2001/01/rdf-schema#'),
+)
 
-    Parameters:
-    :param resource: A resource whose files will be created or updated to be included in the
-    resource bag.
-    :return: istorage, an IrodsStorage object that will be used by subsequent operation to
-    create a bag on demand as needed.
-    """
-    from hs_core.hydroshare.utils import current_site_url, get_file_mime_type
 
-    istorage = resource.get_irods_storage()
+def _literal(tag, value):
+    return u'<{0}>{1}</{0}>'.format(tag, escape(value))
 
-    # the temp_path is a temporary holding path to make the files available to iRODS
-    # we have to make temp_path unique even for the same resource with same update time
-    # to accommodate asynchronous multiple file move operations for the same resource
 
-    # TODO: This is always in /tmp; otherwise code breaks because open() is called on the result!
-    temp_path = os.path.join(getattr(settings, 'IRODS_ROOT', '/tmp'), uuid4().hex)
+def _reference(tag, uri):
+    return u'<{0} rdf:resource="{1}"/>'.format(tag, escape(uri, {'"': '&quot;'}))
 
-    try:
-        os.makedirs(temp_path)
-    except OSError as ex:
-        # TODO: there might be concurrent operations.
-        if ex.errno == errno.EEXIST:
-            shutil.rmtree(temp_path)
-            os.makedirs(temp_path)
-        else:
-            raise Exception(ex.message)
 
-    # an empty visualization directory will not be put into the zipped bag file by ibun command,
-    # so creating an empty visualization directory to be put into the zip file as done by the two
-    # statements below does not work. However, if visualization directory has content to be
-    # uploaded, it will work. This is to be implemented as part of the resource model in the future.
-    # The following two statements are placeholders serving as reminder
-    # to_file_name = '{res_id}/data/visualization/'.format(res_id=resource.short_id)
-    # istorage.saveFile('', to_file_name, create_directory=True)
+def resource_map_lines(resource):
+    """
+    Generate the lines of the OAI-ORE resource map (resourcemap.xml) of a resource as RDF/XML.
 
-    # create resourcemetadata.xml in local directory and upload it to iRODS
-    from_file_name = os.path.join(temp_path, 'resourcemetadata.xml')
-    with open(from_file_name, 'w') as out:
-        # resources that don't support file types this would write only resource level metadata
-        # resource types that support file types this would write resource level metadata
-        # as well as file type metadata
-        out.write(resource.get_metadata_xml())
-    to_file_name = os.path.join(resource.root_path, 'data', 'resourcemetadata.xml')
-    istorage.saveFile(from_file_name, to_file_name, True)
+    The map describes the aggregation of the resource metadata document, every resource file
+    and, for collections, the resource maps of contained resources. Files are read from a
+    single values query and each is emitted as soon as it is read, so memory use does not
+    depend upon the number of files.
+    """
+    from hs_core.hydroshare.utils import current_site_url, get_file_mime_type
 
     # URLs are found in the /data/ subdirectory to comply with bagit format assumptions
-    current_site_url = current_site_url()
+    site_url = current_site_url()
     # This is the qualified resource url.
-    hs_res_url = os.path.join(current_site_url, 'resource', resource.short_id, 'data')
+    hs_res_url = os.path.join(site_url, 'resource', resource.short_id, 'data')
     # this is the path to the resourcemedata file for download
     metadata_url = os.path.join(hs_res_url, 'resourcemetadata.xml')
     # this is the path to the resourcemap file for download
     res_map_url = os.path.join(hs_res_url, 'resourcemap.xml')
-
-    # make the resource map:
-    utils.namespaces['citoterms'] = Namespace('http://purl.org/spar/cito/')
-    utils.namespaceSearchOrder.append('citoterms')
-
     ag_url = os.path.join(hs_res_url, 'resourcemap.xml#aggregation')
-    a = Aggregation(ag_url)
-
-    # Set properties of the aggregation
-    a._dc.title = resource.metadata.title.value
-    a._dcterms.type = URIRef(resource.metadata.type.url)
-    a._citoterms.isDocumentedBy = metadata_url
-    a._ore.isDescribedBy = res_map_url
-
-    res_type_aggregation = AggregatedResource(resource.metadata.type.url)
-    res_type_aggregation._rdfs.label = resource._meta.verbose_name
-    res_type_aggregation._rdfs.isDefinedBy = current_site_url + "/terms"
-
-    a.add_resource(res_type_aggregation)
-
-    # Create a description of the metadata document that describes the whole resource and add it
-    # to the aggregation
-    resMetaFile = AggregatedResource(metadata_url)
-    resMetaFile._dc.title = "Dublin Core science metadata document describing the HydroShare " \
-                            "resource"
-    resMetaFile._citoterms.documents = ag_url
-    resMetaFile._ore.isAggregatedBy = ag_url
-    resMetaFile._dc.format = "application/rdf+xml"
-
-    # Create a description of the content file and add it to the aggregation
-    files = ResourceFile.objects.filter(object_id=resource.id)
-    resFiles = []
-    for n, f in enumerate(files):
+    type_url = resource.metadata.type.url
+    timestamp = now().isoformat()
+    xsd_datetime = 'http://www.w3.org/2001/XMLSchema#dateTime'
+
+    yield u'<?xml version="1.0" encoding="UTF-8"?>'
+    yield u'<rdf:RDF'
+    for prefix, uri in RESOURCE_MAP_NAMESPACES:
+        yield u'   xmlns:{}="{}"'.format(prefix, uri)
+    yield u'>'
+
+    # the resource map itself
+    yield u'  <rdf:Description rdf:about="{}">'.format(escape(res_map_url))
+    yield u'    ' + _reference('rdf:type', 'http://www.openarchives.org/ore/terms/ResourceMap')
+    yield u'    ' + _reference('ore:describes', ag_url)
+    yield u'    ' + _literal('dc:identifier', resource.short_id)
+    yield u'    <dc:creator rdf:nodeID="creator"/>'
+    for term in ('created', 'modified'):
+        yield u'    <dcterms:{0} rdf:datatype="{1}">{2}</dcterms:{0}>'.format(term, xsd_datetime,
+                                                                           timestamp)
+    yield u'  </rdf:Description>'
+    yield u'  <rdf:Description rdf:nodeID="creator">'
+    yield u'    ' + _literal('foaf:name', 'HydroShare')
+    yield u'  </rdf:Description>'
+
+    # the resource type
+    yield u'  <rdf:Description rdf:about="{}">'.format(escape(type_url))
+    yield u'    ' + _literal('rdfs1:label', unicode(resource._meta.verbose_name))
+    yield u'    ' + _literal('rdfs1:isDefinedBy', site_url + "/terms")
+    yield u'  </rdf:Description>'
+
+    # the aggregation, and the metadata document that describes the whole resource
+    yield u'  <rdf:Description rdf:about="{}">'.format(escape(ag_url))
+    yield u'    ' + _reference('rdf:type', 'http://www.openarchives.org/ore/terms/Aggregation')
+    yield u'    ' + _literal('dc:title', resource.metadata.title.value)
+    yield u'    ' + _reference('dcterms:type', type_url)
+    yield u'    ' + _literal('citoterms:isDocumentedBy', metadata_url)
+    yield u'    ' + _reference('ore:isDescribedBy', res_map_url)
+    yield u'    <ore:aggregates>'
+    yield u'      <rdf:Description rdf:about="{}">'.format(escape(metadata_url))
+    yield u'        ' + _literal('dc:title', "Dublin Core science metadata document "
+                                             "describing the HydroShare resource")
+    yield u'        ' + _literal('citoterms:documents', ag_url)
+    yield u'        ' + _literal('ore:isAggregatedBy', ag_url)
+    yield u'        ' + _literal('dc:format', "application/rdf+xml")
+    yield u'      </rdf:Description>'
+    yield u'    </ore:aggregates>'
+
+    def aggregated(uri, file_format):
+        yield u'    <ore:aggregates>'
+        yield u'      <rdf:Description rdf:about="{}">'.format(escape(uri, {'"': '&quot;'}))
+        yield u'        ' + _literal('ore:isAggregatedBy', ag_url)
+        yield u'        ' + _literal('dc:format', file_format)
+        yield u'      </rdf:Description>'
+        yield u'    </ore:aggregates>'
+
+    # the content files
+    name_field = 'fed_resource_file' if resource.is_federated else 'resource_file'
+    names = ResourceFile.objects.filter(object_id=resource.id)\
+        .values_list(name_field, flat=True).iterator()
+    for name in names:
+        folder, base = ResourceFile.resource_path_is_acceptable(resource, name,
+                                                                test_exists=False)
+        short_path = os.path.join(folder, base) if folder is not None else base
         res_uri = u'{hs_url}/resource/{res_id}/data/contents/{file_name}'.format(
-            hs_url=current_site_url,
+            hs_url=site_url,
             res_id=resource.short_id,
-            file_name=f.short_path)
-        resFiles.append(AggregatedResource(res_uri))
-        resFiles[n]._ore.isAggregatedBy = ag_url
-        resFiles[n]._dc.format = get_file_mime_type(os.path.basename(f.short_path))
-
-    # Add the resource files to the aggregation
-    a.add_resource(resMetaFile)
-    for f in resFiles:
-        a.add_resource(f)
+            file_name=short_path)
+        for line in aggregated(res_uri, get_file_mime_type(base)):
+            yield line
 
     # handle collection resource type
     # save contained resource urls into resourcemap.xml
     if resource.resource_type == "CollectionResource" and resource.resources:
-        for contained_res in resource.resources.all():
-            contained_res_id = contained_res.short_id
+        for contained_res_id in resource.resources.values_list('short_id', flat=True):
             resource_map_url = '{hs_url}/resource/{res_id}/data/resourcemap.xml'.format(
-                    hs_url=current_site_url,
+                    hs_url=site_url,
                     res_id=contained_res_id)
+            for line in aggregated(resource_map_url, "application/rdf+xml"):
+                yield line
 
-            ar = AggregatedResource(resource_map_url)
-            ar._ore.isAggregatedBy = ag_url
-            ar._dc.format = "application/rdf+xml"
-            a.add_resource(ar)
+    yield u'  </rdf:Description>'
+    yield u'</rdf:RDF>'
 
-    # Register a serializer with the aggregation, which creates a new ResourceMap that needs a URI
-    serializer = RdfLibSerializer('xml')
-    resMap = a.register_serialization(serializer, res_map_url)
-    resMap._dc.identifier = resource.short_id
 
-    # Fetch the serialization
-    remdoc = a.get_serialization()
+def write_resource_map(resource, out):
+    """Write the resource map of a resource to the file object out, a line at a time."""
+    for line in resource_map_lines(resource):
+        out.write(line.encode('utf-8'))
+        out.write('\n')
 
-    # change the namespace for the 'creator' element from 'dcterms' to 'dc'
-    xml_string = remdoc.data.replace('dcterms:creator', 'dc:creator')
 
-    # delete this extra element
-    # <ore:aggregates rdf:resource="[hydroshare domain]/terms/[Resource class name]"/>
-    xml_string = xml_string.replace(
-        '<ore:aggregates rdf:resource="%s"/>\n' % str(resource.metadata.type.url), '')
+def stage_file(write):
+    """
+    Return a local temporary file holding the content written to it by write(file).
 
-    # create resourcemap.xml and upload it to iRODS
-    from_file_name = os.path.join(temp_path, 'resourcemap.xml')
-    with open(from_file_name, 'w') as out:
-        out.write(xml_string)
-    to_file_name = os.path.join(resource.root_path, 'data', 'resourcemap.xml')
-    istorage.saveFile(from_file_name, to_file_name, False)
+    IrodsStorage can only upload local files, so files built by Django are staged on local
+    disk for upload. The file is removed when it is closed.
+    """
+    staged = tempfile.NamedTemporaryFile(dir=getattr(settings, 'IRODS_ROOT', '/tmp'))
+    try:
+        write(staged)
+        staged.flush()
+    except Exception:
+        staged.close()
+        raise
+    return staged
+
+
+def create_bag_files(resource):
+    """
+    create and update files needed by bagit operation that is conducted on iRODS server;
+    no bagit operation is performed, only files that will be included in the bag are created
+    or updated.
+
+    Parameters:
+    :param resource: A resource whose files will be created or updated to be included in the
+    resource bag.
+    :return: istorage, an IrodsStorage object that will be used by subsequent operation to
+    create a bag on demand as needed.
+    """
+    istorage = resource.get_irods_storage()
+
+    # an empty visualization directory will not be put into the zipped bag file by ibun command,
+    # so creating an empty visualization directory to be put into the zip file as done by the two
+    # statements below does not work. However, if visualization directory has content to be
+    # uploaded, it will work. This is to be implemented as part of the resource model in the future.
+    # The following two statements are placeholders serving as reminder
+    # to_file_name = '{res_id}/data/visualization/'.format(res_id=resource.short_id)
+    # istorage.saveFile('', to_file_name, create_directory=True)
+
+    # resourcemetadata.xml and resourcemap.xml are each written straight to a local temporary
+    # file, and then uploaded to iRODS at the same time; "iput -f" replaces the files in place
+    # resources that don't support file types this would write only resource level metadata
+    # resource types that support file types this would write resource level metadata
+    # as well as file type metadata
+    data_path = os.path.join(resource.root_path, 'data')
+    uploads = []
+    try:
+        uploads.append((stage_file(lambda out: out.write(resource.get_metadata_xml())),
+                        os.path.join(data_path, 'resourcemetadata.xml'), True))
+        uploads.append((stage_file(lambda out: write_resource_map(resource, out)),
+                        os.path.join(data_path, 'resourcemap.xml'), False))
+        pool = ThreadPool(len(uploads))
+        try:
+            pool.map(lambda upload: istorage.saveFile(upload[0].name, *upload[1:]), uploads)
+        finally:
+            pool.close()
+            pool.join()
+    finally:
+        for staged, _, _ in uploads:
+            staged.close()
 
     res_coll = resource.root_path
     istorage.setAVU(res_coll, 'metadata_dirty', "false")
-    shutil.rmtree(temp_path)
     return istorage
 
 
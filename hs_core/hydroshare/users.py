@@ -3,7 +3,7 @@ import logging
 
 from django.core.exceptions import PermissionDenied, ObjectDoesNotExist
 from django.contrib.auth.models import User, Group
-from django.contrib.gis.geos import Polygon, Point
+from django.contrib.gis.geos import Polygon
 from django.core.files import File
 from django.core.files.uploadedfile import UploadedFile
 from django.core import exceptions
@@ -337,33 +337,11 @@ def get_resource_list(creator=None, group=None, user=None, owner=None, from_date
         if not north or not west or not south or not east: \
             raise ValueError("coverage queries must have north, west, south, and east params")
 
-        coverages = set()
+        # box and point coverages are materialized as spatially indexed CoverageGeometry rows
         search_polygon = Polygon.from_bbox((east,south,west,north))
-
-        for coverage in Coverage.objects.filter(type="box"):
-            coverage_polygon = Polygon.from_bbox((
-                coverage.value.get('eastlimit', None),
-                coverage.value.get('southlimit', None),
-                coverage.value.get('westlimit', None),
-                coverage.value.get('northlimit', None)
-            ))
-
-            if search_polygon.intersects(coverage_polygon):
-                coverages.add(coverage.id)
-
-        for coverage in Coverage.objects.filter(type="point"):
-            try:
-                coverage_shape = Point(
-                    coverage.value.get('east', None),
-                    coverage.value.get('north', None),
-                )
-
-                if search_polygon.intersects(coverage_shape):
-                    coverages.add(coverage.id)
-            except Exception as e:
-                log.error("Coverage value invalid for coverage id %d" % coverage.id)
-
-        coverage_hits = (Coverage.objects.filter(id__in=coverages))
+        search_polygon.srid = 4326
+        coverage_hits = Coverage.objects.filter(
+            coverage_geometry__geometry__intersects=search_polygon)
         q.append(Q(object_id__in=coverage_hits.values_list('object_id', flat=True)))
 
     if contributor:
@@ -426,22 +404,13 @@ def get_resource_list(creator=None, group=None, user=None, owner=None, from_date
                 # No matches on title or abstract, so treat as no results of search
                 flt = flt.none()
 
-    qcnt = 0
-    if flt:
-        qcnt = len(flt)
-
+    # slice in SQL; counting or materializing the full result here would fetch every row
     if start is not None and count is not None:
-        if qcnt > start:
-            if qcnt >= start + count:
-                flt = flt[start:start+count]
-            else:
-                flt = flt[start:qcnt]
+        flt = flt[start:start+count]
     elif start is not None:
-        if qcnt >= start:
-            flt = flt[start:qcnt]
+        flt = flt[start:]
     elif count is not None:
-        if qcnt > count:
-            flt = flt[0:count]
+        flt = flt[:count]
 
     return flt
 
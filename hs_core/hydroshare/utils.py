@@ -26,7 +26,9 @@ from mezzanine.conf import settings
 from hs_core.signals import pre_create_resource, post_create_resource, pre_add_files_to_resource, \
     post_add_files_to_resource
 from hs_core.models import AbstractResource, BaseResource, ResourceFile
+from hs_core.hydroshare import file_cache
 from hs_core.hydroshare.hs_bagit import create_bag_files
+from hs_core.irods import stat_irods_file
 
 from django_irods.icommands import SessionException
 from django_irods.storage import IrodsStorage
@@ -205,7 +207,6 @@ def get_federated_zone_home_path(filepath):
         return ''
 
 
-# TODO: replace with a cache facility that has automatic cleanup
 # TODO: pass a list rather than a string to allow commas in filenames.
 def get_fed_zone_files(irods_fnames):
     """
@@ -241,7 +242,8 @@ def get_fed_zone_files(irods_fnames):
                 os.makedirs(tmpdir)
             else:
                 raise Exception(ex.message)
-        irods_storage.getFile(ifname, tmpfile)
+        file_cache.fetch(ifname, stat_irods_file(irods_storage, ifname),
+                         lambda path: irods_storage.getFile(ifname, path), tmpfile)
         ret_file_list.append(tmpfile)
     return ret_file_list
 
@@ -252,6 +254,8 @@ def get_file_from_irods(res_file):
     Copy the file (res_file) from iRODS (local or federated zone)
     over to django (temp directory) which is
     necessary for manipulating the file (e.g. metadata extraction).
+    The file is only transferred from iRODS if its current version is not in the local
+    file cache (see hs_core.hydroshare.file_cache).
     Note: The caller is responsible for cleaning the temp directory
 
     :param res_file: an instance of ResourceFile
@@ -266,7 +270,6 @@ def get_file_from_irods(res_file):
     tmpfile = os.path.join(tmpdir, file_name)
 
     # TODO: If collisions occur, really bad things happen.
-    # TODO: Directories are never cleaned up when unused. need cache management.
     try:
         os.makedirs(tmpdir)
     except OSError as ex:
@@ -276,7 +279,8 @@ def get_file_from_irods(res_file):
         else:
             raise Exception(ex.message)
 
-    istorage.getFile(res_file_path, tmpfile)
+    file_cache.fetch(res_file_path, res_file.stat(),
+                     lambda path: istorage.getFile(res_file_path, path), tmpfile)
     copied_file = tmpfile
     return copied_file
 
@@ -297,6 +301,7 @@ def replace_resource_file_on_irods(new_file, original_resource_file, user):
 
     # Note: this doesn't update metadata at all.
     istorage.saveFile(new_file, ori_storage_path, True)
+    original_resource_file.set_system_metadata()
 
     # do this so that the bag will be regenerated prior to download of the bag
     resource_modified(ori_res, by_user=user, overwrite_bag=False)
@@ -379,8 +384,11 @@ def replicate_resource_bag_to_user_zone(user, res_id):
         bag_modified = istorage.getAVU(res_coll, 'bag_modified')
         if bag_modified.lower() == "true":
             # import here to avoid circular import issue
-            from hs_core.tasks import create_bag_by_irods
-            create_bag_by_irods(res_id)
+            from hs_core.tasks import build_bag_now
+            status = build_bag_now(res_id)
+            if status != 'none':
+                raise ValidationError("Bag of resource {} is not ready: build is {}"
+                                      .format(res_id, status))
 
         # do replication of the resource bag to irods user zone
         if not res.resource_federation_path:
@@ -1,14 +1,86 @@
 import os
+import re
 
+from collections import namedtuple
 from datetime import datetime, timedelta
 
 from django.db import models
 from django.core.exceptions import PermissionDenied, ValidationError
+from django.utils.timezone import utc
 from mezzanine.conf import settings
 
+from django_irods.icommands import SessionException
+
 from hs_core.signals import pre_check_bag_flag
 
 
+# catalog information for one iRODS data object, as returned by stat_files
+IrodsFileStat = namedtuple('IrodsFileStat', ['path', 'size', 'modified', 'checksum'])
+
+
+def _query_file_stats(istorage, condition):
+    """
+    Return a dict of IrodsFileStat by full path for data objects matching an iquest condition
+
+    :raises SessionException: if iRODS fails.
+    """
+    query = "SELECT COLL_NAME, DATA_NAME, DATA_SIZE, DATA_MODIFY_TIME, DATA_CHECKSUM " \
+            "WHERE " + condition
+    try:
+        stdout, _ = istorage.session.run("iquest", None, '--no-page', '%s/%s|%s|%s|%s', query)
+    except SessionException as ex:
+        if 'CAT_NO_ROWS_FOUND' in (ex.stdout or '') + (ex.stderr or ''):
+            return {}
+        raise
+
+    stats = {}
+    for line in stdout.splitlines():
+        # file names may contain '|', but the trailing fields cannot
+        fields = line.rsplit('|', 3)
+        if len(fields) != 4 or fields[0] in stats:
+            # skip iquest noise and duplicate rows for additional replicas
+            continue
+        full_path, size, modified, checksum = fields
+        stats[full_path] = IrodsFileStat(path=full_path,
+                                         size=int(size),
+                                         modified=datetime.fromtimestamp(int(modified), utc),
+                                         checksum=checksum or None)
+    return stats
+
+
+def _like_pattern(value):
+    """
+    Return an iquest like pattern that matches value
+
+    GenQuery cannot escape a quote inside a string, so quotes and backslashes are replaced by the
+    single character wildcard '_'. Like patterns, and the '_' and '%' wildcards that names may
+    contain, can match other names; callers must check the paths returned.
+    """
+    return re.sub(r"['\\]", '_', value)
+
+
+def _match(value):
+    """Return the iquest comparison of a column with value, e.g. "= 'value'"."""
+    pattern = _like_pattern(value)
+    if pattern == value:
+        return "= '{}'".format(value)
+    return "like '{}'".format(pattern)
+
+
+def stat_irods_file(istorage, full_path):
+    """
+    Return the IrodsFileStat of one data object given its fully qualified path
+
+    :raises SessionException: if iRODS fails or the file does not exist.
+    """
+    coll, name = os.path.split(full_path)
+    stats = _query_file_stats(istorage, "COLL_NAME {} and DATA_NAME {}".format(_match(coll),
+                                                                                _match(name)))
+    if full_path not in stats:
+        raise SessionException(-1, '', 'file {} does not exist'.format(full_path))
+    return stats[full_path]
+
+
 class ResourceIRODSMixin(models.Model):
     """ This contains iRODS methods to be included as options for resources """
     class Meta:
@@ -46,7 +118,7 @@ class ResourceIRODSMixin(models.Model):
 
         This is a synchronous update. The call waits until the update is finished.
         """
-        from hs_core.tasks import create_bag_by_irods
+        from hs_core.tasks import build_bag_now
         from hs_core.hydroshare.resource import check_resource_type
         from hs_core.hydroshare.hs_bagit import create_bag_files
 
@@ -62,9 +134,12 @@ class ResourceIRODSMixin(models.Model):
             self.setAVU('metadata_dirty', False)
 
         # the ticket system does synchronous bag creation.
-        # async bag creation isn't supported.
+        # async bag creation isn't supported, but a build scheduled for a download is joined.
         if bag_modified:  # automatically cast to Bool
-            create_bag_by_irods(self.short_id)
+            status = build_bag_now(self.short_id)
+            if status != 'none':
+                raise ValidationError("bag of resource {} is not ready: build is {}"
+                                      .format(self.short_id, status))
             self.setAVU('bag_modified', False)
 
     def update_metadata_files(self):
@@ -80,6 +155,29 @@ class ResourceIRODSMixin(models.Model):
             create_bag_files(self)
             self.setAVU('metadata_dirty', False)
 
+    def stat_files(self, path=None):
+        """
+        Return catalog information for every data object in a collection tree
+
+        :param path: collection to list; defaults to the root collection of the resource.
+        :return: dict mapping fully qualified iRODS path to an IrodsFileStat of
+                 (path, size, modified, checksum). checksum is None if iRODS has none.
+
+        :raises SessionException: if iRODS fails.
+
+        This issues a single iquest catalog query for the whole collection tree, rather than
+        one iCommand per file, so it costs one round trip regardless of the number of files.
+        Keys are fully qualified; use irods_full_path(storage_path) to look up a file.
+        """
+        if path is None:
+            path = self.root_path
+        coll = self.irods_full_path(path).rstrip('/')
+        stats = _query_file_stats(self.get_irods_storage(), "COLL_NAME {} || like '{}/%'"
+                                  .format(_match(coll), _like_pattern(coll)))
+        # wildcards in the collection name may match sibling collections
+        return {full_path: stat for full_path, stat in stats.items()
+                if full_path.startswith(coll + '/')}
+
     def create_ticket(self, user, path=None, write=False, allowed_uses=1):
         """
         create an iRODS ticket for reading or modifying a resource
@@ -270,6 +368,16 @@ class ResourceFileIRODSMixin(models.Model):
     class Meta:
         abstract = True
 
+    def stat(self):
+        """
+        Return an IrodsFileStat of size, modification time and checksum of this file
+
+        :raises SessionException: if iRODS fails or the file does not exist.
+        """
+        resource = self.resource
+        return stat_irods_file(resource.get_irods_storage(),
+                               resource.irods_full_path(self.storage_path))
+
     def create_ticket(self, user, write=False):
         """ This creates a ticket to read or modify this file """
         return self.resource.create_ticket(user, path=self.storage_path, write=write)
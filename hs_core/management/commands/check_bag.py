@@ -9,7 +9,7 @@ import os
 from django.core.management.base import BaseCommand
 from hs_core.models import BaseResource
 from hs_core.hydroshare.hs_bagit import create_bag_files
-from hs_core.tasks import create_bag_by_irods
+from hs_core.tasks import build_bag_now
 from django_irods.icommands import SessionException
 
 
@@ -105,10 +105,13 @@ class Command(BaseCommand):
                         resource.setAVU('metadata_dirty', 'false')
                         print("metadata_dirty set to false for {}".format(rid))
 
-                        create_bag_by_irods(rid)
-                        print("bag generated for {} from iRODs".format(rid))
-                        resource.setAVU('bag_modified', 'false')
-                        print("bag_modified set to false for {}".format(rid))
+                        status = build_bag_now(rid)
+                        if status == 'none':
+                            print("bag generated for {} from iRODs".format(rid))
+                            resource.setAVU('bag_modified', 'false')
+                            print("bag_modified set to false for {}".format(rid))
+                        else:
+                            print("bag of {} not generated: build is {}".format(rid, status))
 
                     elif options['generate_metadata']:
 
@@ -119,10 +122,13 @@ class Command(BaseCommand):
 
                     elif options['generate_bag']:
 
-                        create_bag_by_irods(rid)
-                        print("bag generated for {} from iRODs".format(rid))
-                        resource.setAVU('bag_modified', 'false')
-                        print("bag_modified set to false for {}".format(rid))
+                        status = build_bag_now(rid)
+                        if status == 'none':
+                            print("bag generated for {} from iRODs".format(rid))
+                            resource.setAVU('bag_modified', 'false')
+                            print("bag_modified set to false for {}".format(rid))
+                        else:
+                            print("bag of {} not generated: build is {}".format(rid, status))
 
                     elif options['reset']:  # reset all data to pristine
 
@@ -0,0 +1,173 @@
+"""
+This rebuilds the SOLR index of discoverable and public resources in parallel.
+
+Unlike rebuild_index, which walks every resource serially, this:
+* shards the resource ids into batches that are indexed by a pool of processes,
+* commits to SOLR once every --commit-every batches rather than per batch,
+* checkpoints the last committed resource id, so that --resume continues after a failure,
+* reports throughput as it goes.
+
+Resources created or changed while this runs are queued in SolrIndexQueue as usual, and
+sent to SOLR by hs_core.tasks.process_solr_index_queue.
+"""
+
+import json
+import os
+import tempfile
+import time
+from multiprocessing import Pool, cpu_count
+
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connections as db_connections
+from haystack import connections, connection_router
+from haystack.exceptions import NotHandled
+
+from hs_core.models import BaseResource
+from hs_core.search_indexes import BaseResourceIndex
+
+
+def _backends():
+    """Yield the (backend, index) pairs that index resources."""
+    for using in connection_router.for_write():
+        try:
+            index = connections[using].get_unified_index().get_index(BaseResource)
+        except NotHandled:
+            continue
+        yield connections[using].get_backend(), index
+
+
+def index_batch(resource_ids):
+    """Send one batch of resources to SOLR without committing. Runs in a pool process."""
+    resources = list(BaseResource.objects.filter(id__in=resource_ids)
+                     .select_related('raccess'))
+    for backend, index in _backends():
+        # a failure must raise, rather than be logged by haystack, to stop the run before the
+        # checkpoint moves past this batch
+        silently_fail = backend.silently_fail
+        backend.silently_fail = False
+        try:
+            backend.update(index, resources, commit=False)
+        finally:
+            backend.silently_fail = silently_fail
+    return len(resources)
+
+
+def commit_index():
+    """Commit everything sent so far. Runs in a pool process."""
+    for backend, _ in _backends():
+        backend.conn.commit()
+
+
+def clear_index():
+    """Remove all resources from the index. Runs in a pool process."""
+    for backend, _ in _backends():
+        backend.clear(models=[BaseResource], commit=True)
+
+
+def read_checkpoint(path):
+    """Return the last committed resource id recorded at path, or 0 if there is none."""
+    if not os.path.exists(path):
+        return 0
+    with open(path) as f:
+        return json.load(f)['last_id']
+
+
+def write_checkpoint(path, last_id):
+    """Record the last committed resource id at path, replacing any previous record."""
+    tmp_path = path + '.tmp'
+    with open(tmp_path, 'w') as f:
+        json.dump({'last_id': last_id}, f)
+    os.rename(tmp_path, path)
+
+
+class Command(BaseCommand):
+    help = "Rebuild the SOLR index of discoverable and public resources in parallel."
+
+    def add_arguments(self, parser):
+
+        parser.add_argument(
+            '--workers',
+            type=int,
+            default=cpu_count(),
+            help='number of indexing processes (default: number of cpus)',
+        )
+        parser.add_argument(
+            '--batch-size',
+            type=int,
+            default=100,
+            dest='batch_size',
+            help='number of resources sent to SOLR at a time (default: 100)',
+        )
+        parser.add_argument(
+            '--commit-every',
+            type=int,
+            default=10,
+            dest='commit_every',
+            help='number of batches between SOLR commits and checkpoints (default: 10)',
+        )
+        parser.add_argument(
+            '--checkpoint',
+            default=os.path.join(tempfile.gettempdir(), 'solr_reindex.checkpoint'),
+            help='file recording the last committed resource id',
+        )
+        parser.add_argument(
+            '--resume',
+            action='store_true',  # True for presence, False for absence
+            dest='resume',        # value is options['resume']
+            help='continue from the checkpoint of an interrupted run',
+        )
+        parser.add_argument(
+            '--clear',
+            action='store_true',
+            dest='clear',
+            help='remove all resources from the index before starting',
+        )
+
+    def handle(self, *args, **options):
+        if options['resume'] and options['clear']:
+            raise CommandError("--resume and --clear cannot be used together")
+        if options['workers'] < 1 or options['batch_size'] < 1 or options['commit_every'] < 1:
+            raise CommandError("--workers, --batch-size and --commit-every must be positive")
+
+        checkpoint = options['checkpoint']
+        start_id = read_checkpoint(checkpoint) if options['resume'] else 0
+        if start_id:
+            print("resuming after resource id {}".format(start_id))
+
+        ids = list(BaseResourceIndex().index_queryset().filter(id__gt=start_id)
+                   .order_by('id').values_list('id', flat=True))
+        batch_size = options['batch_size']
+        batches = [ids[i:i + batch_size] for i in range(0, len(ids), batch_size)]
+        print("indexing {} resources in {} batches with {} processes"
+              .format(len(ids), len(batches), options['workers']))
+
+        # pool processes must open their own database connections
+        db_connections.close_all()
+        pool = Pool(options['workers'])
+        try:
+            if options['clear']:
+                pool.apply(clear_index)
+
+            start = time.time()
+            indexed = 0
+            # imap returns results in batch order, so every batch up to the one just
+            # returned has been sent and the checkpoint never skips a resource
+            for n, count in enumerate(pool.imap(index_batch, batches), 1):
+                indexed += count
+                if n % options['commit_every'] == 0 or n == len(batches):
+                    pool.apply(commit_index)
+                    write_checkpoint(checkpoint, batches[n - 1][-1])
+                    elapsed = time.time() - start
+                    print("{} of {} resources indexed in {:.0f}s ({:.1f} resources/s)"
+                          .format(indexed, len(ids), elapsed, indexed / max(elapsed, 0.001)))
+        except BaseException:
+            pool.terminate()  # keep the checkpoint of the last commit for --resume
+            raise
+        else:
+            pool.close()
+        finally:
+            pool.join()
+
+        if os.path.exists(checkpoint):
+            os.remove(checkpoint)
+        print("done: {} resources indexed".format(indexed))
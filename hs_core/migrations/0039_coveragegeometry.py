@@ -0,0 +1,50 @@
+# -*- coding: utf-8 -*-
+from __future__ import unicode_literals
+
+import json
+
+from django.db import migrations, models
+import django.db.models.deletion
+import django.contrib.gis.db.models.fields
+from django.contrib.gis.geos import Polygon, Point
+
+
+def create_coverage_geometries(apps, schema_editor):
+    Coverage = apps.get_model('hs_core', 'Coverage')
+    CoverageGeometry = apps.get_model('hs_core', 'CoverageGeometry')
+    geometries = []
+    for coverage in Coverage.objects.filter(type__in=('box', 'point')).iterator():
+        try:
+            value = json.loads(coverage._value)
+            if coverage.type == 'point':
+                geometry = Point(float(value['east']), float(value['north']), srid=4326)
+            else:
+                geometry = Polygon.from_bbox((float(value['eastlimit']),
+                                              float(value['southlimit']),
+                                              float(value['westlimit']),
+                                              float(value['northlimit'])))
+                geometry.srid = 4326
+        except (KeyError, TypeError, ValueError):
+            print("skipping invalid {} coverage {}".format(coverage.type, coverage.id))
+            continue
+        geometries.append(CoverageGeometry(coverage_id=coverage.id, geometry=geometry))
+    CoverageGeometry.objects.bulk_create(geometries, batch_size=1000)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('hs_core', '0038_resourcefile_system_metadata'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='CoverageGeometry',
+            fields=[
+                ('id', models.AutoField(verbose_name='ID', serialize=False, auto_created=True, primary_key=True)),
+                ('geometry', django.contrib.gis.db.models.fields.GeometryField(srid=4326)),
+                ('coverage', models.OneToOneField(related_name='coverage_geometry', to='hs_core.Coverage', on_delete=django.db.models.deletion.CASCADE)),
+            ],
+        ),
+        migrations.RunPython(create_coverage_geometries, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,19 @@
+# -*- coding: utf-8 -*-
+from __future__ import unicode_literals
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('hs_core', '0040_solrindexqueue'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='coremetadata',
+            name='xml_version',
+            field=models.PositiveIntegerField(default=0),
+        ),
+    ]
@@ -0,0 +1,28 @@
+# -*- coding: utf-8 -*-
+from __future__ import unicode_literals
+
+from django.db import migrations, models
+import django.utils.timezone
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('hs_core', '0041_coremetadata_xml_version'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='BagBuildJob',
+            fields=[
+                ('id', models.AutoField(verbose_name='ID', serialize=False, auto_created=True, primary_key=True)),
+                ('short_id', models.CharField(unique=True, max_length=32)),
+                ('storage_resource', models.CharField(max_length=255)),
+                ('size', models.BigIntegerField(default=0)),
+                ('status', models.CharField(default=b'queued', max_length=16, choices=[(b'queued', b'Queued'), (b'running', b'Running'), (b'failed', b'Failed')])),
+                ('task_id', models.CharField(max_length=255, blank=True)),
+                ('enqueued', models.DateTimeField(default=django.utils.timezone.now)),
+                ('started', models.DateTimeField(null=True, blank=True)),
+            ],
+        ),
+    ]
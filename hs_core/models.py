@@ -2,6 +2,7 @@
 
 import os.path
 import json
+import hashlib
 import arrow
 import logging
 from uuid import uuid4
@@ -17,14 +18,17 @@ from django.contrib.contenttypes.fields import GenericRelation
 from django.contrib.auth.models import User, Group
 from django.contrib.contenttypes.models import ContentType
 from django.db import models
-from django.db.models import Q
-from django.db.models.signals import post_save
-from django.db import transaction
+from django.db.models import Q, Sum
+from django.contrib.gis.db import models as gis_models
+from django.contrib.gis.geos import Polygon, Point
+from django.db.models.signals import post_save, post_delete
+from django.db import transaction, IntegrityError
 from django.dispatch import receiver
 from django.utils.timezone import now
 from django_irods.storage import IrodsStorage
 from django.conf import settings
 from django.core.files import File
+from django.core.cache import cache
 from django.core.exceptions import ObjectDoesNotExist, ValidationError, \
     SuspiciousFileOperation, PermissionDenied
 from django.forms.models import model_to_dict
@@ -1127,7 +1131,9 @@ class Coverage(AbstractMetaDataElement):
                 if 'value' in kwargs:
                     del kwargs['value']
                 kwargs['_value'] = value_json
-                return super(Coverage, cls).create(**kwargs)
+                coverage = super(Coverage, cls).create(**kwargs)
+                coverage.update_geometry()
+                return coverage
 
             else:
                 raise ValidationError('Coverage value is missing.')
@@ -1180,13 +1186,32 @@ class Coverage(AbstractMetaDataElement):
             del kwargs['value']
             kwargs['_value'] = value_json
 
-        super(Coverage, cls).update(element_id, **kwargs)
+        coverage = super(Coverage, cls).update(element_id, **kwargs)
+        coverage.update_geometry()
 
     @classmethod
     def remove(cls, element_id):
         """Define custom remove method for Coverage model."""
         raise ValidationError("Coverage element can't be deleted.")
 
+    @property
+    def geometry(self):
+        """Return a GEOS Point or Polygon for a point or box coverage, or None otherwise."""
+        return coverage_value_to_geometry(self.type, self.value)
+
+    def update_geometry(self):
+        """Keep the CoverageGeometry of this coverage in sync with its value.
+
+        The materialized geometry is what spatial queries (see get_resource_list) filter on.
+        Coverage deletion cascades to it.
+        """
+        geometry = self.geometry
+        if geometry is None:
+            CoverageGeometry.objects.filter(coverage=self).delete()
+        else:
+            CoverageGeometry.objects.update_or_create(coverage=self,
+                                                      defaults={'geometry': geometry})
+
     def add_to_xml_container(self, container):
         """Update etree SubElement container with coverage values."""
         NAMESPACES = CoreMetaData.NAMESPACES
@@ -1409,6 +1434,38 @@ class Coverage(AbstractMetaDataElement):
         return coverage_form
 
 
+def coverage_value_to_geometry(coverage_type, value):
+    """Return a GEOS geometry in EPSG:4326 for a point or box coverage value dict.
+
+    Box limits are taken in the same (east, south, west, north) order as the bounding boxes
+    of spatial queries. Return None for period coverages and for non-numeric values.
+    """
+    try:
+        if coverage_type == 'point':
+            return Point(float(value['east']), float(value['north']), srid=4326)
+        elif coverage_type == 'box':
+            geometry = Polygon.from_bbox((float(value['eastlimit']), float(value['southlimit']),
+                                          float(value['westlimit']), float(value['northlimit'])))
+            geometry.srid = 4326
+            return geometry
+    except (KeyError, TypeError, ValueError):
+        logger = logging.getLogger(__name__)
+        logger.error("invalid {} coverage value {}".format(coverage_type, value))
+    return None
+
+
+class CoverageGeometry(models.Model):
+    """Spatially indexed geometry of a box or point Coverage.
+
+    This is maintained by Coverage.create and Coverage.update so that spatial queries over
+    coverages are indexed database lookups rather than a scan of every coverage.
+    """
+
+    coverage = models.OneToOneField(Coverage, related_name='coverage_geometry',
+                                    on_delete=models.CASCADE)
+    geometry = gis_models.GeometryField(srid=4326, spatial_index=True)
+
+
 class Format(AbstractMetaDataElement):
     """Define Format custom metadata element model."""
 
@@ -1921,6 +1978,7 @@ class AbstractResource(ResourcePermissionsMixin, ResourceIRODSMixin):
         # TODO: Pabitra - delete_all_elements() may not be needed in Django 1.8 and later
         self.metadata.delete_all_elements()
         self.metadata.delete()
+        self.refresh_metadata()
         super(AbstractResource, self).delete()
 
     @property
@@ -1942,6 +2000,34 @@ class AbstractResource(ResourcePermissionsMixin, ResourceIRODSMixin):
     def get_metadata_xml(self, pretty_print=True, include_format_elements=True):
         """Get metadata xml for Resource.
 
+        The rendering is cached until the metadata changes: the cache key includes the
+        xml_version token of the metadata container, which is replaced whenever a metadata
+        element, the container, a resource file or a logical file of the resource is saved or
+        deleted.
+        """
+        # importing here to avoid circular import problem
+        from hydroshare.utils import current_site_url
+
+        md_id = self.metadata.id
+        version = CoreMetaData.objects.filter(id=md_id).values_list('xml_version',
+                                                                    flat=True).first()
+        # extended metadata is stored on the resource rather than in the metadata container
+        digest = hashlib.md5(repr((sorted(self.extra_metadata.items()), current_site_url(),
+                                   self.resource_type))).hexdigest()
+        key = 'hs_core.metadata_xml.{}.{}.{}.{}.{}.{}'.format(self.short_id, md_id, version,
+                                                              int(pretty_print),
+                                                              int(include_format_elements),
+                                                              digest)
+        xml = cache.get(key)
+        if xml is None:
+            xml = self._get_metadata_xml(pretty_print=pretty_print,
+                                         include_format_elements=include_format_elements)
+            cache.set(key, xml, getattr(settings, 'METADATA_XML_CACHE_TIMEOUT', 24 * 60 * 60))
+        return xml
+
+    def _get_metadata_xml(self, pretty_print=True, include_format_elements=True):
+        """Render metadata xml for Resource.
+
         Resource types that support file types
         must override this method. See Composite Resource
         type as an example
@@ -1950,18 +2036,34 @@ class AbstractResource(ResourcePermissionsMixin, ResourceIRODSMixin):
                                      include_format_elements=include_format_elements)
 
     def _get_metadata(self, metatdata_obj):
-        """Get resource metadata from content_object."""
+        """Get resource metadata from content_object.
+
+        The metadata container is memoized on this resource instance so that repeated
+        accesses to self.metadata (landing pages, search indexing, REST listing) do not
+        re-fetch it. The memoized container is discarded whenever any metadata container
+        or metadata element is saved or deleted (see _bump_metadata_generation).
+        """
+        cached = self.__dict__.get('_metadata_cache')
+        if cached is not None and cached[0] == _metadata_generation[0]:
+            return cached[1]
+
         md_type = ContentType.objects.get_for_model(metatdata_obj)
         res_type = ContentType.objects.get_for_model(self)
         self.content_object = res_type.model_class().objects.get(id=self.id).content_object
         if self.content_object:
-            return self.content_object
+            md = self.content_object
         else:
             metatdata_obj.save()
             self.content_type = md_type
             self.object_id = metatdata_obj.id
             self.save()
-            return metatdata_obj
+            md = metatdata_obj
+        self._metadata_cache = (_metadata_generation[0], md)
+        return md
+
+    def refresh_metadata(self):
+        """Discard the memoized metadata container so the next access re-fetches it."""
+        self.__dict__.pop('_metadata_cache', None)
 
     def extra_capabilites(self):
         """Return None. No-op method.
@@ -2634,6 +2736,13 @@ class ResourceFile(ResourceFileIRODSMixin):
     # DEPRECATED: use native size routine
     # fed_resource_file_size = models.CharField(max_length=15, null=True, blank=True)
 
+    # file information recorded from iRODS when the file is created, moved or replaced,
+    # and reconciled periodically. Use the size, checksum and modified_time properties.
+    # A size of -1 means the size has not been recorded yet.
+    _size = models.BigIntegerField(default=-1)
+    _checksum = models.CharField(max_length=255, null=True, blank=True)
+    _modified_time = models.DateTimeField(null=True, blank=True)
+
     # we are using GenericForeignKey to allow resource file to be associated with any
     # HydroShare defined LogicalFile types (e.g., GeoRasterFile, NetCdfFile etc)
     logical_file_object_id = models.PositiveIntegerField(null=True, blank=True)
@@ -2746,7 +2855,9 @@ class ResourceFile(ResourceFileIRODSMixin):
         # Actually create the file record
         # when file is a File, the file is copied to storage in this step
         # otherwise, the copy must precede this step.
-        return ResourceFile.objects.create(**kwargs)
+        res_file = ResourceFile.objects.create(**kwargs)
+        res_file.set_system_metadata()
+        return res_file
 
     # TODO: automagically handle orphaned logical files
     def delete(self):
@@ -2768,20 +2879,46 @@ class ResourceFile(ResourceFileIRODSMixin):
         """Return content_object representing the resource from a resource file."""
         return self.content_object
 
-    # TODO: write unit test
     @property
     def size(self):
-        """Retturn file size for federated or non-federated files."""
-        if self.resource.resource_federation_path:
-            if __debug__:
-                assert self.resource_file.name is None or \
-                    self.resource_file.name == ''
-            return self.fed_resource_file.size
-        else:
-            if __debug__:
-                assert self.fed_resource_file.name is None or \
-                    self.fed_resource_file.name == ''
-            return self.resource_file.size
+        """Return file size for federated or non-federated files.
+
+        The size is the one recorded when the file was created, moved or replaced. If none
+        has been recorded yet, it is fetched from iRODS and recorded.
+        """
+        if self._size < 0:
+            self.set_system_metadata()
+        return self._size
+
+    @property
+    def checksum(self):
+        """Return the iRODS checksum recorded for the file, or None if iRODS has none."""
+        if self._size < 0:
+            self.set_system_metadata()
+        return self._checksum
+
+    @property
+    def modified_time(self):
+        """Return the iRODS modification time recorded for the file."""
+        if self._size < 0:
+            self.set_system_metadata()
+        return self._modified_time
+
+    def set_system_metadata(self, stat=None, save=True):
+        """Record size, checksum and modification time of the file from iRODS.
+
+        :param stat: an IrodsFileStat for this file as returned by resource.stat_files();
+        if None, iRODS is queried for this file alone.
+        :param save: if True, save the recorded values.
+        :raises SessionException: if the file does not exist in iRODS.
+        """
+        if stat is None:
+            stat = self.stat()
+        self._size = stat.size
+        self._checksum = stat.checksum
+        self._modified_time = stat.modified
+        if save:
+            self.save(update_fields=['_size', '_checksum', '_modified_time'])
 
     # TODO: write unit test
     @property
@@ -2830,6 +2967,17 @@ class ResourceFile(ResourceFileIRODSMixin):
                     self.fed_resource_file.name == ''
             return self.resource_file.name
 
+    def get_storage_path(self, resource):
+        """Return storage_path for a file of a known resource without re-fetching the resource.
+
+        This is for loops over resource.files.all(), where storage_path would otherwise
+        fetch the same resource once per file.
+        """
+        if resource.is_federated:
+            return self.fed_resource_file.name
+        else:
+            return self.resource_file.name
+
     # ResourceFile API handles file operations
     def set_storage_path(self, path, test_exists=True):
         """Bind this ResourceFile instance to an existing file.
@@ -2871,6 +3019,12 @@ class ResourceFile(ResourceFileIRODSMixin):
         else:
             self.fed_resource_file = None
             self.resource_file = get_path(self, base)
+
+        # the file is only known to exist if it was tested; otherwise record it later
+        if test_exists:
+            self.set_system_metadata(save=False)
+        else:
+            self._size = -1
         self.save()
 
     @property
@@ -3184,6 +3338,121 @@ class Bags(models.Model):
         return self.content_object.get_content_model()
 
 
+class SolrIndexQueue(models.Model):
+    """
+    Resources waiting to be brought up to date in the discovery (Solr) index.
+
+    Saves of resources and their access control only enqueue the resource id;
+    hs_core.tasks.process_solr_index_queue sends the queued resources to Solr in batches.
+    There is at most one entry per resource, so repeated saves are coalesced until the
+    queue is processed. There is no foreign key to the resource so that removals from
+    the index can be queued for deleted resources.
+    """
+
+    resource_id = models.IntegerField(unique=True)
+    enqueued = models.DateTimeField(default=now, db_index=True)
+
+    @classmethod
+    def enqueue(cls, resource_id, enqueued=None):
+        """
+        Queue a resource for indexing; return True if it was not already queued.
+
+        enqueued is the time the resource was first queued, if it is queued again.
+        """
+        try:
+            with transaction.atomic():
+                _, created = cls.objects.get_or_create(
+                    resource_id=resource_id, defaults={'enqueued': enqueued or now()})
+        except IntegrityError:  # queued concurrently
+            created = False
+        return created
+
+    @classmethod
+    def stats(cls):
+        """Return the current queue depth and the age in seconds of its oldest entry."""
+        oldest = cls.objects.order_by('enqueued').values_list('enqueued', flat=True).first()
+        return {'depth': cls.objects.count(),
+                'lag': (now() - oldest).total_seconds() if oldest is not None else 0.0}
+
+
+class BagBuildJob(models.Model):
+    """
+    A resource bag build that is queued or running.
+
+    Downloads ask for bags through BagBuildJob.schedule(), which keeps at most one job per
+    resource: a download arriving while the bag of a resource is queued or being built
+    subscribes to that job instead of starting another ibun run on the same zip file, and
+    polls status_of() until the job is gone. hs_core.tasks.dispatch_bag_builds starts queued
+    jobs smallest resource first, with at most BAG_BUILD_CONCURRENCY builds running on each
+    iRODS storage resource. Failed jobs are kept so that pollers can see the failure; the
+    next download queues them again.
+    """
+
+    QUEUED = 'queued'
+    RUNNING = 'running'
+    FAILED = 'failed'
+    STATUS_CHOICES = ((QUEUED, 'Queued'), (RUNNING, 'Running'), (FAILED, 'Failed'))
+
+    short_id = models.CharField(max_length=32, unique=True)
+    # the iRODS storage resource the bag is built on
+    storage_resource = models.CharField(max_length=255)
+    # recorded size of the resource files in bytes, used to build small bags first
+    size = models.BigIntegerField(default=0)
+    status = models.CharField(max_length=16, choices=STATUS_CHOICES, default=QUEUED)
+    task_id = models.CharField(max_length=255, blank=True)
+    enqueued = models.DateTimeField(default=now)
+    started = models.DateTimeField(null=True, blank=True)
+
+    @classmethod
+    def schedule(cls, resource):
+        """
+        Return (job, queued) for the bag build of a resource.
+
+        queued is True if this call queued the build, and False if it joined a build that was
+        already queued or running.
+        """
+        if resource.is_federated:
+            storage_resource = settings.HS_IRODS_LOCAL_ZONE_DEF_RES
+        else:
+            storage_resource = settings.IRODS_DEFAULT_RESOURCE
+        # sizes recorded in the database; unrecorded sizes are not looked up in iRODS here
+        size = resource.files.filter(_size__gt=0).aggregate(total=Sum('_size'))['total']
+        try:
+            with transaction.atomic():
+                job, queued = cls.objects.get_or_create(
+                    short_id=resource.short_id,
+                    defaults={'storage_resource': storage_resource, 'size': size or 0})
+        except IntegrityError:  # queued concurrently
+            job, queued = cls.objects.get(short_id=resource.short_id), False
+
+        if job.status == cls.FAILED:
+            # only one of several concurrent downloads queues a failed build again
+            queued = cls.objects.filter(id=job.id, status=cls.FAILED).update(
+                status=cls.QUEUED, storage_resource=storage_resource, size=size or 0,
+                task_id='', enqueued=now(), started=None) == 1
+            job.refresh_from_db()
+        return job, queued
+
+    @classmethod
+    def status_of(cls, short_id):
+        """
+        Return the bag build status of a resource as a dict.
+
+        'status' is 'queued', 'running', 'failed', or 'none' if no build is pending; a queued
+        build also has 'position', the number of builds to start before it on its storage
+        resource.
+        """
+        job = cls.objects.filter(short_id=short_id).first()
+        if job is None:
+            return {'status': 'none'}
+        data = {'status': job.status, 'task_id': job.task_id or None}
+        if job.status == cls.QUEUED:
+            data['position'] = cls.objects.filter(
+                Q(size__lt=job.size) | Q(size=job.size, enqueued__lt=job.enqueued),
+                status=cls.QUEUED, storage_resource=job.storage_resource).count()
+        return data
+
+
 class PublicResourceManager(models.Manager):
     """Extend Django model Manager to allow for public resource access."""
 
@@ -3412,9 +3681,46 @@ class BaseResource(Page, AbstractResource):
 
         Raises SessionException if iRODS fails.
         """
-        # compute the total file size for the resource
-        f_sizes = [f.size for f in self.files.all()]
-        return sum(f_sizes)
+        self.record_missing_file_system_metadata()
+        total = self.files.filter(_size__gt=0).aggregate(total=Sum('_size'))['total']
+        return total or 0
+
+    def record_missing_file_system_metadata(self):
+        """Record size, checksum and modification time for files that have none recorded.
+
+        This uses a single iRODS catalog listing, and only if there are such files.
+
+        Raises SessionException if iRODS fails.
+        """
+        unrecorded = self.files.filter(_size__lt=0)
+        if unrecorded.exists():
+            file_stats = self.stat_files(self.file_path)
+            for f in unrecorded:
+                stat = file_stats.get(self.irods_full_path(f.get_storage_path(self)))
+                if stat is not None:
+                    f.set_system_metadata(stat)
+
+    def sync_file_system_metadata(self):
+        """Reconcile recorded size, checksum and modification time of files with iRODS.
+
+        This uses a single iRODS catalog listing for the resource and saves only the files
+        whose recorded values have drifted.
+
+        :return: the number of files updated.
+        :raises SessionException: if iRODS fails.
+        """
+        file_stats = self.stat_files(self.file_path)
+        updated = 0
+        for f in self.files.all():
+            stat = file_stats.get(self.irods_full_path(f.get_storage_path(self)))
+            if stat is None:
+                # missing in iRODS; leave it to check_irods_files to report
+                continue
+            if (f._size, f._checksum, f._modified_time) != \
+                    (stat.size, stat.checksum, stat.modified):
+                f.set_system_metadata(stat)
+                updated += 1
+        return updated
 
     @property
     def verbose_name(self):
@@ -3546,12 +3852,27 @@ class CoreMetaData(models.Model):
     _type = GenericRelation(Type)
     _publisher = GenericRelation(Publisher)
     funding_agencies = GenericRelation(FundingAgency)
+    # replaced by a new random token whenever anything in the metadata XML of the resource
+    # changes, to invalidate its cached rendering (see AbstractResource.get_metadata_xml).
+    # A token rather than a counter, since saves of a stale instance write back an old value.
+    xml_version = models.CharField(max_length=32, blank=True, default='')
 
     @property
     def resource(self):
         """Return base resource object that the metadata defines."""
         return BaseResource.objects.filter(object_id=self.id).first()
 
+    @classmethod
+    def bump_xml_version(cls, metadata_ids=None, resource_ids=None):
+        """Invalidate the cached metadata XML of some resources.
+
+        :param metadata_ids: ids (or a values queryset of ids) of metadata containers
+        :param resource_ids: ids (or a values queryset of ids) of resources
+        """
+        if resource_ids is not None:
+            metadata_ids = BaseResource.objects.filter(id__in=resource_ids).values('object_id')
+        CoreMetaData.objects.filter(id__in=metadata_ids).update(xml_version=uuid4().hex)
+
     @property
     def title(self):
         """Return the first title object from metadata."""
@@ -3897,6 +4218,15 @@ class CoreMetaData(models.Model):
 
     def get_xml(self, pretty_print=True, include_format_elements=True):
         """Get metadata XML rendering."""
+        RDF_ROOT = self.get_xml_root(include_format_elements=include_format_elements)
+        return self.XML_HEADER + '\n' + etree.tostring(RDF_ROOT, pretty_print=pretty_print)
+
+    def get_xml_root(self, include_format_elements=True):
+        """Get the root element of the metadata XML rendering of the core metadata elements.
+
+        Callers that add elements to the document should use this rather than parse the
+        string returned by get_xml.
+        """
         # importing here to avoid circular import problem
         from hydroshare.utils import current_site_url, get_resource_types
 
@@ -4085,7 +4415,7 @@ class CoreMetaData(models.Model):
                                              '{%s}value' % self.NAMESPACES['hsterms'])
             hsterms_value.text = value
 
-        return self.XML_HEADER + '\n' + etree.tostring(RDF_ROOT, pretty_print=pretty_print)
+        return RDF_ROOT
 
     # TODO: (Pabitra, Dt:11/21/2016) need to delete this method and users of this method
     # need to use the same method from the hydroshare.utils.py
@@ -4322,6 +4652,37 @@ class CoreMetaData(models.Model):
                 self.create_element(element_model_name=element_name, **element[element_name])
 
 
+# generation counter for memoized resource metadata containers (see
+# AbstractResource._get_metadata). A list is used so the value can be bumped in place.
+_metadata_generation = [0]
+
+
+@receiver(post_save)
+@receiver(post_delete)
+def _bump_metadata_generation(sender, instance, **kwargs):
+    """Invalidate memoized metadata containers when any metadata is saved or deleted."""
+    if isinstance(instance, (CoreMetaData, AbstractMetaDataElement)):
+        _metadata_generation[0] += 1
+
+
+@receiver(post_save)
+@receiver(post_delete)
+def _bump_metadata_xml_version(sender, instance, **kwargs):
+    """Invalidate the cached metadata XML of the resource a saved or deleted object belongs to.
+
+    Elements of logical file metadata are handled in hs_file_types.
+    """
+    if isinstance(instance, CoreMetaData):
+        CoreMetaData.bump_xml_version(metadata_ids=[instance.id])
+    elif isinstance(instance, AbstractMetaDataElement):
+        container_model = ContentType.objects.get_for_id(instance.content_type_id).model_class()
+        if container_model is not None and issubclass(container_model, CoreMetaData):
+            CoreMetaData.bump_xml_version(metadata_ids=[instance.object_id])
+    elif isinstance(instance, ResourceFile):
+        # file names and formats appear in the metadata of resources with logical files
+        CoreMetaData.bump_xml_version(resource_ids=[instance.object_id])
+
+
 def resource_processor(request, page):
     """Return mezzanine page processor for resource page."""
     extra = page_permissions_page_processor(request, page)
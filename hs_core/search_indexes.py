@@ -23,6 +23,30 @@ def remove_whitespace(thing):
     return str(thing).translate(trantab, " \t\r\n")
 
 
+def parse_coverage_date(value):
+    """Return the datetime of a m/d/Y or Y-m-d coverage date; raise ValueError if invalid."""
+    clean_date = value[:10]
+    if "/" in clean_date:
+        parsed_date = clean_date.split("/")
+    else:
+        parsed_date = clean_date.split("-")
+        parsed_date = parsed_date[1:] + parsed_date[:1]
+    if len(parsed_date) != 3:
+        raise ValueError("invalid date {}".format(value))
+    date = parsed_date[2] + '-' + parsed_date[0] + '-' + parsed_date[1]
+    date = remove_whitespace(date)  # no embedded spaces
+    return datetime.strptime(date, '%Y-%m-%d')
+
+
+# largest day number of the coverage_period field, as in search_configuration/solr.xml
+COVERAGE_DAY_MAX = 3660000
+
+
+def coverage_day(date):
+    """Return the day number of a date, as indexed in the coverage_period field."""
+    return date.toordinal()
+
+
 def normalize_name(name):
     """
     Normalize a name for sorting.
@@ -62,6 +86,65 @@ def normalize_name(name):
     return normalized.strip()
 
 
+class IndexSnapshot(object):
+    """
+    The metadata of one resource, read once to build its index document.
+
+    Every prepare_* method of BaseResourceIndex derives its field from this snapshot,
+    so that building a document costs one query per kind of metadata element rather
+    than one or more per field. Elements that only exist for particular resource types
+    (NetCDF, RefTS, TimeSeries, GeoFeature) are read only for those types.
+    """
+
+    def __init__(self, obj):
+        self.metadata = obj.metadata if hasattr(obj, 'metadata') else None
+        self.raccess = obj.raccess if hasattr(obj, 'raccess') else None
+        self.owners = list(self.raccess.owners.all()) if self.raccess is not None else []
+        self.comments = list(obj.comments.all())
+
+        md = self.metadata
+        if md is None:
+            return
+        self.title = md.title
+        self.description = md.description
+        self.language = md.language
+        self.publisher = md.publisher
+        self.creators = list(md.creators.all())
+        self.first_creator = next((c for c in self.creators if c.order == 1), None)
+        self.contributors = list(md.contributors.all())
+        self.subjects = list(md.subjects.all())
+        self.coverages = list(md.coverages.all())
+        self.formats = list(md.formats.all())
+        self.identifiers = list(md.identifiers.all())
+        self.sources = list(md.sources.all())
+        self.relations = list(md.relations.all())
+
+        self.variables = []
+        self.sites = []
+        self.methods = []
+        self.quality_levels = []
+        self.datasources = []
+        self.time_series_results = []
+        self.geometry_info = None
+        self.field_info = None
+        if isinstance(md, NetcdfMetaData):
+            self.variables = list(md.variables.all())
+        elif isinstance(md, RefTSMetadata):
+            self.variables = list(md.variables.all())
+            self.sites = list(md.sites.all())
+            self.methods = list(md.methods.all())
+            self.quality_levels = list(md.quality_levels.all())
+            self.datasources = list(md.datasources.all())
+        elif isinstance(md, TimeSeriesMetaData):
+            self.variables = list(md.variables)
+            self.sites = list(md.sites)
+            self.methods = list(md.methods)
+            self.time_series_results = list(md.time_series_results)
+        elif isinstance(md, GeographicFeatureMetaData):
+            self.geometry_info = md.geometryinformation
+            self.field_info = md.fieldinformations.all().first()
+
+
 class BaseResourceIndex(indexes.SearchIndex, indexes.Indexable):
     """Define base class for resource indexes."""
 
@@ -95,6 +178,9 @@ class BaseResourceIndex(indexes.SearchIndex, indexes.Indexable):
     westlimit = indexes.FloatField(null=True)
     start_date = indexes.DateField(null=True)
     end_date = indexes.DateField(null=True)
+    # every coverage of a resource, as Solr spatial fields: see search_configuration/solr.xml
+    coverage_geometry = indexes.MultiValueField(stored=False)
+    coverage_period = indexes.MultiValueField(stored=False)
 
     # # TODO: SOLR extension needs to be installed for these to work
     # coverage_point = indexes.LocationField(null=True)
@@ -153,18 +239,35 @@ class BaseResourceIndex(indexes.SearchIndex, indexes.Indexable):
         return self.get_model().objects.filter(Q(raccess__discoverable=True) |
                                                Q(raccess__public=True))
 
+    def prepare(self, obj):
+        """Read the metadata of obj once and derive every field of its document from it."""
+        obj.index_snapshot = IndexSnapshot(obj)
+        try:
+            return super(BaseResourceIndex, self).prepare(obj)
+        finally:
+            del obj.index_snapshot
+
+    def _snapshot(self, obj):
+        """Return the snapshot of obj, reading one if a field is prepared on its own."""
+        snapshot = getattr(obj, 'index_snapshot', None)
+        if snapshot is None:
+            snapshot = IndexSnapshot(obj)
+        return snapshot
+
     def prepare_title(self, obj):
         """Return metadata title if exists, otherwise return 'none'."""
-        if hasattr(obj, 'metadata') and obj.metadata.title.value is not None:
-            return obj.metadata.title.value.lstrip()
+        snapshot = self._snapshot(obj)
+        if snapshot.metadata is not None and snapshot.title.value is not None:
+            return snapshot.title.value.lstrip()
         else:
             return 'none'
 
     def prepare_abstract(self, obj):
         """Return metadata abstract if exists, otherwise return None."""
-        if hasattr(obj, 'metadata') and obj.metadata.description is not None and \
-                obj.metadata.description.abstract is not None:
-            return obj.metadata.description.abstract.lstrip()
+        snapshot = self._snapshot(obj)
+        if snapshot.metadata is not None and snapshot.description is not None and \
+                snapshot.description.abstract is not None:
+            return snapshot.description.abstract.lstrip()
         else:
             return None
 
@@ -174,9 +277,10 @@ class BaseResourceIndex(indexes.SearchIndex, indexes.Indexable):
 
         This must be represented as a single-value field to enable sorting.
         """
-        if hasattr(obj, 'metadata'):
-            first_creator = obj.metadata.creators.filter(order=1).first()
-            if first_creator.name is not None:
+        snapshot = self._snapshot(obj)
+        if snapshot.metadata is not None:
+            first_creator = snapshot.first_creator
+            if first_creator is not None and first_creator.name is not None:
                 return first_creator.name.lstrip()
             else:
                 return 'none'
@@ -190,9 +294,11 @@ class BaseResourceIndex(indexes.SearchIndex, indexes.Indexable):
 
         This must be represented as a single-value field to enable sorting.
         """
-        if hasattr(obj, 'metadata'):
-            first_creator = obj.metadata.creators.filter(order=1).first()
-            if first_creator.name is not None and first_creator.name != '':
+        snapshot = self._snapshot(obj)
+        if snapshot.metadata is not None:
+            first_creator = snapshot.first_creator
+            if first_creator is not None and first_creator.name is not None and \
+                    first_creator.name != '':
                 normalized = normalize_name(first_creator.name)
                 return normalized
             else:
@@ -206,9 +312,10 @@ class BaseResourceIndex(indexes.SearchIndex, indexes.Indexable):
 
         This field is stored but not indexed, to avoid hitting the Django database during response.
         """
-        if hasattr(obj, 'metadata'):
-            first_creator = obj.metadata.creators.filter(order=1).first()
-            if first_creator.description is not None:
+        snapshot = self._snapshot(obj)
+        if snapshot.metadata is not None:
+            first_creator = snapshot.first_creator
+            if first_creator is not None and first_creator.description is not None:
                 return first_creator.description
             else:
                 return None
@@ -221,10 +328,10 @@ class BaseResourceIndex(indexes.SearchIndex, indexes.Indexable):
 
         This field can have multiple values
         """
-        if hasattr(obj, 'metadata'):
-            return [normalize_name(creator.name)
-                    for creator in obj.metadata.creators.all()
-                    .exclude(name__isnull=True).exclude(name='')]
+        snapshot = self._snapshot(obj)
+        if snapshot.metadata is not None:
+            return [normalize_name(creator.name) for creator in snapshot.creators
+                    if creator.name]
         else:
             return []
 
@@ -234,10 +341,10 @@ class BaseResourceIndex(indexes.SearchIndex, indexes.Indexable):
 
         This field can have multiple values. Contributors include creators.
         """
-        if hasattr(obj, 'metadata'):
+        snapshot = self._snapshot(obj)
+        if snapshot.metadata is not None:
             output1 = [normalize_name(contributor.name)
-                       for contributor in obj.metadata.contributors.all()
-                       .exclude(name__isnull=True).exclude(name='')]
+                       for contributor in snapshot.contributors if contributor.name]
             return list(set(output1))  # eliminate duplicates
         else:
             return []
@@ -248,9 +355,10 @@ class BaseResourceIndex(indexes.SearchIndex, indexes.Indexable):
 
         This field can have multiple values.
         """
-        if hasattr(obj, 'metadata'):
-            return [subject.value.strip() for subject in obj.metadata.subjects.all()
-                    .exclude(value__isnull=True)]
+        snapshot = self._snapshot(obj)
+        if snapshot.metadata is not None:
+            return [subject.value.strip() for subject in snapshot.subjects
+                    if subject.value is not None]
         else:
             return []
 
@@ -259,8 +367,9 @@ class BaseResourceIndex(indexes.SearchIndex, indexes.Indexable):
         Return metadata organization if it exists, otherwise return empty array.
         """
         organizations = []
-        if hasattr(obj, 'metadata'):
-            for creator in obj.metadata.creators.all():
+        snapshot = self._snapshot(obj)
+        if snapshot.metadata is not None:
+            for creator in snapshot.creators:
                 if(creator.organization is not None):
                     organizations.append(creator.organization.strip())
         return organizations
@@ -269,8 +378,9 @@ class BaseResourceIndex(indexes.SearchIndex, indexes.Indexable):
         """
         Return metadata publisher if it exists; otherwise return empty array.
         """
-        if hasattr(obj, 'metadata'):
-            publisher = obj.metadata.publisher
+        snapshot = self._snapshot(obj)
+        if snapshot.metadata is not None:
+            publisher = snapshot.publisher
             if publisher is not None:
                 return unicode(publisher).lstrip()
             else:
@@ -280,9 +390,9 @@ class BaseResourceIndex(indexes.SearchIndex, indexes.Indexable):
 
     def prepare_creator_email(self, obj):
         """Return metadata emails if exists, otherwise return empty array."""
-        if hasattr(obj, 'metadata'):
-            return [creator.email.strip() for creator in obj.metadata.creators.all()
-                    .exclude(email__isnull=True).exclude(email='')]
+        snapshot = self._snapshot(obj)
+        if snapshot.metadata is not None:
+            return [creator.email.strip() for creator in snapshot.creators if creator.email]
         else:
             return []
 
@@ -293,12 +403,13 @@ class BaseResourceIndex(indexes.SearchIndex, indexes.Indexable):
         To make faceting work properly, all flags that are True are represented.
         """
         options = []
-        if hasattr(obj, 'raccess'):
-            if obj.raccess.published:
+        raccess = self._snapshot(obj).raccess
+        if raccess is not None:
+            if raccess.published:
                 options.append('published')
-            elif obj.raccess.public:
+            elif raccess.public:
                 options.append('public')
-            elif obj.raccess.discoverable:
+            elif raccess.discoverable:
                 options.append('discoverable')
             else:
                 options.append('private')
@@ -308,16 +419,18 @@ class BaseResourceIndex(indexes.SearchIndex, indexes.Indexable):
 
     def prepare_replaced(self, obj):
         """Return True if 'isReplacedBy' attribute exists, otherwise return False."""
-        if hasattr(obj, 'metadata'):
-            return obj.metadata.relations.all().filter(type='isReplacedBy').exists()
+        snapshot = self._snapshot(obj)
+        if snapshot.metadata is not None:
+            return any(relation.type == 'isReplacedBy' for relation in snapshot.relations)
         else:
             return False
 
     def prepare_coverage(self, obj):
         """Return resource coverage if exists, otherwise return empty array."""
         # TODO: reject empty coverages
-        if hasattr(obj, 'metadata'):
-            return [coverage._value.strip() for coverage in obj.metadata.coverages.all()]
+        snapshot = self._snapshot(obj)
+        if snapshot.metadata is not None:
+            return [coverage._value.strip() for coverage in snapshot.coverages]
         else:
             return []
 
@@ -327,8 +440,9 @@ class BaseResourceIndex(indexes.SearchIndex, indexes.Indexable):
 
         This field can have multiple values.
         """
-        if hasattr(obj, 'metadata'):
-            return [coverage.type.strip() for coverage in obj.metadata.coverages.all()]
+        snapshot = self._snapshot(obj)
+        if snapshot.metadata is not None:
+            return [coverage.type.strip() for coverage in snapshot.coverages]
         else:
             return []
 
@@ -340,8 +454,9 @@ class BaseResourceIndex(indexes.SearchIndex, indexes.Indexable):
     # TODO: If there are multiple coverage objects with the same type, only first is returned.
     def prepare_east(self, obj):
         """Return resource coverage east bound if exists, otherwise return None."""
-        if hasattr(obj, 'metadata'):
-            for coverage in obj.metadata.coverages.all():
+        snapshot = self._snapshot(obj)
+        if snapshot.metadata is not None:
+            for coverage in snapshot.coverages:
                 if coverage.type == 'point':
                     return float(coverage.value["east"])
                 # TODO: this returns the box center, not the extent
@@ -355,8 +470,9 @@ class BaseResourceIndex(indexes.SearchIndex, indexes.Indexable):
     # TODO: If there are multiple coverage objects with the same type, only first is returned.
     def prepare_north(self, obj):
         """Return resource coverage north bound if exists, otherwise return None."""
-        if hasattr(obj, 'metadata'):
-            for coverage in obj.metadata.coverages.all():
+        snapshot = self._snapshot(obj)
+        if snapshot.metadata is not None:
+            for coverage in snapshot.coverages:
                 if coverage.type == 'point':
                     return float(coverage.value["north"])
                 # TODO: This returns the box center, not the extent
@@ -369,9 +485,10 @@ class BaseResourceIndex(indexes.SearchIndex, indexes.Indexable):
     # TODO: If there are multiple coverage objects with the same type, only first is returned.
     def prepare_northlimit(self, obj):
         """Return resource coverage north limit if exists, otherwise return None."""
-        if hasattr(obj, 'metadata'):
+        snapshot = self._snapshot(obj)
+        if snapshot.metadata is not None:
             # TODO: does not index properly if there are multiple coverages of the same type.
-            for coverage in obj.metadata.coverages.all():
+            for coverage in snapshot.coverages:
                 if coverage.type == 'box':
                     return coverage.value["northlimit"]
         else:
@@ -380,9 +497,10 @@ class BaseResourceIndex(indexes.SearchIndex, indexes.Indexable):
     # TODO: If there are multiple coverage objects with the same type, only first is returned.
     def prepare_eastlimit(self, obj):
         """Return resource coverage east limit if exists, otherwise return None."""
-        if hasattr(obj, 'metadata'):
+        snapshot = self._snapshot(obj)
+        if snapshot.metadata is not None:
             # TODO: does not index properly if there are multiple coverages of the same type.
-            for coverage in obj.metadata.coverages.all():
+            for coverage in snapshot.coverages:
                 if coverage.type == 'box':
                     return coverage.value["eastlimit"]
         else:
@@ -391,9 +509,10 @@ class BaseResourceIndex(indexes.SearchIndex, indexes.Indexable):
     # TODO: If there are multiple coverage objects with the same type, only first is returned.
     def prepare_southlimit(self, obj):
         """Return resource coverage south limit if exists, otherwise return None."""
-        if hasattr(obj, 'metadata'):
+        snapshot = self._snapshot(obj)
+        if snapshot.metadata is not None:
             # TODO: does not index properly if there are multiple coverages of the same type.
-            for coverage in obj.metadata.coverages.all():
+            for coverage in snapshot.coverages:
                 if coverage.type == 'box':
                     return coverage.value["southlimit"]
         else:
@@ -402,9 +521,10 @@ class BaseResourceIndex(indexes.SearchIndex, indexes.Indexable):
     # TODO: If there are multiple coverage objects with the same type, only first is returned.
     def prepare_westlimit(self, obj):
         """Return resource coverage west limit if exists, otherwise return None."""
-        if hasattr(obj, 'metadata'):
+        snapshot = self._snapshot(obj)
+        if snapshot.metadata is not None:
             # TODO: does not index properly if there are multiple coverages of the same type.
-            for coverage in obj.metadata.coverages.all():
+            for coverage in snapshot.coverages:
                 if coverage.type == 'box':
                     return coverage.value["westlimit"]
         else:
@@ -415,25 +535,17 @@ class BaseResourceIndex(indexes.SearchIndex, indexes.Indexable):
     # TODO: If there are multiple coverage objects with the same type, only first is returned.
     def prepare_start_date(self, obj):
         """Return resource coverage start date if exists, otherwise return None."""
-        if hasattr(obj, 'metadata'):
-            for coverage in obj.metadata.coverages.all():
+        snapshot = self._snapshot(obj)
+        if snapshot.metadata is not None:
+            for coverage in snapshot.coverages:
                 if coverage.type == 'period':
-                    clean_date = coverage.value["start"][:10]
-                    if "/" in clean_date:
-                        parsed_date = clean_date.split("/")
-                        start_date = parsed_date[2] + '-' + parsed_date[0] + '-' + parsed_date[1]
-                    else:
-                        parsed_date = clean_date.split("-")
-                        start_date = parsed_date[0] + '-' + parsed_date[1] + '-' + parsed_date[2]
-                    start_date = remove_whitespace(start_date)  # no embedded spaces
                     try:
-                        start_date_object = datetime.strptime(start_date, '%Y-%m-%d')
+                        return parse_coverage_date(coverage.value["start"])
                     except ValueError:
                         logger = logging.getLogger('django')
-                        logger.error("invalid start date {} in resource {}".format(obj.short_id,
-                                                                                   start_date))
+                        logger.error("invalid start date {} in resource {}"
+                                     .format(coverage.value["start"], obj.short_id))
                         return None
-                    return start_date_object
         else:
             return None
 
@@ -442,28 +554,74 @@ class BaseResourceIndex(indexes.SearchIndex, indexes.Indexable):
     # TODO: If there are multiple coverage objects with the same type, only first is returned.
     def prepare_end_date(self, obj):
         """Return resource coverage end date if exists, otherwise return None."""
-        if hasattr(obj, 'metadata'):
-            for coverage in obj.metadata.coverages.all():
+        snapshot = self._snapshot(obj)
+        if snapshot.metadata is not None:
+            for coverage in snapshot.coverages:
                 if coverage.type == 'period' and 'end' in coverage.value:
-                    clean_date = coverage.value["end"][:10]
-                    if "/" in clean_date:
-                        parsed_date = clean_date.split("/")
-                        end_date = parsed_date[2] + '-' + parsed_date[0] + '-' + parsed_date[1]
-                    else:
-                        parsed_date = clean_date.split("-")
-                        end_date = parsed_date[0] + '-' + parsed_date[1] + '-' + parsed_date[2]
-                    end_date = remove_whitespace(end_date)  # no embedded spaces
                     try:
-                        end_date_object = datetime.strptime(end_date, '%Y-%m-%d')
+                        return parse_coverage_date(coverage.value["end"])
                     except ValueError:
                         logger = logging.getLogger('django')
-                        logger.error("invalid end date {} in resource {}".format(end_date,
-                                                                                 obj.short_id))
+                        logger.error("invalid end date {} in resource {}"
+                                     .format(coverage.value["end"], obj.short_id))
                         return None
-                    return end_date_object
         else:
             return None
 
+    def prepare_coverage_geometry(self, obj):
+        """
+        Return every spatial coverage as a Solr spatial shape.
+
+        Points are 'lat,lon' and boxes are 'west south east north' rectangles; a box whose
+        west limit is greater than its east limit crosses the dateline.
+        """
+        shapes = []
+        snapshot = self._snapshot(obj)
+        if snapshot.metadata is None:
+            return []
+        for coverage in snapshot.coverages:
+            try:
+                if coverage.type == 'point':
+                    shapes.append("{},{}".format(float(coverage.value["north"]),
+                                                 float(coverage.value["east"])))
+                elif coverage.type == 'box':
+                    shapes.append("{} {} {} {}".format(float(coverage.value["westlimit"]),
+                                                       float(coverage.value["southlimit"]),
+                                                       float(coverage.value["eastlimit"]),
+                                                       float(coverage.value["northlimit"])))
+            except (KeyError, ValueError):
+                logger = logging.getLogger('django')
+                logger.error("invalid {} coverage {} in resource {}"
+                             .format(coverage.type, coverage._value, obj.short_id))
+        return shapes
+
+    def prepare_coverage_period(self, obj):
+        """
+        Return every temporal coverage as the point 'start end' in days (see coverage_day).
+
+        A period without an end is a single day.
+        """
+        periods = []
+        snapshot = self._snapshot(obj)
+        if snapshot.metadata is None:
+            return []
+        for coverage in snapshot.coverages:
+            if coverage.type != 'period':
+                continue
+            try:
+                start = coverage_day(parse_coverage_date(coverage.value["start"]))
+                if 'end' in coverage.value:
+                    end = coverage_day(parse_coverage_date(coverage.value["end"]))
+                else:
+                    end = start
+            except (KeyError, ValueError):
+                logger = logging.getLogger('django')
+                logger.error("invalid period coverage {} in resource {}"
+                             .format(coverage._value, obj.short_id))
+                continue
+            periods.append("{} {}".format(start, end))
+        return periods
+
     # # TODO: SOLR extension needs to be installed for these to work
     # def prepare_coverage_point(self, obj):
     #     """ Return Point object associated with coverage, or None """
@@ -494,36 +652,41 @@ class BaseResourceIndex(indexes.SearchIndex, indexes.Indexable):
 
     def prepare_format(self, obj):
         """Return metadata formats if metadata exists, otherwise return empty array."""
-        if hasattr(obj, 'metadata'):
-            return [format.value.strip() for format in obj.metadata.formats.all()]
+        snapshot = self._snapshot(obj)
+        if snapshot.metadata is not None:
+            return [format.value.strip() for format in snapshot.formats]
         else:
             return []
 
     def prepare_identifier(self, obj):
         """Return metadata identifiers if metadata exists, otherwise return empty array."""
-        if hasattr(obj, 'metadata'):
-            return [identifier.name.strip() for identifier in obj.metadata.identifiers.all()]
+        snapshot = self._snapshot(obj)
+        if snapshot.metadata is not None:
+            return [identifier.name.strip() for identifier in snapshot.identifiers]
         else:
             return []
 
     def prepare_language(self, obj):
         """Return resource language if exists, otherwise return None."""
-        if hasattr(obj, 'metadata'):
-            return obj.metadata.language.code.strip()
+        snapshot = self._snapshot(obj)
+        if snapshot.metadata is not None:
+            return snapshot.language.code.strip()
         else:
             return None
 
     def prepare_source(self, obj):
         """Return resource sources if exists, otherwise return empty array."""
-        if hasattr(obj, 'metadata'):
-            return [source.derived_from.strip() for source in obj.metadata.sources.all()]
+        snapshot = self._snapshot(obj)
+        if snapshot.metadata is not None:
+            return [source.derived_from.strip() for source in snapshot.sources]
         else:
             return []
 
     def prepare_relation(self, obj):
         """Return resource relations if exists, otherwise return empty array."""
-        if hasattr(obj, 'metadata'):
-            return [relation.value.strip() for relation in obj.metadata.relations.all()]
+        snapshot = self._snapshot(obj)
+        if snapshot.metadata is not None:
+            return [relation.value.strip() for relation in snapshot.relations]
         else:
             return []
 
@@ -533,7 +696,7 @@ class BaseResourceIndex(indexes.SearchIndex, indexes.Indexable):
 
     def prepare_comment(self, obj):
         """Return list of all comments on resource."""
-        return [comment.comment.strip() for comment in obj.comments.all()]
+        return [comment.comment.strip() for comment in self._snapshot(obj).comments]
 
     def prepare_comments_count(self, obj):
         """Return count of resource comments."""
@@ -541,20 +704,16 @@ class BaseResourceIndex(indexes.SearchIndex, indexes.Indexable):
 
     def prepare_owner_login(self, obj):
         """Return list of usernames that have ownership access to resource."""
-        if hasattr(obj, 'raccess'):
-            return [owner.username for owner in obj.raccess.owners.all()]
-        else:
-            return []
+        return [owner.username for owner in self._snapshot(obj).owners]
 
     # TODO: should utilize name from user profile rather than from User field
     def prepare_owner(self, obj):
         """Return list of names of resource owners."""
         names = []
-        if hasattr(obj, 'raccess'):
-            for owner in obj.raccess.owners.all():
-                name = normalize_name(owner.first_name.capitalize() +
-                                      ' ' + owner.last_name.capitalize())
-                names.append(name)
+        for owner in self._snapshot(obj).owners:
+            name = normalize_name(owner.first_name.capitalize() +
+                                  ' ' + owner.last_name.capitalize())
+            names.append(name)
         return names
 
     # TODO: should utilize name from user profile rather than from User field
@@ -563,27 +722,22 @@ class BaseResourceIndex(indexes.SearchIndex, indexes.Indexable):
         output0 = []
         output1 = []
         output2 = []
-        if hasattr(obj, 'raccess'):
-            for owner in obj.raccess.owners.all():
-                name = normalize_name(owner.first_name.capitalize() +
-                                      ' ' + owner.last_name.capitalize())
-                output0.append(name)
+        snapshot = self._snapshot(obj)
+        for owner in snapshot.owners:
+            name = normalize_name(owner.first_name.capitalize() +
+                                  ' ' + owner.last_name.capitalize())
+            output0.append(name)
 
-        if hasattr(obj, 'metadata'):
+        if snapshot.metadata is not None:
             output1 = [normalize_name(creator.name)
-                       for creator in obj.metadata.creators.all()
-                       .exclude(name__isnull=True).exclude(name='')]
+                       for creator in snapshot.creators if creator.name]
             output2 = [normalize_name(contributor.name)
-                       for contributor in obj.metadata.contributors.all()
-                       .exclude(name__isnull=True).exclude(name='')]
+                       for contributor in snapshot.contributors if contributor.name]
         return list(set(output0 + output1 + output2))  # eliminate duplicates
 
     def prepare_owners_count(self, obj):
         """Return count of resource owners if 'raccess' attribute exists, othrerwise return 0."""
-        if hasattr(obj, 'raccess'):
-            return obj.raccess.owners.all().count()
-        else:
-            return 0
+        return len(self._snapshot(obj).owners)
 
     # # TODO: We might need these later for social discovery
     # def prepare_viewer_login(self, obj):
@@ -637,9 +791,10 @@ class BaseResourceIndex(indexes.SearchIndex, indexes.Indexable):
         """
         Return geometry type if metadata exists, otherwise return [].
         """
-        if hasattr(obj, 'metadata'):
-            if isinstance(obj.metadata, GeographicFeatureMetaData):
-                geometry_info = obj.metadata.geometryinformation
+        snapshot = self._snapshot(obj)
+        if snapshot.metadata is not None:
+            if isinstance(snapshot.metadata, GeographicFeatureMetaData):
+                geometry_info = snapshot.geometry_info
                 if geometry_info is not None:
                     return geometry_info.geometryType
                 else:
@@ -653,9 +808,10 @@ class BaseResourceIndex(indexes.SearchIndex, indexes.Indexable):
         """
         Return metadata field name if exists, otherwise return [].
         """
-        if hasattr(obj, 'metadata'):
-            if isinstance(obj.metadata, GeographicFeatureMetaData):
-                field_info = obj.metadata.fieldinformations.all().first()
+        snapshot = self._snapshot(obj)
+        if snapshot.metadata is not None:
+            if isinstance(snapshot.metadata, GeographicFeatureMetaData):
+                field_info = snapshot.field_info
                 if field_info is not None and field_info.fieldName is not None:
                     return field_info.fieldName.strip()
                 else:
@@ -669,9 +825,10 @@ class BaseResourceIndex(indexes.SearchIndex, indexes.Indexable):
         """
         Return metadata field type if exists, otherwise return None.
         """
-        if hasattr(obj, 'metadata'):
-            if isinstance(obj.metadata, GeographicFeatureMetaData):
-                field_info = obj.metadata.fieldinformations.all().first()
+        snapshot = self._snapshot(obj)
+        if snapshot.metadata is not None:
+            if isinstance(snapshot.metadata, GeographicFeatureMetaData):
+                field_info = snapshot.field_info
                 if field_info is not None and field_info.fieldType is not None:
                     return field_info.fieldType.strip()
                 else:
@@ -685,9 +842,10 @@ class BaseResourceIndex(indexes.SearchIndex, indexes.Indexable):
         """
         Return metadata field type code if exists, otherwise return [].
         """
-        if hasattr(obj, 'metadata'):
-            if isinstance(obj.metadata, GeographicFeatureMetaData):
-                field_info = obj.metadata.fieldinformations.all().first()
+        snapshot = self._snapshot(obj)
+        if snapshot.metadata is not None:
+            if isinstance(snapshot.metadata, GeographicFeatureMetaData):
+                field_info = snapshot.field_info
                 if field_info is not None and field_info.fieldTypeCode is not None:
                     return field_info.fieldTypeCode.strip()
                 else:
@@ -702,15 +860,16 @@ class BaseResourceIndex(indexes.SearchIndex, indexes.Indexable):
         Return metadata variable names if exists, otherwise return empty array.
         """
         variable_names = []
-        if hasattr(obj, 'metadata'):
-            if isinstance(obj.metadata, NetcdfMetaData):
-                for variable in obj.metadata.variables.all():
+        snapshot = self._snapshot(obj)
+        if snapshot.metadata is not None:
+            if isinstance(snapshot.metadata, NetcdfMetaData):
+                for variable in snapshot.variables:
                     variable_names.append(variable.name.strip())
-            elif isinstance(obj.metadata, RefTSMetadata):
-                for variable in obj.metadata.variables.all():
+            elif isinstance(snapshot.metadata, RefTSMetadata):
+                for variable in snapshot.variables:
                     variable_names.append(variable.name.strip())
-            elif isinstance(obj.metadata, TimeSeriesMetaData):
-                for variable in obj.metadata.variables:
+            elif isinstance(snapshot.metadata, TimeSeriesMetaData):
+                for variable in snapshot.variables:
                     variable_names.append(variable.variable_name.strip())
         return variable_names
 
@@ -719,15 +878,16 @@ class BaseResourceIndex(indexes.SearchIndex, indexes.Indexable):
         Return metadata variable types if exists, otherwise return empty array.
         """
         variable_types = []
-        if hasattr(obj, 'metadata'):
-            if isinstance(obj.metadata, NetcdfMetaData):
-                for variable in obj.metadata.variables.all():
+        snapshot = self._snapshot(obj)
+        if snapshot.metadata is not None:
+            if isinstance(snapshot.metadata, NetcdfMetaData):
+                for variable in snapshot.variables:
                     variable_types.append(variable.type.strip())
-            elif isinstance(obj.metadata, RefTSMetadata):
-                for variable in obj.metadata.variables.all():
+            elif isinstance(snapshot.metadata, RefTSMetadata):
+                for variable in snapshot.variables:
                     variable_types.append(variable.data_type.strip())
-            elif isinstance(obj.metadata, TimeSeriesMetaData):
-                for variable in obj.metadata.variables:
+            elif isinstance(snapshot.metadata, TimeSeriesMetaData):
+                for variable in snapshot.variables:
                     variable_types.append(variable.variable_type.strip())
         return variable_types
 
@@ -736,9 +896,10 @@ class BaseResourceIndex(indexes.SearchIndex, indexes.Indexable):
         Return metadata variable shapes if exists, otherwise return empty array.
         """
         variable_shapes = []
-        if hasattr(obj, 'metadata'):
-            if isinstance(obj.metadata, NetcdfMetaData):
-                for variable in obj.metadata.variables.all():
+        snapshot = self._snapshot(obj)
+        if snapshot.metadata is not None:
+            if isinstance(snapshot.metadata, NetcdfMetaData):
+                for variable in snapshot.variables:
                     if variable.shape is not None:
                         variable_shapes.append(variable.shape.strip())
         return variable_shapes
@@ -748,9 +909,10 @@ class BaseResourceIndex(indexes.SearchIndex, indexes.Indexable):
         Return metadata variable descriptive names if exists, otherwise return empty array.
         """
         variable_descriptive_names = []
-        if hasattr(obj, 'metadata'):
-            if isinstance(obj.metadata, NetcdfMetaData):
-                for variable in obj.metadata.variables.all():
+        snapshot = self._snapshot(obj)
+        if snapshot.metadata is not None:
+            if isinstance(snapshot.metadata, NetcdfMetaData):
+                for variable in snapshot.variables:
                     if variable.descriptive_name is not None:
                         variable_descriptive_names.append(variable.descriptive_name.strip())
         return variable_descriptive_names
@@ -760,9 +922,10 @@ class BaseResourceIndex(indexes.SearchIndex, indexes.Indexable):
         Return metadata variable speciations if exists, otherwise return empty array.
         """
         variable_speciations = []
-        if hasattr(obj, 'metadata'):
-            if isinstance(obj.metadata, TimeSeriesMetaData):
-                for variable in obj.metadata.variables:
+        snapshot = self._snapshot(obj)
+        if snapshot.metadata is not None:
+            if isinstance(snapshot.metadata, TimeSeriesMetaData):
+                for variable in snapshot.variables:
                     if variable.speciation is not None:
                         variable_speciations.append(variable.speciation.strip())
         return variable_speciations
@@ -772,13 +935,14 @@ class BaseResourceIndex(indexes.SearchIndex, indexes.Indexable):
         Return list of sites if exists, otherwise return empty array.
         """
         sites = []
-        if hasattr(obj, 'metadata'):
-            if isinstance(obj.metadata, RefTSMetadata):
-                for site in obj.metadata.sites.all():
+        snapshot = self._snapshot(obj)
+        if snapshot.metadata is not None:
+            if isinstance(snapshot.metadata, RefTSMetadata):
+                for site in snapshot.sites:
                     if site.name is not None and site.name != '':
                         sites.append(site.name.strip())
-            elif isinstance(obj.metadata, TimeSeriesMetaData):
-                for site in obj.metadata.sites:
+            elif isinstance(snapshot.metadata, TimeSeriesMetaData):
+                for site in snapshot.sites:
                     if site.site_name is not None and site.site_name != '':
                         sites.append(site.site_name.strip())
         return sites
@@ -788,13 +952,14 @@ class BaseResourceIndex(indexes.SearchIndex, indexes.Indexable):
         Return list of methods if exists, otherwise return empty array.
         """
         methods = []
-        if hasattr(obj, 'metadata'):
-            if isinstance(obj.metadata, RefTSMetadata):
-                for method in obj.metadata.methods.all():
+        snapshot = self._snapshot(obj)
+        if snapshot.metadata is not None:
+            if isinstance(snapshot.metadata, RefTSMetadata):
+                for method in snapshot.methods:
                     if method.description is not None:
                         methods.append(method.description.strip())
-            elif isinstance(obj.metadata, TimeSeriesMetaData):
-                for method in obj.metadata.methods:
+            elif isinstance(snapshot.metadata, TimeSeriesMetaData):
+                for method in snapshot.methods:
                     if method.method_description is not None:
                         methods.append(method.method_description.strip())
         return methods
@@ -804,9 +969,10 @@ class BaseResourceIndex(indexes.SearchIndex, indexes.Indexable):
         Return list of quality levels if exists, otherwise return empty array.
         """
         quality_levels = []
-        if hasattr(obj, 'metadata'):
-            if isinstance(obj.metadata, RefTSMetadata):
-                for quality_level in obj.metadata.quality_levels.all():
+        snapshot = self._snapshot(obj)
+        if snapshot.metadata is not None:
+            if isinstance(snapshot.metadata, RefTSMetadata):
+                for quality_level in snapshot.quality_levels:
                     if quality_level.code is not None:
                         quality_levels.append(quality_level.code.strip())
         return quality_levels
@@ -816,9 +982,10 @@ class BaseResourceIndex(indexes.SearchIndex, indexes.Indexable):
         Return list of data sources if exists, otherwise return empty array.
         """
         data_sources = []
-        if hasattr(obj, 'metadata'):
-            if isinstance(obj.metadata, RefTSMetadata):
-                for data_source in obj.metadata.datasources.all():
+        snapshot = self._snapshot(obj)
+        if snapshot.metadata is not None:
+            if isinstance(snapshot.metadata, RefTSMetadata):
+                for data_source in snapshot.datasources:
                     if data_source.code is not None:
                         data_sources.append(data_source.code.strip())
         return data_sources
@@ -828,13 +995,14 @@ class BaseResourceIndex(indexes.SearchIndex, indexes.Indexable):
         Return list of sample mediums if exists, otherwise return empty array.
         """
         sample_mediums = []
-        if hasattr(obj, 'metadata'):
-            if isinstance(obj.metadata, TimeSeriesMetaData):
-                for time_series_result in obj.metadata.time_series_results:
+        snapshot = self._snapshot(obj)
+        if snapshot.metadata is not None:
+            if isinstance(snapshot.metadata, TimeSeriesMetaData):
+                for time_series_result in snapshot.time_series_results:
                     if time_series_result.sample_medium is not None:
                         sample_mediums.append(time_series_result.sample_medium)
-            elif isinstance(obj.metadata, RefTSMetadata):
-                for variable in obj.metadata.variables.all():
+            elif isinstance(snapshot.metadata, RefTSMetadata):
+                for variable in snapshot.variables:
                     if variable.sample_medium is not None:
                         sample_mediums.append(variable.sample_medium)
         return list(set(sample_mediums))
@@ -844,9 +1012,10 @@ class BaseResourceIndex(indexes.SearchIndex, indexes.Indexable):
         Return list of units names if exists, otherwise return empty array.
         """
         units_names = []
-        if hasattr(obj, 'metadata'):
-            if isinstance(obj.metadata, TimeSeriesMetaData):
-                for time_series_result in obj.metadata.time_series_results:
+        snapshot = self._snapshot(obj)
+        if snapshot.metadata is not None:
+            if isinstance(snapshot.metadata, TimeSeriesMetaData):
+                for time_series_result in snapshot.time_series_results:
                     if time_series_result.units_name is not None:
                         units_names.append(time_series_result.units_name)
         return units_names
@@ -856,9 +1025,10 @@ class BaseResourceIndex(indexes.SearchIndex, indexes.Indexable):
         Return list of units types if exists, otherwise return empty array.
         """
         units_types = []
-        if hasattr(obj, 'metadata'):
-            if isinstance(obj.metadata, TimeSeriesMetaData):
-                for time_series_result in obj.metadata.time_series_results:
+        snapshot = self._snapshot(obj)
+        if snapshot.metadata is not None:
+            if isinstance(snapshot.metadata, TimeSeriesMetaData):
+                for time_series_result in snapshot.time_series_results:
                     if time_series_result.units_type is not None:
                         units_types.append(time_series_result.units_type.strip())
         return units_types
@@ -868,9 +1038,10 @@ class BaseResourceIndex(indexes.SearchIndex, indexes.Indexable):
         Return list of aggregation statistics if exists, otherwise return empty array.
         """
         aggregation_statistics = []
-        if hasattr(obj, 'metadata'):
-            if isinstance(obj.metadata, TimeSeriesMetaData):
-                for time_series_result in obj.metadata.time_series_results:
+        snapshot = self._snapshot(obj)
+        if snapshot.metadata is not None:
+            if isinstance(snapshot.metadata, TimeSeriesMetaData):
+                for time_series_result in snapshot.time_series_results:
                     if time_series_result.aggregation_statistics is not None:
                         aggregation_statistics.append(time_series_result.aggregation_statistics)
         return aggregation_statistics
@@ -8,8 +8,10 @@ import traceback
 import zipfile
 import logging
 import json
+import time
 
 from datetime import datetime, timedelta, date
+from uuid import uuid4
 from xml.etree import ElementTree
 
 import requests
@@ -17,7 +19,13 @@ from celery import shared_task
 from celery.schedules import crontab
 from celery.task import periodic_task
 from django.conf import settings
+from django.core.cache import cache
 from django.core.mail import send_mail
+from django.db import transaction
+from django.utils.timezone import now
+from haystack import connections, connection_router
+from haystack.exceptions import NotHandled
+from haystack.utils import get_identifier
 from rest_framework import status
 
 from hs_core.hydroshare import utils
@@ -29,7 +37,7 @@ from theme.models import UserQuota, QuotaMessage, UserProfile, User
 
 from django_irods.icommands import SessionException
 
-from hs_core.models import BaseResource
+from hs_core.models import BagBuildJob, BaseResource, SolrIndexQueue
 from theme.utils import get_quota_message
 
 # Pass 'django' into getLogger instead of __name__
@@ -229,6 +237,97 @@ def manage_task_nightly():
                 uq.save()
 
 
+@periodic_task(ignore_result=True, run_every=crontab(minute=0, hour=2))
+def nightly_resource_file_reconciliation():
+    """Queue reconciliation of recorded file sizes and checksums with iRODS, in batches."""
+    batch_size = getattr(settings, 'RESOURCE_FILE_RECONCILIATION_BATCH_SIZE', 100)
+    res_ids = list(BaseResource.objects.order_by('id').values_list('id', flat=True))
+    for start in range(0, len(res_ids), batch_size):
+        reconcile_resource_files.apply_async((res_ids[start:start + batch_size],))
+
+
+@shared_task
+def reconcile_resource_files(resource_ids):
+    """Reconcile recorded size, checksum and modification time of resource files with iRODS.
+
+    Each resource costs one iRODS catalog query; only drifted file records are saved.
+    :param resource_ids: database ids (not short ids) of the resources to reconcile
+    :return: number of file records updated
+    """
+    updated = 0
+    for res in BaseResource.objects.filter(id__in=resource_ids):
+        try:
+            updated += res.sync_file_system_metadata()
+        except SessionException as ex:
+            logger.error("failed to reconcile files of resource {}: {}"
+                         .format(res.short_id, ex.stderr))
+    if updated:
+        logger.info("reconciled {} resource files with iRODS".format(updated))
+    return updated
+
+
+@periodic_task(ignore_result=True, run_every=crontab(minute='*/5'))
+def process_solr_index_queue():
+    """Send resources queued by HydroRealtimeSignalProcessor to Solr in batches.
+
+    This normally runs SOLR_INDEX_DELAY seconds after a resource is first queued; the
+    periodic run picks up entries whose scheduled run did not see them.
+    :return: number of resources processed
+    """
+    entries = list(SolrIndexQueue.objects.order_by('enqueued')
+                   .values_list('id', 'resource_id', 'enqueued'))
+    if not entries:
+        return 0
+    lag = (now() - entries[0][2]).total_seconds()
+    # dequeue before reading resources, so that later changes are queued again
+    SolrIndexQueue.objects.filter(id__in=[e[0] for e in entries]).delete()
+
+    resource_ids = set(e[1] for e in entries)
+    to_update = []
+    to_remove = []
+    for res in BaseResource.objects.filter(id__in=resource_ids).select_related('raccess'):
+        resource_ids.discard(res.id)
+        if not hasattr(res, 'raccess') or not hasattr(res, 'metadata'):
+            continue
+        if res.raccess.public or res.raccess.discoverable:
+            to_update.append(res)
+        else:
+            to_remove.append(get_identifier(res))
+    # resources that no longer exist
+    to_remove.extend('hs_core.baseresource.{}'.format(rid) for rid in resource_ids)
+
+    try:
+        for using in connection_router.for_write():
+            try:
+                index = connections[using].get_unified_index().get_index(BaseResource)
+            except NotHandled:
+                logger.exception("Failure: resources not indexed in {}".format(using))
+                continue
+            backend = connections[using].get_backend()
+            # a failure must raise, rather than be logged by haystack, to keep entries queued
+            silently_fail = backend.silently_fail
+            backend.silently_fail = False
+            try:
+                if to_update:
+                    backend.update(index, to_update)
+                for identifier in to_remove:
+                    backend.remove(identifier)
+            finally:
+                backend.silently_fail = silently_fail
+    except Exception:
+        # queue the entries again, so that a later run sends them
+        for _, resource_id, enqueued in entries:
+            SolrIndexQueue.enqueue(resource_id, enqueued=enqueued)
+        logger.exception("solr index: {} resources queued again after a failure"
+                         .format(len(entries)))
+        raise
+
+    logger.info("solr index: {} updated, {} removed, lag {:.1f}s, {} still queued"
+                .format(len(to_update), len(to_remove), lag,
+                        SolrIndexQueue.objects.count()))
+    return len(entries)
+
+
 @shared_task
 def add_zip_file_contents_to_resource(pk, zip_file_path):
     """Add zip file to existing resource and remove tmp zip file."""
@@ -403,6 +502,159 @@ def create_bag_by_irods(resource_id):
         return False
 
 
+def schedule_bag_build(resource_id):
+    """Queue a bag build for a download, or join the build already queued or running.
+
+    Callers poll BagBuildJob.status_of(resource_id) until the status is 'none' (the bag is
+    built) or 'failed'.
+    :param
+    resource_id: the resource uuid of the resource to create the bag for.
+
+    :return: the BagBuildJob of the resource
+    """
+    from hs_core.hydroshare.utils import get_resource_by_shortkey
+
+    job, queued = BagBuildJob.schedule(get_resource_by_shortkey(resource_id))
+    if queued:
+        dispatch_bag_builds()
+    return job
+
+
+@periodic_task(ignore_result=True, run_every=crontab(minute='*/5'))
+def dispatch_bag_builds():
+    """Start queued bag builds, smallest resources first, within the per-server limits.
+
+    This runs whenever a build is queued or finishes; the periodic run gives up builds that
+    have been running longer than BAG_BUILD_TIMEOUT seconds, e.g. because their worker died.
+    :return: number of builds started
+    """
+    limit = getattr(settings, 'BAG_BUILD_CONCURRENCY', 2)
+    timeout = getattr(settings, 'BAG_BUILD_TIMEOUT', 3600)
+    BagBuildJob.objects.filter(status=BagBuildJob.RUNNING,
+                               started__lt=now() - timedelta(seconds=timeout))\
+        .update(status=BagBuildJob.FAILED)
+
+    started = []
+    with transaction.atomic():
+        # the row locks keep concurrent dispatchers from exceeding the limits
+        jobs = list(BagBuildJob.objects.select_for_update()
+                    .exclude(status=BagBuildJob.FAILED).order_by('size', 'enqueued'))
+        running = {}
+        for job in jobs:
+            if job.status == BagBuildJob.RUNNING:
+                running[job.storage_resource] = running.get(job.storage_resource, 0) + 1
+        for job in jobs:
+            if job.status == BagBuildJob.QUEUED and running.get(job.storage_resource, 0) < limit:
+                running[job.storage_resource] = running.get(job.storage_resource, 0) + 1
+                job.status = BagBuildJob.RUNNING
+                job.started = now()
+                # the task id identifies this run of the job to the task
+                job.task_id = uuid4().hex
+                job.save(update_fields=['status', 'started', 'task_id'])
+                started.append(job)
+
+    for job in started:
+        build_bag.apply_async((job.short_id,), task_id=job.task_id)
+    return len(started)
+
+
+def _run_bag_build(resource_id, task_id):
+    """Build a bag, then finish the job run identified by task_id and start queued builds.
+
+    A run that was given up and queued again no longer matches the job, so it leaves the
+    job alone.
+    :return: True if bag creation operation succeeds, False otherwise.
+    """
+    try:
+        built = create_bag_by_irods(resource_id)
+    except Exception:
+        logger.exception('Failed to create bag of resource {}'.format(resource_id))
+        built = False
+    jobs = BagBuildJob.objects.filter(short_id=resource_id, task_id=task_id)
+    if built:
+        jobs.delete()
+    else:
+        jobs.update(status=BagBuildJob.FAILED)
+    dispatch_bag_builds()
+    return built
+
+
+@shared_task(bind=True)
+def build_bag(self, resource_id):
+    """Run a bag build started by dispatch_bag_builds, then start the next queued builds.
+
+    :return: True if bag creation operation succeeds, False otherwise.
+    """
+    return _run_bag_build(resource_id, self.request.id)
+
+
+def build_bag_now(resource_id):
+    """Build the bag of a resource in this process, for callers that need the bag at once.
+
+    The build is recorded as a running BagBuildJob, outside the queue and the per-server
+    limits, so that downloads join it rather than start another ibun run on the same zip file.
+    If a build of the resource is already running, this waits for that build instead, but only
+    for BAG_BUILD_WAIT seconds, so that the caller can report a build still in progress.
+    :param
+    resource_id: the resource uuid of the resource to create the bag for.
+
+    :return: the build status of the resource as in BagBuildJob.status_of: 'none' if the bag
+    is built, 'failed' if the build failed, or 'running' or 'queued' if it is in progress.
+    """
+    from hs_core.hydroshare.utils import get_resource_by_shortkey
+
+    job, _ = BagBuildJob.schedule(get_resource_by_shortkey(resource_id))
+    task_id = uuid4().hex
+    if BagBuildJob.objects.filter(id=job.id, status=BagBuildJob.QUEUED)\
+            .update(status=BagBuildJob.RUNNING, started=now(), task_id=task_id):
+        return 'none' if _run_bag_build(resource_id, task_id) else BagBuildJob.FAILED
+
+    deadline = time.time() + getattr(settings, 'BAG_BUILD_WAIT', 30)
+    while BagBuildJob.objects.filter(id=job.id, status=BagBuildJob.RUNNING).exists() \
+            and time.time() < deadline:
+        time.sleep(1)
+    return BagBuildJob.status_of(resource_id)['status']
+
+
+@periodic_task(ignore_result=True, run_every=crontab(minute='*/10'))
+def prewarm_hot_bags():
+    """Rebuild the stale bags of the most downloaded resources before they are next downloaded.
+
+    The hot resources are the BAG_PREWARM_COUNT resources downloaded most often in the last
+    BAG_PREWARM_DAYS days, as recorded by hs_tracking. The bag of a hot resource is rebuilt
+    once the resource has gone BAG_PREWARM_DELAY seconds without changes, so that a burst of
+    edits leads to one build. All other bags are still built when they are downloaded.
+    :return: number of bag builds scheduled
+    """
+    from hs_tracking.models import Variable
+
+    count = getattr(settings, 'BAG_PREWARM_COUNT', 100)
+    if count < 1:
+        return 0
+    hot = cache.get('bag_prewarm_hot_resources')
+    if hot is None:
+        since = now() - timedelta(days=getattr(settings, 'BAG_PREWARM_DAYS', 30))
+        hot = Variable.top_downloaded_resources(count, since)
+        cache.set('bag_prewarm_hot_resources', hot, 3600)
+
+    quiet_since = now() - timedelta(seconds=getattr(settings, 'BAG_PREWARM_DELAY', 600))
+    resources = BaseResource.objects.filter(short_id__in=hot, updated__lte=quiet_since)\
+        .exclude(short_id__in=BagBuildJob.objects.values('short_id'))
+    scheduled = 0
+    for res in resources:
+        # only ask iRODS about resources that changed since they were last looked at
+        checked_key = 'bag_prewarm_checked:{}'.format(res.short_id)
+        if cache.get(checked_key) == res.updated:
+            continue
+        if res.getAVU('bag_modified'):
+            schedule_bag_build(res.short_id)
+            scheduled += 1
+        cache.set(checked_key, res.updated, None)
+    if scheduled:
+        logger.info("bag prewarm: {} bag builds scheduled".format(scheduled))
+    return scheduled
+
+
 @shared_task
 def update_quota_usage_task(username):
     """update quota usage. This function runs as a celery task, invoked asynchronously with 1
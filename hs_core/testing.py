@@ -3,6 +3,7 @@
 from dateutil import parser
 import tempfile
 import os
+import re
 
 from django.conf import settings
 from django.contrib.sessions.middleware import SessionMiddleware
@@ -46,6 +47,98 @@ class MockIRODSTestCaseMixin(object):
         super(MockIRODSTestCaseMixin, self).tearDown()
 
 
+class StandInIrodsSession(object):
+    """Answer the iCommands used by the storage layer from an in-memory catalog.
+
+    Only the commands needed to test code paths without a live iRODS zone are supported;
+    every command run is recorded in self.commands so tests can count round trips.
+    """
+
+    def __init__(self, catalog):
+        self.catalog = catalog
+        self.commands = []
+
+    def run(self, icommand, data, *args):
+        self.commands.append((icommand,) + args)
+        if icommand != 'iquest':
+            raise SessionException(-1, '', '{} is not supported by the stand-in session'
+                                   .format(icommand))
+        # the query is either "COLL_NAME <op> '<coll>' and DATA_NAME <op> '<name>'" or
+        # "COLL_NAME <op> '<coll>' || like '<coll>/%'", where <op> is '=' or 'like'
+        query = args[-1]
+        conditions = re.findall(r"(=|like) '([^']*)'", query.split('WHERE', 1)[1])
+        if query.count("'") != 4 or len(conditions) != 2:
+            raise SessionException(-1, '', 'Syntax error in query: {}'.format(query))
+        lines = []
+        for path in sorted(self.catalog):
+            coll, name = os.path.split(path)
+            if 'DATA_NAME' in query:
+                matched = self._match(conditions[0], coll) and self._match(conditions[1], name)
+            else:
+                matched = self._match(conditions[0], coll) or self._match(conditions[1], coll)
+            if matched:
+                size, modified, checksum = self.catalog[path]
+                lines.append('{}|{}|{}|{}'.format(path, size, modified, checksum))
+        if not lines:
+            raise SessionException(1, 'CAT_NO_ROWS_FOUND: Nothing was found matching your query',
+                                   '')
+        return '\n'.join(lines) + '\n', ''
+
+    @staticmethod
+    def _match(condition, value):
+        """Return whether value satisfies an (operator, string) condition of an iquest query."""
+        operator, pattern = condition
+        if operator == '=':
+            return value == pattern
+        regex = ''.join('.' if c == '_' else '.*' if c == '%' else re.escape(c) for c in pattern)
+        return re.match(regex + '$', value) is not None
+
+
+class StandInIrodsStorage(object):
+    """Stand-in for IrodsStorage that keeps file information in memory.
+
+    Paths are fully qualified iRODS paths, as in the output of iquest. Relative names
+    passed to exists() and size() are qualified with settings.IRODS_CWD.
+    """
+
+    def __init__(self):
+        self.catalog = {}
+        self.session = StandInIrodsSession(self.catalog)
+
+    def add_file(self, path, size, modified=0, checksum=''):
+        self.catalog[self._full_path(path)] = (size, modified, checksum)
+
+    def _full_path(self, name):
+        return name if name.startswith('/') else os.path.join(settings.IRODS_CWD, name)
+
+    def exists(self, name):
+        return self._full_path(name) in self.catalog
+
+    def listdir(self, path):
+        self.session.commands.append(('ils', path))
+        coll = self._full_path(path).rstrip('/') + '/'
+        dirs = set()
+        files = []
+        for full_path in sorted(self.catalog):
+            if full_path.startswith(coll):
+                rest = full_path[len(coll):]
+                if '/' in rest:
+                    dirs.add(rest.split('/')[0])
+                else:
+                    files.append(rest)
+        return sorted(dirs), files
+
+    def url(self, name):
+        return '/django_irods/download/' + name
+
+    def size(self, name):
+        self.session.commands.append(('ils', '-l', name))
+        try:
+            return self.catalog[self._full_path(name)][0]
+        except KeyError:
+            raise SessionException(-1, '', '{} does not exist'.format(name))
+
+
 class TestCaseCommonUtilities(object):
     """Enable common utilities for iRODS testing."""
     def assert_federated_irods_available(self):
@@ -0,0 +1,144 @@
+from datetime import timedelta
+
+from django.contrib.auth.models import Group
+from django.core.cache import cache
+from django.test import TestCase
+from django.utils.timezone import now
+from mock import patch
+
+from hs_core.hydroshare import resource
+from hs_core.hydroshare import users
+from hs_core.models import BagBuildJob, BaseResource
+from hs_core.tasks import build_bag, build_bag_now, dispatch_bag_builds, prewarm_hot_bags, \
+    schedule_bag_build
+from hs_core.testing import MockIRODSTestCaseMixin
+from hs_tracking.models import Session, Variable, Visitor
+
+
+class TestBagBuildScheduler(MockIRODSTestCaseMixin, TestCase):
+    def setUp(self):
+        super(TestBagBuildScheduler, self).setUp()
+        self.group, _ = Group.objects.get_or_create(name='Hydroshare Author')
+        self.user = users.create_account(
+            'test_user@email.com',
+            username='testuser',
+            first_name='some_first_name',
+            last_name='some_last_name',
+            superuser=False,
+            groups=[])
+        self.resources = [resource.create_resource('GenericResource', self.user,
+                                                   'Resource {}'.format(i))
+                          for i in range(3)]
+        patcher = patch('hs_core.tasks.build_bag.apply_async')
+        self.apply_async = patcher.start()
+        self.addCleanup(patcher.stop)
+
+    def _started(self):
+        return [call[0][0][0] for call in self.apply_async.call_args_list]
+
+    def _run(self, short_id, task_id=None):
+        """Run a build task as the worker would, by default the one started for short_id."""
+        if task_id is None:
+            task_id = BagBuildJob.objects.get(short_id=short_id).task_id
+        return build_bag.apply((short_id,), task_id=task_id).get()
+
+    def test_concurrent_downloads_share_a_build(self):
+        res = self.resources[0]
+        job = schedule_bag_build(res.short_id)
+        self.assertEqual(schedule_bag_build(res.short_id).id, job.id)
+        self.assertEqual(BagBuildJob.objects.count(), 1)
+        self.assertEqual(self._started(), [res.short_id])
+        self.assertEqual(BagBuildJob.status_of(res.short_id)['status'], BagBuildJob.RUNNING)
+
+    def test_limit_and_priority(self):
+        with self.settings(BAG_BUILD_CONCURRENCY=1):
+            for res in self.resources:
+                schedule_bag_build(res.short_id)
+            self.assertEqual(len(self._started()), 1)
+            running = self._started()[0]
+
+            # waiting builds start with the smallest resource
+            big, small = [r.short_id for r in self.resources if r.short_id != running]
+            BagBuildJob.objects.filter(short_id=big).update(size=1000)
+            BagBuildJob.objects.filter(short_id=small).update(size=10)
+            self.assertEqual(BagBuildJob.status_of(big)['position'], 1)
+            self.assertEqual(dispatch_bag_builds(), 0)
+
+            # a finished build frees its slot for the next one
+            with patch('hs_core.tasks.create_bag_by_irods', return_value=True):
+                self._run(running)
+            self.assertEqual(BagBuildJob.status_of(running), {'status': 'none'})
+            self.assertEqual(self._started()[1:], [small])
+
+            # a failed build is reported and queued again by the next download
+            with patch('hs_core.tasks.create_bag_by_irods', return_value=False):
+                self._run(small)
+            self.assertEqual(BagBuildJob.status_of(small)['status'], BagBuildJob.FAILED)
+            self.assertEqual(self._started()[2:], [big])
+            schedule_bag_build(small)
+            self.assertEqual(BagBuildJob.status_of(small)['status'], BagBuildJob.QUEUED)
+
+    def test_timed_out_build_leaves_new_job_alone(self):
+        res = self.resources[0]
+        schedule_bag_build(res.short_id)
+        stale_task_id = BagBuildJob.objects.get(short_id=res.short_id).task_id
+        BagBuildJob.objects.update(started=now() - timedelta(hours=2))
+        with self.settings(BAG_BUILD_TIMEOUT=3600):
+            dispatch_bag_builds()
+        self.assertEqual(BagBuildJob.status_of(res.short_id)['status'], BagBuildJob.FAILED)
+        schedule_bag_build(res.short_id)
+        job = BagBuildJob.objects.get(short_id=res.short_id)
+        self.assertNotEqual(job.task_id, stale_task_id)
+
+        # the given up build finishing, or failing, does not touch the new run
+        for built in (True, False):
+            with patch('hs_core.tasks.create_bag_by_irods', return_value=built):
+                self._run(res.short_id, task_id=stale_task_id)
+            self.assertEqual(BagBuildJob.status_of(res.short_id),
+                             {'status': BagBuildJob.RUNNING, 'task_id': job.task_id})
+
+    def test_build_bag_now(self):
+        res = self.resources[0]
+        with patch('hs_core.tasks.create_bag_by_irods', return_value=True) as create_bag:
+            self.assertEqual(build_bag_now(res.short_id), 'none')
+            self.assertEqual(create_bag.call_count, 1)
+            self.assertEqual(BagBuildJob.status_of(res.short_id), {'status': 'none'})
+
+            # a build already running for a download is waited for rather than repeated
+            schedule_bag_build(res.short_id)
+            with patch('hs_core.tasks.time.sleep',
+                       side_effect=lambda seconds: BagBuildJob.objects.all().delete()):
+                self.assertEqual(build_bag_now(res.short_id), 'none')
+            self.assertEqual(create_bag.call_count, 1)
+
+            # but only for BAG_BUILD_WAIT seconds, after which the build is still in progress
+            schedule_bag_build(res.short_id)
+            with self.settings(BAG_BUILD_WAIT=0):
+                self.assertEqual(build_bag_now(res.short_id), BagBuildJob.RUNNING)
+            self.assertEqual(create_bag.call_count, 1)
+
+        with patch('hs_core.tasks.create_bag_by_irods', return_value=False):
+            self.assertEqual(build_bag_now(self.resources[1].short_id), BagBuildJob.FAILED)
+
+    def test_prewarm_hot_bags(self):
+        cache.clear()
+        session = Session.objects.create(visitor=Visitor.objects.create())
+        hot, cold = self.resources[0], self.resources[1]
+        session.record('download', Variable.format_kwargs(resource_guid=hot.short_id))
+        BaseResource.objects.filter(short_id=hot.short_id)\
+            .update(updated=now() - timedelta(hours=1))
+
+        with self.settings(BAG_PREWARM_COUNT=1), \
+                patch.object(BaseResource, 'getAVU', return_value=True) as get_avu:
+            self.assertEqual(prewarm_hot_bags(), 1)
+            self.assertEqual(self._started(), [hot.short_id])
+            self.assertFalse(BagBuildJob.objects.filter(short_id=cold.short_id).exists())
+
+            # once built, the bag is not looked at again until the resource changes
+            BagBuildJob.objects.all().delete()
+            self.assertEqual(prewarm_hot_bags(), 0)
+            self.assertEqual(get_avu.call_count, 1)
+
+            # a resource still being edited waits for its edits to settle
+            BaseResource.objects.filter(short_id=hot.short_id).update(updated=now())
+            self.assertEqual(prewarm_hot_bags(), 0)
@@ -1,5 +1,11 @@
+from StringIO import StringIO
+
 from django.contrib.auth.models import Group, User
+from django.core.files.uploadedfile import UploadedFile
+from django.db import connection
 from django.test import TestCase
+from django.test.utils import CaptureQueriesContext
+from rdflib import Graph, Literal, Namespace, URIRef
 
 from hs_core import hydroshare
 from hs_core.hydroshare import hs_bagit
@@ -51,6 +57,16 @@ class TestBagIt(TestCase):
         # this is the api call we are testing
         irods_storage_obj = hs_bagit.create_bag_files(self.test_res)
         self.assertTrue(isinstance(irods_storage_obj, IrodsStorage))
+        # the metadata files are uploaded, replacing those written when the resource was created
+        for name in ('resourcemetadata.xml', 'resourcemap.xml'):
+            path = '{}/data/{}'.format(self.test_res.root_path, name)
+            self.assertTrue(irods_storage_obj.exists(path))
+        hs_bagit.create_bag_files(self.test_res)
+        self.assertTrue(irods_storage_obj.exists(path))
+        # the files are replaced in place rather than saved under another name
+        _, files = irods_storage_obj.listdir('{}/data'.format(self.test_res.root_path))
+        self.assertEqual(sorted(f for f in files if f.startswith('resource')),
+                         ['resourcemap.xml', 'resourcemetadata.xml'])
 
     def test_create_bag_by_irods(self):
         try:
@@ -66,3 +82,40 @@ class TestBagIt(TestCase):
         hs_bagit.delete_files_and_bag(self.test_res)
         # resource should not have any bags
         self.assertEquals(self.test_res.bags.count(), 0)
+
+    def _resource_map(self):
+        out = StringIO()
+        with CaptureQueriesContext(connection) as ctx:
+            hs_bagit.write_resource_map(self.test_res, out)
+        graph = Graph()
+        graph.parse(data=out.getvalue(), format='xml')
+        return graph, len(ctx.captured_queries)
+
+    def test_write_resource_map(self):
+        files = [UploadedFile(file=StringIO('file {}'.format(i)), name='file{}.txt'.format(i))
+                 for i in range(2)]
+        hydroshare.add_resource_files(self.test_res.short_id, *files)
+        few_graph, few_queries = self._resource_map()
+
+        files = [UploadedFile(file=StringIO('file {}'.format(i)), name='file{}.csv'.format(i))
+                 for i in range(2, 12)]
+        hydroshare.add_resource_files(self.test_res.short_id, *files)
+        graph, many_queries = self._resource_map()
+
+        ore = Namespace('http://www.openarchives.org/ore/terms/')
+        dc = Namespace('http://purl.org/dc/elements/1.1/')
+        cito = Namespace('http://purl.org/spar/cito/')
+        map_url = [s for s in graph.subjects(dc.identifier, None)][0]
+        aggregation = URIRef(map_url + '#aggregation')
+        self.assertEqual(graph.value(map_url, dc.identifier), Literal(self.test_res.short_id))
+        self.assertEqual(graph.value(aggregation, dc.title), Literal('My Test Resource'))
+        # the metadata document and every file are aggregated
+        self.assertEqual(len(list(graph.objects(aggregation, ore.aggregates))), 13)
+        self.assertEqual(len(list(few_graph.objects(aggregation, ore.aggregates))), 3)
+        file_url = URIRef('{}/contents/file3.csv'.format(map_url.rsplit('/', 1)[0]))
+        self.assertEqual(graph.value(file_url, dc.format), Literal('text/csv'))
+        metadata_url = URIRef(map_url.replace('resourcemap.xml', 'resourcemetadata.xml'))
+        self.assertTrue(isinstance(graph.value(metadata_url, cito.documents), Literal))
+
+        # files are read in one query however many there are
+        self.assertEqual(few_queries, many_queries)
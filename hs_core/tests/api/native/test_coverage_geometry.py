@@ -0,0 +1,55 @@
+from django.contrib.auth.models import Group
+from django.test import TestCase
+
+from hs_core.hydroshare import resource
+from hs_core.hydroshare import users
+from hs_core.models import CoverageGeometry
+from hs_core.testing import MockIRODSTestCaseMixin
+
+
+class TestCoverageGeometry(MockIRODSTestCaseMixin, TestCase):
+    def setUp(self):
+        super(TestCoverageGeometry, self).setUp()
+        self.group, _ = Group.objects.get_or_create(name='Hydroshare Author')
+        self.user = users.create_account(
+            'test_user@email.com',
+            username='testuser',
+            first_name='some_first_name',
+            last_name='some_last_name',
+            superuser=False,
+            groups=[])
+        self.res = resource.create_resource(
+            'GenericResource',
+            self.user,
+            'My Test Resource'
+            )
+
+    def _find(self, north, south, east, west):
+        return users.get_resource_list(type=['GenericResource'], coverage_type='box',
+                                       north=north, south=south, east=east, west=west)
+
+    def test_geometry_follows_coverage(self):
+        box = {'northlimit': 40, 'eastlimit': -110, 'southlimit': 30, 'westlimit': -120,
+               'units': 'Decimal degrees'}
+        self.res.metadata.create_element('coverage', type='box', value=box)
+        coverage = self.res.metadata.coverages.get(type='box')
+        self.assertEqual(CoverageGeometry.objects.filter(coverage=coverage).count(), 1)
+        self.assertIn(self.res, self._find(45, 35, -100, -115))
+        self.assertNotIn(self.res, self._find(20, 10, 10, 0))
+
+        # changing the coverage to a point moves the indexed geometry
+        self.res.metadata.update_element('coverage', coverage.id, type='point',
+                                         value={'east': 5, 'north': 15,
+                                                'units': 'Decimal degrees'})
+        self.assertEqual(CoverageGeometry.objects.filter(coverage=coverage).count(), 1)
+        self.assertNotIn(self.res, self._find(45, 35, -100, -115))
+        self.assertIn(self.res, self._find(20, 10, 10, 0))
+
+        # period coverages have no geometry
+        self.res.metadata.create_element('coverage', type='period',
+                                         value={'start': '1/1/2000', 'end': '12/12/2012'})
+        self.assertEqual(CoverageGeometry.objects.count(), 1)
+
+        # metadata deletion cascades to the geometry
+        self.res.metadata.delete_all_elements()
+        self.assertEqual(CoverageGeometry.objects.count(), 0)
@@ -0,0 +1,70 @@
+import os
+import shutil
+import tempfile
+from datetime import datetime
+
+from django.test import SimpleTestCase
+
+from hs_core.hydroshare import file_cache
+from hs_core.irods import IrodsFileStat
+
+
+class TestFileCache(SimpleTestCase):
+    def setUp(self):
+        super(TestFileCache, self).setUp()
+        self.temp_dir = tempfile.mkdtemp()
+        self.cache_dir = os.path.join(self.temp_dir, 'cache')
+        self.downloads = []
+
+    def tearDown(self):
+        super(TestFileCache, self).tearDown()
+        shutil.rmtree(self.temp_dir)
+
+    def _fetch(self, name, size=10, modified=datetime(2017, 1, 1)):
+        """Fetch a file of the given size, recording each transfer."""
+        def download(path):
+            self.downloads.append(name)
+            with open(path, 'w') as f:
+                f.write('x' * size)
+
+        stat = IrodsFileStat(path=name, size=size, modified=modified, checksum=None)
+        destination = os.path.join(tempfile.mkdtemp(dir=self.temp_dir), name)
+        file_cache.fetch(name, stat, download, destination)
+        return destination
+
+    def test_fetch(self):
+        with self.settings(FILE_CACHE_DIR=self.cache_dir, FILE_CACHE_SIZE=25):
+            first = self._fetch('a.nc')
+            # callers get their own copy, which they may change
+            with open(first, 'a') as f:
+                f.write('changed')
+            second = self._fetch('a.nc')
+            self.assertNotEqual(first, second)
+            self.assertEqual(open(second).read(), 'x' * 10)
+            self.assertEqual(self.downloads, ['a.nc'])
+
+            # a new version of the file is transferred again
+            self._fetch('a.nc', modified=datetime(2017, 1, 2))
+            self.assertEqual(self.downloads, ['a.nc', 'a.nc'])
+
+            # the least recently used version is evicted to stay within 25 bytes
+            self._fetch('b.nc')
+            stats = file_cache.stats()
+            self.assertEqual(stats['entries'], 2)
+            self.assertEqual(stats['bytes'], 20)
+            self._fetch('a.nc')
+            self.assertEqual(self.downloads, ['a.nc', 'a.nc', 'b.nc', 'a.nc'])
+
+            # files larger than the cache are not cached
+            self._fetch('c.nc', size=30)
+            self.assertEqual(file_cache.stats()['bytes'], 20)
+
+    def test_entries_in_use_are_not_evicted(self):
+        with self.settings(FILE_CACHE_DIR=self.cache_dir, FILE_CACHE_SIZE=15):
+            self._fetch('a.nc')
+            key = os.listdir(self.cache_dir)[0].split('.')[0]
+            with file_cache._entry_in_use(key):
+                # a.nc is older, but b.nc is the entry that can be evicted
+                self._fetch('b.nc')
+                self.assertTrue(os.path.isdir(os.path.join(self.cache_dir, key)))
+                self.assertEqual(file_cache.stats()['entries'], 1)
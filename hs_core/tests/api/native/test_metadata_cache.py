@@ -0,0 +1,123 @@
+from django.contrib.auth.models import Group
+from django.db import connection
+from django.test import TestCase, RequestFactory
+from django.test.utils import CaptureQueriesContext
+from mock import patch
+
+from hs_core.hydroshare import resource
+from hs_core.hydroshare import users
+from hs_core.models import AbstractResource
+from hs_core.page_processors import get_page_context
+from hs_core.search_indexes import BaseResourceIndex
+from hs_core.testing import MockIRODSTestCaseMixin, ViewTestCase
+
+
+class TestMetadataCache(MockIRODSTestCaseMixin, TestCase):
+    def setUp(self):
+        super(TestMetadataCache, self).setUp()
+        self.group, _ = Group.objects.get_or_create(name='Hydroshare Author')
+        self.user = users.create_account(
+            'test_user@email.com',
+            username='testuser',
+            first_name='some_first_name',
+            last_name='some_last_name',
+            superuser=False,
+            groups=[])
+        self.res = resource.create_resource(
+            'GenericResource',
+            self.user,
+            'My Test Resource'
+            )
+
+    def _uncached_get_metadata(self):
+        # behaves like the metadata accessor did before memoization: every access re-fetches
+        original = AbstractResource._get_metadata
+
+        def _get_metadata(res, md):
+            res.refresh_metadata()
+            return original(res, md)
+        return patch.object(AbstractResource, '_get_metadata', _get_metadata)
+
+    def _count_queries(self, func):
+        res = resource.get_resource_by_shortkey(self.res.short_id)
+        with CaptureQueriesContext(connection) as ctx:
+            func(res)
+        return len(ctx.captured_queries)
+
+    def test_metadata_fetched_once_per_instance(self):
+        res = resource.get_resource_by_shortkey(self.res.short_id)
+        md = res.metadata
+        with CaptureQueriesContext(connection) as ctx:
+            for _ in range(10):
+                self.assertEqual(res.metadata, md)
+        self.assertEqual(len(ctx.captured_queries), 0)
+
+    def test_metadata_cache_invalidated_by_element_changes(self):
+        res = resource.get_resource_by_shortkey(self.res.short_id)
+        res.metadata.create_element('subject', value='sub-1')
+        self.assertEqual(res.metadata.subjects.count(), 1)
+
+        # an element change made through another instance is seen by this one
+        other = resource.get_resource_by_shortkey(self.res.short_id)
+        title = other.metadata.title
+        other.metadata.update_element('title', title.id, value='New Title')
+        self.assertEqual(res.metadata.title.value, 'New Title')
+
+    def test_page_context_query_count(self):
+        request = RequestFactory().get('/')
+        request.user = self.user
+        ViewTestCase.add_session_to_request(request)
+
+        def page_context(res):
+            get_page_context(res, self.user, request=request)
+
+        cached = self._count_queries(page_context)
+        with self._uncached_get_metadata():
+            uncached = self._count_queries(page_context)
+        self.assertLess(cached, uncached)
+
+    def test_full_prepare_query_count(self):
+        index = BaseResourceIndex()
+
+        cached = self._count_queries(index.full_prepare)
+        with self._uncached_get_metadata():
+            uncached = self._count_queries(index.full_prepare)
+        self.assertLess(cached, uncached)
+
+    def test_metadata_xml_cached_until_metadata_changes(self):
+        xml = self.res.get_metadata_xml()
+        res = resource.get_resource_by_shortkey(self.res.short_id)
+        md = res.metadata
+        with CaptureQueriesContext(connection) as ctx:
+            self.assertEqual(res.get_metadata_xml(), xml)
+        # only the metadata version is read
+        self.assertEqual(len(ctx.captured_queries), 1)
+        self.assertEqual(res.metadata, md)
+
+        # element changes are reflected
+        self.res.metadata.create_element('subject', value='cached-subject')
+        res = resource.get_resource_by_shortkey(self.res.short_id)
+        xml = res.get_metadata_xml()
+        self.assertIn('cached-subject', xml)
+        title = res.metadata.title
+        res.metadata.update_element('title', title.id, value='Cached Title')
+        self.assertIn('Cached Title', res.get_metadata_xml())
+
+        # as are changes to extended metadata, which is stored on the resource
+        res.extra_metadata = {'cached-key': 'cached-value'}
+        res.save()
+        self.assertIn('cached-value', res.get_metadata_xml())
+        self.assertEqual(res.get_metadata_xml(pretty_print=False),
+                         res.metadata.get_xml(pretty_print=False))
+
+    def test_metadata_xml_after_stale_metadata_save(self):
+        stale = resource.get_resource_by_shortkey(self.res.short_id).metadata
+        self.res.metadata.create_element('subject', value='first-subject')
+        self.assertIn('first-subject', self.res.get_metadata_xml())
+        self.res.metadata.create_element('subject', value='second-subject')
+
+        # saving a metadata instance loaded before both changes does not bring back
+        # the rendering cached after the first one
+        stale.save()
+        res = resource.get_resource_by_shortkey(self.res.short_id)
+        self.assertIn('second-subject', res.get_metadata_xml())
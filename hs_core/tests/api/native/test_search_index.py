@@ -0,0 +1,98 @@
+from django.contrib.auth.models import Group
+from django.db import connection
+from django.test import TestCase
+from django.test.utils import CaptureQueriesContext
+
+from hs_core.discovery_form import DiscoveryForm
+from hs_core.hydroshare import resource
+from hs_core.hydroshare import users
+from hs_core.search_indexes import BaseResourceIndex, COVERAGE_DAY_MAX
+from hs_core.testing import MockIRODSTestCaseMixin
+
+
+class TestSearchIndex(MockIRODSTestCaseMixin, TestCase):
+    def setUp(self):
+        super(TestSearchIndex, self).setUp()
+        self.group, _ = Group.objects.get_or_create(name='Hydroshare Author')
+        self.user = users.create_account(
+            'test_user@email.com',
+            username='testuser',
+            first_name='some_first_name',
+            last_name='some_last_name',
+            superuser=False,
+            groups=[])
+        self.res = resource.create_resource(
+            'GenericResource',
+            self.user,
+            'My Test Resource'
+            )
+        self.index = BaseResourceIndex()
+
+    def _prepare(self):
+        res = resource.get_resource_by_shortkey(self.res.short_id)
+        with CaptureQueriesContext(connection) as ctx:
+            document = self.index.full_prepare(res)
+        return document, len(ctx.captured_queries)
+
+    def _add_elements(self, count, offset=0):
+        for i in range(offset, offset + count):
+            self.res.metadata.create_element('subject', value='subject-{}'.format(i))
+            self.res.metadata.create_element('creator', name='Creator{} Person'.format(i),
+                                             email='creator{}@example.com'.format(i))
+            self.res.metadata.create_element('contributor', name='Contributor{} Person'
+                                             .format(i))
+
+    def test_document_fields(self):
+        self._add_elements(2)
+        self.res.metadata.create_element('relation', type='isReplacedBy', value='another')
+        document, _ = self._prepare()
+        self.assertEqual(document['title'], 'My Test Resource')
+        self.assertEqual(sorted(document['subject']), ['subject-0', 'subject-1'])
+        self.assertIn('creator0@example.com', document['creator_email'])
+        self.assertTrue(document['replaced'])
+        self.assertEqual(document['owners_count'], 1)
+        self.assertEqual(document['owner_login'], ['testuser'])
+
+        # a field prepared on its own reads the same values
+        res = resource.get_resource_by_shortkey(self.res.short_id)
+        self.assertEqual(self.index.prepare_subject(res), document['subject'])
+        self.assertFalse(hasattr(res, 'index_snapshot'))
+
+    def test_coverage_fields(self):
+        self.res.metadata.create_element('coverage', type='point',
+                                         value={'east': 5, 'north': 15,
+                                                'units': 'Decimal degrees'})
+        self.res.metadata.create_element('coverage', type='box',
+                                         value={'northlimit': 40, 'eastlimit': -110,
+                                                'southlimit': 30, 'westlimit': -120,
+                                                'units': 'Decimal degrees'})
+        self.res.metadata.create_element('coverage', type='period',
+                                         value={'start': '1/1/2000', 'end': '12/31/2000'})
+        document, _ = self._prepare()
+        self.assertEqual(sorted(document['coverage_geometry']),
+                         ['-120.0 30.0 -110.0 40.0', '15.0,5.0'])
+        self.assertEqual(document['coverage_period'], ['730120 730485'])
+
+    def test_coverage_filters(self):
+        form = DiscoveryForm({'NElat': '40', 'NElng': '-170', 'SWlat': '30', 'SWlng': '170',
+                              'start_date': '2000-01-01'})
+        self.assertTrue(form.is_valid())
+        narrow_queries = form.search().query.narrow_queries
+        # the box crosses the dateline
+        self.assertIn('coverage_geometry:"Intersects(170.0 30.0 -170.0 40.0)"', narrow_queries)
+        self.assertIn('coverage_period:"Intersects(0 730120 {} {})"'
+                      .format(COVERAGE_DAY_MAX, COVERAGE_DAY_MAX), narrow_queries)
+
+        form = DiscoveryForm({'NElat': '40', 'SWlat': '30'})
+        self.assertTrue(form.is_valid())
+        self.assertEqual(form.coverage_bbox(), (-180.0, 30.0, 180.0, 40.0))
+
+    def test_prepare_query_count(self):
+        self._add_elements(2)
+        _, few_queries = self._prepare()
+        self._add_elements(50, offset=2)
+        document, many_queries = self._prepare()
+
+        self.assertEqual(len(document['subject']), 52)
+        # the number of queries does not grow with the number of metadata elements
+        self.assertEqual(few_queries, many_queries)
@@ -0,0 +1,91 @@
+from django.contrib.auth.models import Group
+from django.test import TestCase
+from mock import patch, MagicMock
+
+from hs_core.hydroshare import resource
+from hs_core.hydroshare import users
+from hs_core.models import SolrIndexQueue
+from hs_core.tasks import process_solr_index_queue
+from hs_core.testing import MockIRODSTestCaseMixin
+
+
+class TestSolrIndexQueue(MockIRODSTestCaseMixin, TestCase):
+    def setUp(self):
+        super(TestSolrIndexQueue, self).setUp()
+        self.group, _ = Group.objects.get_or_create(name='Hydroshare Author')
+        self.user = users.create_account(
+            'test_user@email.com',
+            username='testuser',
+            first_name='some_first_name',
+            last_name='some_last_name',
+            superuser=False,
+            groups=[])
+        self.res = resource.create_resource(
+            'GenericResource',
+            self.user,
+            'My Test Resource'
+            )
+        SolrIndexQueue.objects.all().delete()
+
+        # hold queued resources instead of processing them immediately
+        self.scheduler = patch.object(process_solr_index_queue, 'apply_async')
+        self.apply_async = self.scheduler.start()
+        self.backend = MagicMock()
+        self.connections = patch('hs_core.tasks.connections')
+        self.connections.start().__getitem__.return_value.get_backend.return_value = \
+            self.backend
+
+    def tearDown(self):
+        self.scheduler.stop()
+        self.connections.stop()
+        super(TestSolrIndexQueue, self).tearDown()
+
+    def test_saves_are_coalesced(self):
+        for i in range(5):
+            self.res.metadata.create_element('subject', value='sub-{}'.format(i))
+            self.res.save()
+        self.res.raccess.discoverable = True
+        self.res.raccess.save()
+
+        self.assertEqual(SolrIndexQueue.stats()['depth'], 1)
+        self.assertEqual(self.apply_async.call_count, 1)
+
+        self.assertEqual(process_solr_index_queue(), 1)
+        self.assertEqual(self.backend.update.call_count, 1)
+        self.assertEqual([r.short_id for r in self.backend.update.call_args[0][1]],
+                         [self.res.short_id])
+        self.assertFalse(self.backend.remove.called)
+        self.assertEqual(SolrIndexQueue.stats(), {'depth': 0, 'lag': 0.0})
+
+    def test_private_and_deleted_resources_are_removed(self):
+        self.res.save()
+        other = resource.create_resource('GenericResource', self.user, 'Other')
+        other_id = other.id
+        resource.delete_resource(other.short_id)
+        self.assertEqual(SolrIndexQueue.stats()['depth'], 2)
+
+        self.assertEqual(process_solr_index_queue(), 2)
+        self.assertFalse(self.backend.update.called)
+        removed = sorted(c[0][0] for c in self.backend.remove.call_args_list)
+        self.assertEqual(removed, sorted(['hs_core.baseresource.{}'.format(self.res.id),
+                                          'hs_core.baseresource.{}'.format(other_id)]))
+
+    def test_failed_sends_stay_queued(self):
+        self.res.raccess.discoverable = True
+        self.res.raccess.save()
+        self.backend.silently_fail = True
+
+        def fail(*args):
+            # haystack is made to raise rather than log the failure
+            self.assertFalse(self.backend.silently_fail)
+            raise IOError('Solr is down')
+        self.backend.update.side_effect = fail
+
+        with self.assertRaises(IOError):
+            process_solr_index_queue()
+        self.assertEqual(SolrIndexQueue.stats()['depth'], 1)
+        self.assertTrue(self.backend.silently_fail)
+
+        self.backend.update.side_effect = None
+        self.assertEqual(process_solr_index_queue(), 1)
+        self.assertEqual(SolrIndexQueue.stats()['depth'], 0)
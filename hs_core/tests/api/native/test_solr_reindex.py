@@ -0,0 +1,101 @@
+import os
+import shutil
+import tempfile
+
+from django.contrib.auth.models import Group
+from django.core.management import call_command
+from django.test import TestCase
+from mock import patch, MagicMock
+
+from hs_core.hydroshare import resource
+from hs_core.hydroshare import users
+from hs_core.management.commands.solr_reindex import read_checkpoint
+from hs_core.testing import MockIRODSTestCaseMixin
+
+
+class InlinePool(object):
+    """Stand-in for multiprocessing.Pool that runs everything in this process."""
+
+    def __init__(self, processes):
+        pass
+
+    def apply(self, func):
+        return func()
+
+    def imap(self, func, iterable):
+        return (func(item) for item in iterable)
+
+    def terminate(self):
+        pass
+
+    def close(self):
+        pass
+
+    def join(self):
+        pass
+
+
+class TestSolrReindex(MockIRODSTestCaseMixin, TestCase):
+    def setUp(self):
+        super(TestSolrReindex, self).setUp()
+        self.group, _ = Group.objects.get_or_create(name='Hydroshare Author')
+        self.user = users.create_account(
+            'test_user@email.com',
+            username='testuser',
+            first_name='some_first_name',
+            last_name='some_last_name',
+            superuser=False,
+            groups=[])
+        self.resources = []
+        for i in range(4):
+            res = resource.create_resource('GenericResource', self.user,
+                                           'Resource {}'.format(i))
+            res.raccess.discoverable = True
+            res.raccess.save()
+            self.resources.append(res)
+        self.resources.sort(key=lambda r: r.id)
+
+        self.temp_dir = tempfile.mkdtemp()
+        self.checkpoint = os.path.join(self.temp_dir, 'solr_reindex.checkpoint')
+        self.backend = MagicMock()
+        self.backend.silently_fail = True
+        command = 'hs_core.management.commands.solr_reindex.'
+        for patcher in (patch(command + 'Pool', InlinePool),
+                        patch(command + 'db_connections'),
+                        patch(command + '_backends',
+                              side_effect=lambda: iter([(self.backend, MagicMock())]))):
+            patcher.start()
+            self.addCleanup(patcher.stop)
+
+    def tearDown(self):
+        shutil.rmtree(self.temp_dir)
+        super(TestSolrReindex, self).tearDown()
+
+    def _reindex(self, **options):
+        call_command('solr_reindex', workers=1, batch_size=1, commit_every=1,
+                     checkpoint=self.checkpoint, **options)
+
+    def _indexed_ids(self):
+        return [res.id for call in self.backend.update.call_args_list for res in call[0][1]]
+
+    def test_failed_batch_stops_before_checkpoint(self):
+        failing_id = self.resources[2].id
+
+        def update(index, resources, commit=True):
+            # haystack is made to raise rather than log the failure
+            self.assertFalse(self.backend.silently_fail)
+            if resources[0].id == failing_id:
+                raise IOError('Solr is down')
+        self.backend.update.side_effect = update
+
+        with self.assertRaises(IOError):
+            self._reindex()
+        self.assertTrue(self.backend.silently_fail)
+        # the checkpoint is the last batch committed before the failure
+        self.assertEqual(read_checkpoint(self.checkpoint), self.resources[1].id)
+
+        self.backend.update.reset_mock()
+        self.backend.update.side_effect = None
+        self._reindex(resume=True)
+        self.assertEqual(self._indexed_ids(), [r.id for r in self.resources[2:]])
+        self.assertFalse(os.path.exists(self.checkpoint))
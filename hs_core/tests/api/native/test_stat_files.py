@@ -0,0 +1,119 @@
+import os
+
+from django.contrib.auth.models import Group
+from django.test import TestCase
+from mock import patch
+
+from hs_core.hydroshare import resource
+from hs_core.hydroshare import users
+from hs_core.models import BaseResource, ResourceFile
+from hs_core.testing import MockIRODSTestCaseMixin, StandInIrodsStorage
+from hs_core.views.resource_rest_api import ResourceFileToListItemMixin
+
+
+class TestStatFiles(MockIRODSTestCaseMixin, TestCase):
+    def setUp(self):
+        super(TestStatFiles, self).setUp()
+        self.group, _ = Group.objects.get_or_create(name='Hydroshare Author')
+        self.user = users.create_account(
+            'test_user@email.com',
+            username='testuser',
+            first_name='some_first_name',
+            last_name='some_last_name',
+            superuser=False,
+            groups=[])
+        self.res = resource.create_resource(
+            'GenericResource',
+            self.user,
+            'My Test Resource'
+            )
+
+        self.storage = StandInIrodsStorage()
+        self.patcher = patch.object(BaseResource, 'get_irods_storage',
+                                    return_value=self.storage)
+        self.patcher.start()
+
+        # register file records without uploading anything
+        self.file_sizes = {}
+        for i in range(20):
+            name = os.path.join(self.res.file_path, 'folder{}'.format(i % 3),
+                                'file|{}.txt'.format(i))
+            ResourceFile.objects.create(content_object=self.res, resource_file=name)
+            self.storage.add_file(name, size=i * 10, modified=1500000000 + i,
+                                  checksum='sha2:{}'.format(i))
+            self.file_sizes[name] = i * 10
+        # metadata files are in the resource collection but are not resource files
+        self.storage.add_file(self.res.scimeta_path, size=99999)
+
+    def tearDown(self):
+        self.patcher.stop()
+        super(TestStatFiles, self).tearDown()
+
+    def test_stat_files(self):
+        stats = self.res.stat_files()
+        self.assertEqual(len(self.storage.session.commands), 1)
+        self.assertEqual(len(stats), 21)
+
+        name = os.path.join(self.res.file_path, 'folder1', 'file|4.txt')
+        stat = stats[self.res.irods_full_path(name)]
+        self.assertEqual(stat.size, 40)
+        self.assertEqual(stat.checksum, 'sha2:4')
+        self.assertEqual(stat.modified.year, 2017)
+
+        # empty collection
+        self.assertEqual(self.res.stat_files(os.path.join(self.res.file_path, 'none')), {})
+
+    def test_resource_size_single_round_trip(self):
+        self.assertEqual(self.res.size, sum(self.file_sizes.values()))
+        self.assertEqual(len(self.storage.session.commands), 1)
+
+    def test_file_list_items(self):
+        mixin = ResourceFileToListItemMixin()
+        self.res.record_missing_file_system_metadata()
+        for f in self.res.files.all():
+            item = mixin.resourceFileToListItem(f)
+            self.assertEqual(item.size, self.file_sizes[f.storage_path])
+        self.assertEqual(len(self.storage.session.commands), 1)
+
+    def test_recorded_file_system_metadata(self):
+        self.assertEqual(self.res.files.filter(_size__lt=0).count(), 20)
+        total = self.res.size
+        self.assertEqual(self.res.files.filter(_size__lt=0).count(), 0)
+
+        # once recorded, sizes are a database aggregate that does not touch iRODS
+        self.assertEqual(self.res.size, total)
+        self.assertEqual(len(self.storage.session.commands), 1)
+
+        f = self.res.files.first()
+        self.assertEqual(f.checksum, self.storage.catalog[
+            self.res.irods_full_path(f.storage_path)][2])
+
+    def test_single_file_stat(self):
+        f = self.res.files.first()
+        f.set_system_metadata()
+        self.assertEqual(f.size, self.file_sizes[f.storage_path])
+        self.assertEqual(len(self.storage.session.commands), 1)
+
+    def test_reconcile_drift(self):
+        self.res.record_missing_file_system_metadata()
+        self.assertEqual(self.res.sync_file_system_metadata(), 0)
+
+        f = self.res.files.first()
+        self.storage.add_file(f.storage_path, size=12345, modified=1600000000,
+                              checksum='sha2:changed')
+        self.assertEqual(self.res.sync_file_system_metadata(), 1)
+        f = ResourceFile.objects.get(id=f.id)
+        self.assertEqual(f.size, 12345)
+        self.assertEqual(f.checksum, 'sha2:changed')
+
+    def test_names_with_quotes_and_wildcards(self):
+        name = os.path.join(self.res.file_path, "O'Brien_1", "O'Brien.csv")
+        self.storage.add_file(name, size=7)
+        # a sibling folder that the '_' in O'Brien_1 would match as a wildcard
+        self.storage.add_file(os.path.join(self.res.file_path, "O'BrienX1", 'other.csv'), size=8)
+        f = ResourceFile.objects.create(content_object=self.res, resource_file=name)
+        f.set_system_metadata()
+        self.assertEqual(f.size, 7)
+
+        stats = self.res.stat_files(os.path.join(self.res.file_path, "O'Brien_1"))
+        self.assertEqual(stats.keys(), [self.res.irods_full_path(name)])
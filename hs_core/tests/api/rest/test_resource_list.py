@@ -1,6 +1,8 @@
 import json
 import os
 
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
 from rest_framework import status
 
 from hs_core.hydroshare import resource
@@ -410,3 +412,49 @@ class TestResourceList(HSRESTTestCase):
         self.assertEqual(response.status_code, status.HTTP_200_OK)
         content = json.loads(response.content)
         self.assertEqual(content['count'], 3)
+
+    def test_resource_list_start_count(self):
+        for i in range(3):
+            res = resource.create_resource('GenericResource', self.user, 'Resource {}'.format(i))
+            self.resources_to_delete.append(res.short_id)
+
+        response = self.client.get('/hsapi/resource/', {'count': 2}, format='json')
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        content = json.loads(response.content)
+        self.assertEqual(content['count'], 2)
+
+        response = self.client.get('/hsapi/resource/', {'start': 1, 'count': 5}, format='json')
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        content = json.loads(response.content)
+        self.assertEqual(content['count'], 2)
+
+        # starting past the end is an empty list
+        response = self.client.get('/hsapi/resource/', {'start': 3}, format='json')
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        content = json.loads(response.content)
+        self.assertEqual(content['count'], 0)
+
+    def test_resource_list_query_count(self):
+        def list_queries():
+            with CaptureQueriesContext(connection) as ctx:
+                response = self.client.get('/hsapi/resource/', format='json')
+            self.assertEqual(response.status_code, status.HTTP_200_OK)
+            return len(ctx.captured_queries), json.loads(response.content)
+
+        for i in range(2):
+            res = resource.create_resource('GenericResource', self.user, 'Resource {}'.format(i))
+            self.resources_to_delete.append(res.short_id)
+        two_queries, content = list_queries()
+        self.assertEqual(content['count'], 2)
+        self.assertEqual(sorted(r['resource_title'] for r in content['results']),
+                         ['Resource 0', 'Resource 1'])
+        self.assertEqual(content['results'][0]['creator'], self.user.get_full_name())
+
+        for i in range(2, 6):
+            res = resource.create_resource('GenericResource', self.user, 'Resource {}'.format(i))
+            self.resources_to_delete.append(res.short_id)
+        six_queries, content = list_queries()
+        self.assertEqual(content['count'], 6)
+
+        # the number of queries does not depend on the number of resources listed
+        self.assertEqual(two_queries, six_queries)
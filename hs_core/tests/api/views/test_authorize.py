@@ -843,6 +843,43 @@ class TestAuthorize(MockIRODSTestCaseMixin, TestCase):
         self.assertEquals(res, self.res)
         self.assertEquals(user, anonymous_user)
 
+    def test_privilege_cache(self):
+        # create user - has no assigned resource access privilege
+        authenticated_user = users.create_account(
+            'user@email.com',
+            username='user',
+            first_name='user_first_name',
+            last_name='user_last_name',
+            superuser=False,
+            groups=[])
+
+        self.request.user = authenticated_user
+        cache = authenticated_user.uaccess.privilege_cache
+        for _ in range(5):
+            _, authorized, _ = authorize(self.request, res_id=self.res.short_id,
+                                         needed_permission=ACTION_TO_AUTHORIZE.VIEW_RESOURCE,
+                                         raises_exception=False)
+            self.assertFalse(authorized)
+        self.assertEqual(cache.misses, 1)
+        self.assertEqual(cache.hits, 4)
+
+        # sharing mid-request invalidates cached privilege
+        self.user.uaccess.share_resource_with_user(self.res, authenticated_user,
+                                                   PrivilegeCodes.CHANGE)
+        authorize(self.request, res_id=self.res.short_id,
+                  needed_permission=ACTION_TO_AUTHORIZE.EDIT_RESOURCE)
+        self.assertEqual(cache.misses, 2)
+        self.assertTrue(authenticated_user.uaccess.can_view_resource(self.res))
+        self.assertEqual(cache.hits, 5)
+
+        # as does changing resource flags
+        self.res.raccess.immutable = True
+        self.res.raccess.save()
+        with self.assertRaises(PermissionDenied):
+            authorize(self.request, res_id=self.res.short_id,
+                      needed_permission=ACTION_TO_AUTHORIZE.EDIT_RESOURCE)
+        self.assertEqual(cache.misses, 3)
+
     def _run_tests(self, request, parameters):
         for params in parameters:
             if params['exception'] is None:
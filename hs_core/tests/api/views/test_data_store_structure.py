@@ -0,0 +1,88 @@
+import json
+import os
+
+from django.contrib.auth.models import Group
+from django.contrib.contenttypes.models import ContentType
+from django.db import connection
+from django.test import TestCase, RequestFactory
+from django.test.utils import CaptureQueriesContext
+from mock import patch
+
+from rest_framework import status
+
+from hs_core import hydroshare
+from hs_core.models import BaseResource, ResourceFile
+from hs_core.testing import MockIRODSTestCaseMixin, StandInIrodsStorage
+from hs_core.views.resource_folder_hierarchy import data_store_structure
+
+
+class TestDataStoreStructure(MockIRODSTestCaseMixin, TestCase):
+
+    def setUp(self):
+        super(TestDataStoreStructure, self).setUp()
+        self.group, _ = Group.objects.get_or_create(name='Hydroshare Author')
+        self.user = hydroshare.create_account(
+            'test_user@email.com',
+            username='testuser',
+            first_name='some_first_name',
+            last_name='some_last_name',
+            superuser=False,
+            groups=[])
+        self.res = hydroshare.create_resource(
+            'GenericResource',
+            self.user,
+            'My Test Resource'
+            )
+        self.storage = StandInIrodsStorage()
+        self.patcher = patch.object(BaseResource, 'get_irods_storage',
+                                    return_value=self.storage)
+        self.patcher.start()
+        self.factory = RequestFactory()
+
+    def tearDown(self):
+        self.patcher.stop()
+        super(TestDataStoreStructure, self).tearDown()
+
+    def _add_synthetic_files(self, folder, count):
+        # register file records and stand-in iRODS objects without uploading anything
+        content_type = ContentType.objects.get_for_model(self.res)
+        res_files = []
+        for i in range(count):
+            name = os.path.join(self.res.file_path, folder, 'file{}.txt'.format(i))
+            self.storage.add_file(name, size=i)
+            res_files.append(ResourceFile(object_id=self.res.id, content_type=content_type,
+                                          file_folder=folder, resource_file=name))
+        ResourceFile.objects.bulk_create(res_files)
+
+    def _list_folder(self, folder):
+        request = self.factory.post('/hsapi/_internal/data-store-structure/',
+                                    data={'res_id': self.res.short_id,
+                                          'store_path': os.path.join('data/contents', folder)})
+        request.user = self.user
+        del self.storage.session.commands[:]
+        with CaptureQueriesContext(connection) as ctx:
+            response = data_store_structure(request)
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        return json.loads(response.content), len(ctx.captured_queries)
+
+    def test_folder_listing(self):
+        self._add_synthetic_files('small', 3)
+        listing, _ = self._list_folder('small')
+        self.assertEqual(len(listing['files']), 3)
+        sizes = sorted(f['size'] for f in listing['files'])
+        self.assertEqual(sizes, [0, 1, 2])
+
+    def test_folder_listing_query_count(self):
+        self._add_synthetic_files('small', 50)
+        self._add_synthetic_files('large', 5000)
+        # record file sizes once, as is done when files are created
+        self.res.record_missing_file_system_metadata()
+
+        small, small_queries = self._list_folder('small')
+        large, large_queries = self._list_folder('large')
+
+        self.assertEqual(len(small['files']), 50)
+        self.assertEqual(len(large['files']), 5000)
+        # the number of queries and of iRODS round trips does not grow with the file count
+        self.assertEqual(small_queries, large_queries)
+        self.assertEqual(len(self.storage.session.commands), 1)
@@ -0,0 +1,41 @@
+import json
+from unittest import TestCase
+
+from hs_core.views.discovery_json_view import cluster_map_items, map_item, stream_json_array
+
+
+def _solr(short_id, coverage):
+    return {'short_id': short_id, 'title': 'title ' + short_id, 'resource_type': 'Generic',
+            'absolute_url': '/resource/{}/'.format(short_id), 'author': 'Doe, John',
+            'author_url': None, 'coverage': [json.dumps(coverage)]}
+
+
+class TestDiscoveryJson(TestCase):
+
+    def test_map_items_are_encoded_once(self):
+        items = [map_item(_solr('a', {'east': 10, 'north': 20})),
+                 map_item(_solr('b', {'northlimit': 40, 'southlimit': 30,
+                                      'eastlimit': -110, 'westlimit': -120}))]
+        data = json.loads(''.join(stream_json_array(items)))
+        self.assertEqual(data[0]['coverage_type'], 'point')
+        self.assertEqual(data[0]['east'], 10)
+        self.assertEqual(data[1]['coverage_type'], 'box')
+        self.assertNotIn('first_author_url', data[1])
+        self.assertEqual(json.loads(''.join(stream_json_array([]))), [])
+
+    def test_clustering(self):
+        items = [map_item(_solr(str(i), {'east': 10 + i * 0.01, 'north': 20}))
+                 for i in range(5)]
+        items.append(map_item(_solr('far', {'east': -100, 'north': -40})))
+        items.append(map_item(_solr('none', {'start': '2000-01-01'})))
+
+        clustered = list(cluster_map_items(items, 4))
+        self.assertEqual(len(clustered), 3)
+        cluster = [i for i in clustered if i.get('coverage_type') == 'cluster'][0]
+        self.assertEqual(cluster['count'], 5)
+        self.assertAlmostEqual(cluster['east'], 10.02)
+        self.assertIn('far', [i.get('short_id') for i in clustered])
+        self.assertIn('none', [i.get('short_id') for i in clustered])
+
+        # at a high zoom level every point is its own cell
+        self.assertEqual(len(list(cluster_map_items(items, 20))), 7)
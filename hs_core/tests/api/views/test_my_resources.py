@@ -0,0 +1,97 @@
+from django.contrib.auth.models import Group
+from django.db import connection
+from django.test import TestCase, RequestFactory
+from django.test.utils import CaptureQueriesContext
+
+from hs_core import hydroshare
+from hs_core.testing import MockIRODSTestCaseMixin
+from hs_core.views.utils import get_my_resources_list
+from hs_access_control.models import PrivilegeCodes
+
+
+class TestMyResources(MockIRODSTestCaseMixin, TestCase):
+    def setUp(self):
+        super(TestMyResources, self).setUp()
+        self.group, _ = Group.objects.get_or_create(name='Hydroshare Author')
+
+        self.owner = hydroshare.create_account(
+            'john@gmail.com',
+            username='john',
+            first_name='John',
+            last_name='Clarson',
+            superuser=False,
+            groups=[]
+        )
+
+        self.user = hydroshare.create_account(
+            'lisa@gmail.com',
+            username='lisaZ',
+            first_name='Lisa',
+            last_name='Ziggler',
+            superuser=False,
+            groups=[]
+        )
+
+        self.request = RequestFactory().get('/my-resources/')
+        self.request.user = self.user
+
+    def _create_resource(self, title):
+        return hydroshare.create_resource('GenericResource', self.owner, title)
+
+    def test_resource_flags(self):
+        owned = hydroshare.create_resource('GenericResource', self.user, 'Owned')
+        editable = self._create_resource('Editable')
+        viewable = self._create_resource('Viewable')
+        discovered = self._create_resource('Discovered')
+        self._create_resource('Not Listed')
+
+        group = self.owner.uaccess.create_group('Group', 'A group')
+        self.owner.uaccess.share_group_with_user(group, self.user, PrivilegeCodes.VIEW)
+        self.owner.uaccess.share_resource_with_group(editable, group, PrivilegeCodes.CHANGE)
+        self.owner.uaccess.share_resource_with_user(viewable, self.user, PrivilegeCodes.VIEW)
+        self.user.ulabels.claim_resource(discovered)
+        self.user.ulabels.favorite_resource(viewable)
+        self.user.ulabels.label_resource(owned, 'b-label')
+        self.user.ulabels.label_resource(owned, 'a-label')
+
+        resources = {res.short_id: res for res in get_my_resources_list(self.request)}
+        self.assertEqual(set(resources),
+                         set(r.short_id for r in (owned, editable, viewable, discovered)))
+
+        res = resources[owned.short_id]
+        self.assertTrue(res.owned)
+        self.assertFalse(res.is_favorite)
+        self.assertEqual(res.labels, ['a-label', 'b-label'])
+        self.assertTrue(resources[editable.short_id].editable)
+        self.assertTrue(resources[viewable.short_id].viewable)
+        self.assertTrue(resources[viewable.short_id].is_favorite)
+        self.assertTrue(resources[discovered.short_id].discovered)
+        self.assertFalse(resources[discovered.short_id].viewable)
+
+        # obsoleted resources are not listed
+        owned.metadata.create_element('relation', type='isReplacedBy', value='new version')
+        resources = get_my_resources_list(self.request)
+        self.assertNotIn(owned.short_id, [r.short_id for r in resources])
+
+    def test_query_count(self):
+        def count_queries(**kwargs):
+            with CaptureQueriesContext(connection) as ctx:
+                resources = get_my_resources_list(self.request, **kwargs)
+            return len(resources), len(ctx.captured_queries)
+
+        for i in range(3):
+            res = self._create_resource('Resource {}'.format(i))
+            self.owner.uaccess.share_resource_with_user(res, self.user, PrivilegeCodes.VIEW)
+            self.user.ulabels.label_resource(res, 'label')
+        few = count_queries()
+        self.assertEqual(few[0], 3)
+
+        for i in range(10):
+            res = self._create_resource('More {}'.format(i))
+            self.owner.uaccess.share_resource_with_user(res, self.user, PrivilegeCodes.CHANGE)
+            self.user.ulabels.favorite_resource(res)
+        many = count_queries()
+        self.assertEqual(many[0], 13)
+        self.assertEqual(few[1], many[1])
+
+        self.assertEqual(count_queries(start=5, count=5), (5, many[1]))
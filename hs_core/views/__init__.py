@@ -29,6 +29,7 @@ from rest_framework.decorators import api_view
 from mezzanine.conf import settings
 from mezzanine.pages.page_processors import processor_for
 from mezzanine.utils.email import subject_template, send_mail_template
+from mezzanine.utils.views import paginate
 
 import autocomplete_light
 from inplaceeditform.commons import get_dict_from_obj, apply_filters
@@ -38,7 +39,8 @@ from django_irods.icommands import SessionException
 from hs_core import hydroshare
 from hs_core.hydroshare.utils import get_resource_by_shortkey, resource_modified, resolve_request
 from .utils import authorize, upload_from_irods, ACTION_TO_AUTHORIZE, run_script_to_update_hyrax_input_files, \
-    get_my_resources_list, send_action_to_take_email, get_coverage_data_dict
+    get_my_resources_queryset, annotate_my_resources, send_action_to_take_email, \
+    get_coverage_data_dict
 from hs_core.models import GenericResource, resource_processor, CoreMetaData, Subject
 from hs_core.hydroshare.resource import METADATA_STATUS_SUFFICIENT, METADATA_STATUS_INSUFFICIENT
 
@@ -612,6 +614,11 @@ def rep_res_bag_to_irods_user_zone(request, shortkey, *args, **kwargs):
             json.dumps({"error": ex.message}),
             content_type="application/json"
         )
+    except ValidationError as ex:
+        return HttpResponse(
+            json.dumps({"error": ex.message}),
+            content_type="application/json"
+        )
 
 def copy_resource(request, shortkey, *args, **kwargs):
     res, authorized, user = authorize(request, shortkey,
@@ -1069,8 +1076,14 @@ class GroupUpdateForm(GroupForm):
 @login_required
 def my_resources(request, page):
 
-    resource_collection = get_my_resources_list(request)
-    context = {'collection': resource_collection}
+    # count and slice in the database, and annotate only the resources shown
+    collection_page = paginate(get_my_resources_queryset(request.user),
+                               request.GET.get("page", 1),
+                               getattr(settings, 'MY_RESOURCES_PAGE_SIZE', 500),
+                               settings.MAX_PAGING_LINKS)
+    resource_collection = annotate_my_resources(request.user,
+                                                list(collection_page.object_list))
+    context = {'collection': resource_collection, 'collection_page': collection_page}
 
     return context
 
@@ -1,8 +1,94 @@
 import json
-from django.http import HttpResponse
+import math
+from django.conf import settings
+from django.http import HttpResponse, StreamingHttpResponse
 from haystack.generic_views import FacetedSearchView
 from hs_core.discovery_form import DiscoveryForm, FACETED_FIELDS
 
+# stored Solr fields used to build map items
+MAP_ITEM_FIELDS = ('short_id', 'title', 'resource_type', 'absolute_url', 'author',
+                   'author_url', 'coverage')
+
+
+def map_item(solr):
+    """Build the map item of one search result from its stored Solr fields."""
+    json_obj = {}
+
+    # assign title and url values to the object
+    json_obj['short_id'] = solr['short_id']
+    json_obj['title'] = solr['title']
+    json_obj['resource_type'] = solr['resource_type']
+
+    json_obj['get_absolute_url'] = solr['absolute_url']
+    json_obj['first_author'] = solr['author']
+    # TODO: would be better for this to be derived than stored.
+    if solr.get('author_url'):
+        json_obj['first_author_url'] = solr['author_url']
+
+    # iterate over all the coverage values
+    if solr.get('coverage') is not None:
+        for coverage in solr['coverage']:
+            json_coverage = json.loads(coverage)
+            if 'east' in json_coverage:
+                json_obj['coverage_type'] = 'point'
+                json_obj['east'] = json_coverage['east']
+                json_obj['north'] = json_coverage['north']
+            elif 'northlimit' in json_coverage:
+                json_obj['coverage_type'] = 'box'
+                json_obj['northlimit'] = json_coverage['northlimit']
+                json_obj['eastlimit'] = json_coverage['eastlimit']
+                json_obj['southlimit'] = json_coverage['southlimit']
+                json_obj['westlimit'] = json_coverage['westlimit']
+            # else, skip
+            else:
+                continue
+    return json_obj
+
+
+def cluster_map_items(items, zoom):
+    """
+    Merge map items that fall in the same grid cell at a map zoom level.
+
+    The world is divided into 2^zoom by 2^zoom cells; a box is placed by its center.
+    A cell holding one item yields that item; a cell holding several yields a single
+    item of coverage_type 'cluster' with their count and mean location. Items without
+    a location are passed through.
+    """
+    cell_size = 360.0 / 2 ** max(zoom, 0)
+    cells = {}
+    for item in items:
+        if item.get('coverage_type') == 'point':
+            east, north = float(item['east']), float(item['north'])
+        elif item.get('coverage_type') == 'box':
+            east = (float(item['eastlimit']) + float(item['westlimit'])) / 2
+            north = (float(item['northlimit']) + float(item['southlimit'])) / 2
+        else:
+            yield item
+            continue
+        key = (int(math.floor(east / cell_size)), int(math.floor(north / cell_size)))
+        if key not in cells:
+            cells[key] = [item, 0, 0.0, 0.0]
+        cell = cells[key]
+        cell[1] += 1
+        cell[2] += east
+        cell[3] += north
+
+    for first, count, east, north in cells.values():
+        if count == 1:
+            yield first
+        else:
+            yield {'coverage_type': 'cluster', 'count': count,
+                   'east': east / count, 'north': north / count}
+
+
+def stream_json_array(items):
+    """Yield a compact JSON array of items, one item at a time."""
+    separator = '['
+    for item in items:
+        yield separator + json.dumps(item, separators=(',', ':'))
+        separator = ','
+    yield ']' if separator == ',' else '[]'
+
 
 # View class for generating JSON data format from Haystack
 # returned JSON objects array is used for building the map view
@@ -11,63 +97,37 @@ class DiscoveryJsonView(FacetedSearchView):
     facet_fields = FACETED_FIELDS
     form_class = DiscoveryForm
 
+    def stored_fields(self):
+        """Fetch the stored map fields of all results, a chunk of results per Solr query."""
+        chunk_size = getattr(settings, 'DISCOVERY_JSON_CHUNK_SIZE', 1000)
+        queryset = self.get_queryset().values(*MAP_ITEM_FIELDS)
+        start = 0
+        while True:
+            chunk = list(queryset[start:start + chunk_size])
+            for solr in chunk:
+                yield solr
+            if len(chunk) < chunk_size:
+                return
+            start += chunk_size
+
     # overwrite Haystack generic_view.py form_valid() function to generate JSON response
     def form_valid(self, form):
 
-        # initialize an empty array for holding the result objects with coordinate values
-        coor_values = []
         # get query set
         self.queryset = form.search()
 
-        # When we have a GET request with search query, build our JSON objects array
+        # When we have a GET request with search query, stream our JSON objects array
         if len(self.request.GET):
-
-            # iterate all the search results
-            for result in self.get_queryset():
-                # initialize a null JSON object
-                json_obj = {}
-
-                # fetch as much information as possible from stored fields
-                solr = result.get_stored_fields()
-
-                # assign title and url values to the object
-                json_obj['short_id'] = solr['short_id']
-                json_obj['title'] = solr['title']
-                json_obj['resource_type'] = solr['resource_type']
-
-                json_obj['get_absolute_url'] = solr['absolute_url']
-                json_obj['first_author'] = solr['author']
-                # TODO: would be better for this to be derived than stored.
-                if solr['author_url']:
-                    json_obj['first_author_url'] = solr['author_url']
-
-                # iterate over all the coverage values
-                if solr['coverage'] is not None:
-                    for coverage in solr['coverage']:
-                        json_coverage = json.loads(coverage)
-                        if 'east' in json_coverage:
-                            json_obj['coverage_type'] = 'point'
-                            json_obj['east'] = json_coverage['east']
-                            json_obj['north'] = json_coverage['north']
-                        elif 'northlimit' in json_coverage:
-                            json_obj['coverage_type'] = 'box'
-                            json_obj['northlimit'] = json_coverage['northlimit']
-                            json_obj['eastlimit'] = json_coverage['eastlimit']
-                            json_obj['southlimit'] = json_coverage['southlimit']
-                            json_obj['westlimit'] = json_coverage['westlimit']
-                        # else, skip
-                        else:
-                            continue
-
-                # encode object to JSON string format
-                coor_obj = json.dumps(json_obj)
-                # add JSON object the results array
-                coor_values.append(coor_obj)
-
-            # encode the results results array to JSON array
-            the_data = json.dumps(coor_values)
-            # return JSON response
-
-            return HttpResponse(the_data, content_type='application/json')
+            items = (map_item(solr) for solr in self.stored_fields())
+            # with a zoom level, nearby results are merged server-side
+            zoom = self.request.GET.get('zoom')
+            if zoom:
+                try:
+                    items = cluster_map_items(items, int(zoom))
+                except ValueError:
+                    return HttpResponse(json.dumps({'error': 'invalid zoom level'}),
+                                        content_type='application/json', status=400)
+            return StreamingHttpResponse(stream_json_array(items),
+                                         content_type='application/json')
         else:
-            return HttpResponse(json.dumps('[]'), content_type='application/json')
+            return HttpResponse('[]', content_type='application/json')
@@ -5,3 +5,34 @@ class SmallDatumPagination(PageNumberPagination):
         one wants to force all results to be on one page
     """
     page_size = None
+
+
+class LazyItemList(object):
+    """ Present a queryset to a paginator as a list of items, building items for one page only
+
+        Paginators call count(), which is a SQL COUNT, and then slice, which is a SQL
+        LIMIT/OFFSET; to_items is applied only to the rows of the requested page. It takes
+        a list of objects and returns the list of corresponding items, so that it can
+        fetch related data for the whole page at once.
+    """
+    def __init__(self, queryset, to_items):
+        self.queryset = queryset
+        self.to_items = to_items
+
+    @property
+    def ordered(self):
+        return self.queryset.ordered
+
+    def count(self):
+        return self.queryset.count()
+
+    def __len__(self):
+        return self.count()
+
+    def __iter__(self):
+        return iter(self.to_items(self.queryset))
+
+    def __getitem__(self, key):
+        if isinstance(key, slice):
+            return self.to_items(self.queryset[key])
+        return self.to_items([self.queryset[key]])[0]
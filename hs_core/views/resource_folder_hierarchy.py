@@ -77,36 +77,38 @@ def data_store_structure(request):
             d_url = to_external_url(istorage.url(name_with_full_path))
             dirs.append({'name': d_pk, 'url': d_url})
 
+        file_names = [fname.decode('utf-8') for fname in store[1]]
+        res_files = {}
+        if file_names:
+            # sizes are recorded in Django; record any missing ones in one iRODS query
+            resource.record_missing_file_system_metadata()
+            # match the iRODS listing to Django records with one query
+            res_files = _get_resource_files_by_storage_path(
+                resource, [os.path.join(res_coll, fname) for fname in file_names])
+
         files = []
-        for fname in store[1]:  # files
-            fname = fname.decode('utf-8')
+        for fname in file_names:  # files
             name_with_full_path = os.path.join(res_coll, fname)
-            size = istorage.size(name_with_full_path)
+            f = res_files.get(name_with_full_path)
+            if f is None:  # file is not found in Django
+                logger.error("data_store_structure: filename {} in iRODs has no analogue in Django"
+                             .format(name_with_full_path))
+                continue
+
             mtype = get_file_mime_type(fname)
             idx = mtype.find('/')
             if idx >= 0:
                 mtype = mtype[idx + 1:]
-            f_pk = ''
-            f_url = ''
+            f_url = to_external_url(get_resource_file_url(f))
             logical_file_type = ''
             logical_file_id = ''
-            for f in ResourceFile.objects.filter(object_id=resource.id):
-                if name_with_full_path == f.storage_path:
-                    f_pk = f.pk
-                    f_url = to_external_url(get_resource_file_url(f))
-                    if resource.resource_type == "CompositeResource":
-                        f_logical = f.get_or_create_logical_file
-                        logical_file_type = f.logical_file_type_name
-                        logical_file_id = f_logical.id
-                    break
-
-            if f_pk:  # file is found in Django
-                files.append({'name': fname, 'size': size, 'type': mtype, 'pk': f_pk, 'url': f_url,
-                              'logical_type': logical_file_type,
-                              'logical_file_id': logical_file_id})
-            else:  # file is not found in Django
-                logger.error("data_store_structure: filename {} in iRODs has no analogue in Django"
-                             .format(name_with_full_path))
+            if resource.resource_type == "CompositeResource":
+                f_logical = f.get_or_create_logical_file
+                logical_file_type = f.logical_file_type_name
+                logical_file_id = f_logical.id
+            files.append({'name': fname, 'size': f.size, 'type': mtype, 'pk': f.pk, 'url': f_url,
+                          'logical_type': logical_file_type,
+                          'logical_file_id': logical_file_id})
 
     except SessionException as ex:
         logger.error("session exception querying store_path {} for {}".format(store_path, res_id))
@@ -127,6 +129,31 @@ def data_store_structure(request):
     )
 
 
+def _get_resource_files_by_storage_path(resource, storage_paths):
+    """
+    Return a dict of the ResourceFiles of a resource keyed by storage path, in one query
+
+    :param resource: resource containing the files
+    :param storage_paths: storage paths of the files to look up; paths without a
+    ResourceFile are absent from the result.
+    """
+    if resource.is_federated:
+        res_files = ResourceFile.objects.filter(object_id=resource.id,
+                                                fed_resource_file__in=storage_paths)
+    else:
+        res_files = ResourceFile.objects.filter(object_id=resource.id,
+                                                resource_file__in=storage_paths)
+    if resource.resource_type == "CompositeResource":
+        res_files = res_files.prefetch_related('logical_file_content_object')
+
+    files_by_path = {}
+    for f in res_files:
+        # avoid re-fetching the resource for every file
+        f.content_object = resource
+        files_by_path[f.get_storage_path(resource)] = f
+    return files_by_path
+
+
 def to_external_url(url):
     """
     Convert an internal download file/folder url to the external url.  This should eventually be
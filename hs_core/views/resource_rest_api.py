@@ -20,7 +20,7 @@ from rest_framework.request import Request
 from rest_framework.exceptions import ValidationError, NotAuthenticated, PermissionDenied, NotFound
 
 from hs_core import hydroshare
-from hs_core.models import AbstractResource
+from hs_core.models import AbstractResource, BagBuildJob, Coverage, Creator, Description, Title
 from hs_core.hydroshare.utils import get_resource_by_shortkey, get_resource_types
 from hs_core.views import utils as view_utils
 from hs_core.views.utils import ACTION_TO_AUTHORIZE
@@ -30,6 +30,7 @@ from hs_core.hydroshare.utils import get_file_storage, resource_modified
 from hs_core.serialization import GenericResourceMeta, HsDeserializationDependencyException, \
     HsDeserializationException
 from hs_core.hydroshare.hs_bagit import create_bag_files
+from hs_access_control.models import ResourceAccess
 
 
 logger = logging.getLogger(__name__)
@@ -38,35 +39,77 @@ logger = logging.getLogger(__name__)
 # Mixins
 class ResourceToListItemMixin(object):
     def resourceToResourceListItem(self, r):
+        return self.resourcesToResourceListItems([r])[0]
+
+    def resourcesToResourceListItems(self, resources):
+        """
+        Build ResourceListItems for a page of resources with a fixed number of queries
+
+        Titles, abstracts, first creators, coverages and access flags are each fetched for
+        all of the resources in one query, rather than through r.metadata and r.raccess
+        for every resource.
+        :param resources: iterable of resources (typically one page of a queryset)
+        :return: list of ResourceListItem in the same order
+        """
+        resources = list(resources)
+        if not resources:
+            return []
+
+        # metadata elements are keyed by the (content type, id) of their metadata container,
+        # which is the resource's (content_type, object_id)
+        metadata_ids = set(r.object_id for r in resources)
+
+        def values_by_metadata(queryset, *fields):
+            values = {}
+            for v in queryset.filter(object_id__in=metadata_ids).values(
+                    'content_type_id', 'object_id', *fields):
+                values.setdefault((v['content_type_id'], v['object_id']), []).append(v)
+            return values
+
+        titles = values_by_metadata(Title.objects.all(), 'value')
+        abstracts = values_by_metadata(Description.objects.all(), 'abstract')
+        first_creators = values_by_metadata(Creator.objects.filter(order=1), 'name')
+        coverages = values_by_metadata(Coverage.objects.all(), 'type', '_value')
+        access = {a['resource_id']: a for a in ResourceAccess.objects.filter(
+            resource_id__in=[r.id for r in resources]).values(
+            'resource_id', 'public', 'discoverable', 'shareable', 'immutable', 'published')}
+
         site_url = hydroshare.utils.current_site_url()
-        bag_url = site_url + r.bag_url
-        science_metadata_url = site_url + reverse('get_update_science_metadata', args=[r.short_id])
-        resource_map_url = site_url + reverse('get_resource_map', args=[r.short_id])
-        resource_url = site_url + r.get_absolute_url()
-        coverages = [{"type": v['type'], "value": json.loads(v['_value'])}
-                     for v in r.metadata.coverages.values()]
-        doi = None
-        if r.raccess.published:
-            doi = "10.4211/hs.{}".format(r.short_id)
-        resource_list_item = serializers.ResourceListItem(resource_type=r.resource_type,
-                                                          resource_id=r.short_id,
-                                                          resource_title=r.metadata.title.value,
-                                                          abstract=r.metadata.description,
-                                                          creator=r.first_creator.name,
-                                                          doi=doi,
-                                                          public=r.raccess.public,
-                                                          discoverable=r.raccess.discoverable,
-                                                          shareable=r.raccess.shareable,
-                                                          immutable=r.raccess.immutable,
-                                                          published=r.raccess.published,
-                                                          date_created=r.created,
-                                                          date_last_updated=r.updated,
-                                                          bag_url=bag_url,
-                                                          coverages=coverages,
-                                                          science_metadata_url=science_metadata_url,
-                                                          resource_map_url=resource_map_url,
-                                                          resource_url=resource_url)
-        return resource_list_item
+        resource_list_items = []
+        for r in resources:
+            metadata_key = (r.content_type_id, r.object_id)
+            title = titles.get(metadata_key)
+            abstract = abstracts.get(metadata_key)
+            first_creator = first_creators.get(metadata_key)
+            raccess = access.get(r.id, {})
+            doi = None
+            if raccess.get('published'):
+                doi = "10.4211/hs.{}".format(r.short_id)
+            science_metadata_url = site_url + reverse('get_update_science_metadata',
+                                                      args=[r.short_id])
+            resource_map_url = site_url + reverse('get_resource_map', args=[r.short_id])
+            resource_list_item = serializers.ResourceListItem(
+                resource_type=r.resource_type,
+                resource_id=r.short_id,
+                resource_title=title[0]['value'] if title else None,
+                abstract=abstract[0]['abstract'] if abstract else None,
+                creator=first_creator[0]['name'] if first_creator else None,
+                doi=doi,
+                public=raccess.get('public'),
+                discoverable=raccess.get('discoverable'),
+                shareable=raccess.get('shareable'),
+                immutable=raccess.get('immutable'),
+                published=raccess.get('published'),
+                date_created=r.created,
+                date_last_updated=r.updated,
+                bag_url=site_url + r.bag_url,
+                coverages=[{"type": v['type'], "value": json.loads(v['_value'])}
+                           for v in coverages.get(metadata_key, [])],
+                science_metadata_url=science_metadata_url,
+                resource_map_url=resource_map_url,
+                resource_url=site_url + r.get_absolute_url())
+            resource_list_items.append(resource_list_item)
+        return resource_list_items
 
 
 class ResourceFileToListItemMixin(object):
@@ -220,13 +263,9 @@ class ResourceList(ResourceToListItemMixin, generics.ListAPIView):
 
         filter_parms['public'] = not self.request.user.is_authenticated()
 
-        filtered_res_list = []
-
-        for r in hydroshare.get_resource_list(**filter_parms):
-            resource_list_item = self.resourceToResourceListItem(r)
-            filtered_res_list.append(resource_list_item)
-
-        return filtered_res_list
+        # list items are built only for the page being returned
+        return pagination.LazyItemList(hydroshare.get_resource_list(**filter_parms),
+                                       self.resourcesToResourceListItems)
 
     def get_serializer_class(self):
         return serializers.ResourceListItemSerializer
@@ -238,6 +277,36 @@ class CheckTaskStatus(generics.RetrieveAPIView):
         return HttpResponseRedirect(url)
 
 
+class BagBuildStatus(APIView):
+    """
+    Poll or request the build of a resource bag
+
+    REST URL: hsapi/resource/{pk}/bag/
+    HTTP method: GET
+    :return: JSON string of the format: {'status': status} where status is 'queued',
+    'running', 'failed', or 'none' if no build is pending; a queued build also has 'position',
+    the number of builds to start before it.
+
+    REST URL: hsapi/resource/{pk}/bag/
+    HTTP method: POST
+    Queue a build of the bag, or join the build already queued or running.
+    :return: the status as for GET, with status code 202
+    """
+    allowed_methods = ('GET', 'POST')
+
+    def get(self, request, pk):
+        view_utils.authorize(request, pk, needed_permission=ACTION_TO_AUTHORIZE.VIEW_RESOURCE)
+        return Response(data=BagBuildJob.status_of(pk), status=status.HTTP_200_OK)
+
+    def post(self, request, pk):
+        # import here to avoid circular import issue
+        from hs_core.tasks import schedule_bag_build
+
+        view_utils.authorize(request, pk, needed_permission=ACTION_TO_AUTHORIZE.VIEW_RESOURCE)
+        schedule_bag_build(pk)
+        return Response(data=BagBuildJob.status_of(pk), status=status.HTTP_202_ACCEPTED)
+
+
 class ResourceReadUpdateDelete(ResourceToListItemMixin, generics.RetrieveUpdateDestroyAPIView):
     """
     Read, update, or delete a resource
@@ -548,13 +617,10 @@ class ResourceListCreate(ResourceToListItemMixin, generics.ListCreateAPIView):
             filter_parms['type'] = list(filter_parms['type'])
 
         filter_parms['public'] = not self.request.user.is_authenticated()
-        filtered_res_list = []
-
-        for r in hydroshare.get_resource_list(**filter_parms):
-            resource_list_item = self.resourceToResourceListItem(r)
-            filtered_res_list.append(resource_list_item)
 
-        return filtered_res_list
+        # list items are built only for the page being returned
+        return pagination.LazyItemList(hydroshare.get_resource_list(**filter_parms),
+                                       self.resourcesToResourceListItems)
 
     # covers serialization of output from GET request
     def get_serializer_class(self):
@@ -1062,8 +1128,13 @@ class ResourceFileListCreate(ResourceFileToListItemMixin, generics.ListCreateAPI
     def get_queryset(self):
         resource, _, _ = view_utils.authorize(self.request, self.kwargs['pk'],
                                               needed_permission=ACTION_TO_AUTHORIZE.VIEW_RESOURCE)
+        # file sizes are recorded in the database; at most one iRODS catalog query
+        # is needed to record any that are missing
+        resource.record_missing_file_system_metadata()
         resource_file_info_list = []
         for f in resource.files.all():
+            # avoid re-fetching the resource for every file
+            f.content_object = resource
             resource_file_info_list.append(self.resourceFileToListItem(f))
         return resource_file_info_list
 
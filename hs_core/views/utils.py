@@ -14,6 +14,7 @@ from django.contrib.contenttypes.models import ContentType
 from django.core.exceptions import ObjectDoesNotExist
 from django.core.exceptions import SuspiciousFileOperation
 from django.core.files.base import File
+from django.db.models import Q
 from django.utils.http import int_to_base36
 from django.http import HttpResponse, QueryDict
 
@@ -30,7 +31,8 @@ from hs_core.models import AbstractMetaDataElement, BaseResource, GenericResourc
 from hs_core.signals import pre_metadata_element_create, post_delete_file_from_resource
 from hs_core.hydroshare.utils import get_file_mime_type
 from django_irods.storage import IrodsStorage
-from hs_access_control.models import PrivilegeCodes
+from hs_access_control.models import PrivilegeCodes, UserResourceCombinedPrivilege
+from hs_labels.models import FlagCodes, UserResourceFlags, UserResourceLabels
 
 ActionToAuthorize = namedtuple('ActionToAuthorize',
                                'VIEW_METADATA, '
@@ -190,6 +192,9 @@ def authorize(request, res_id, needed_permission=ACTION_TO_AUTHORIZE.VIEW_RESOUR
     """
     authorized = False
     user = get_user(request)
+    if user.is_authenticated():
+        # memoize privilege for the life of the request, however many checks are made
+        user.uaccess.privilege_cache = request.user.uaccess.privilege_cache
 
     try:
         res = hydroshare.utils.get_resource_by_shortkey(res_id, or_404=False)
@@ -365,60 +370,77 @@ def create_form(formclass, request):
     return params
 
 
-def get_my_resources_list(request):
-    user = request.user
-    # get a list of resources with effective OWNER privilege
-    owned_resources = user.uaccess.get_resources_with_explicit_access(PrivilegeCodes.OWNER)
-    # remove obsoleted resources from the owned_resources
-    owned_resources = owned_resources.exclude(object_id__in=Relation.objects.filter(
-        type='isReplacedBy').values('object_id'))
-
-    # get a list of resources with effective CHANGE privilege (should include resources that the
-    # user has access to via group
-    editable_resources = user.uaccess.get_resources_with_explicit_access(PrivilegeCodes.CHANGE,
-                                                                         via_group=True)
-    # remove obsoleted resources from the editable_resources
-    editable_resources = editable_resources.exclude(object_id__in=Relation.objects.filter(
-        type='isReplacedBy').values('object_id'))
-
-    # get a list of resources with effective VIEW privilege (should include resources that the
-    # user has access via group
-    viewable_resources = user.uaccess.get_resources_with_explicit_access(PrivilegeCodes.VIEW,
-                                                                         via_group=True)
-    # remove obsoleted resources from the viewable_resources
-    viewable_resources = viewable_resources.exclude(object_id__in=Relation.objects.filter(
-        type='isReplacedBy').values('object_id'))
-
-    owned_resources = list(owned_resources)
-    editable_resources = list(editable_resources)
-    viewable_resources = list(viewable_resources)
-    favorite_resources = list(user.ulabels.favorited_resources)
-    labeled_resources = list(user.ulabels.labeled_resources)
-    discovered_resources = list(user.ulabels.my_resources)
-
-    for res in owned_resources:
-        res.owned = True
-
-    for res in editable_resources:
-        res.editable = True
-
-    for res in viewable_resources:
-        res.viewable = True
-
-    for res in discovered_resources:
-        res.discovered = True
-
-    for res in (owned_resources + editable_resources + viewable_resources + discovered_resources):
-        res.is_favorite = False
-        if res in favorite_resources:
-            res.is_favorite = True
-        if res in labeled_resources:
-            res.labels = res.rlabels.get_labels(user)
-
-    resource_collection = (owned_resources + editable_resources + viewable_resources +
-                           discovered_resources)
-
-    return resource_collection
+def get_my_resources_queryset(user):
+    """
+    Get a QuerySet of the resources listed on the "My Resources" page of a user.
+
+    These are the resources the user holds any privilege over, directly or via a group,
+    excluding obsoleted resources, together with those the user marked as "mine".
+    Each resource appears once, most recently updated first.
+    """
+    obsoleted = Relation.objects.filter(type='isReplacedBy').values('object_id')
+    held = UserResourceCombinedPrivilege.objects.filter(user=user)\
+        .exclude(resource__object_id__in=obsoleted).values('resource_id')
+    discovered = UserResourceFlags.objects.filter(user=user, kind=FlagCodes.MINE)\
+        .values('resource_id')
+    return BaseResource.objects.filter(Q(pk__in=held) | Q(pk__in=discovered))\
+        .select_related('raccess').order_by('-updated')
+
+
+def annotate_my_resources(user, resources):
+    """
+    Set the "My Resources" page flags and labels of a user on a list of resources.
+
+    Sets owned, editable, viewable, discovered, is_favorite and labels on each resource,
+    using one query per kind of information for the whole list.
+    """
+    resource_ids = [res.id for res in resources]
+    privileges = dict(UserResourceCombinedPrivilege.objects
+                      .filter(user=user, resource_id__in=resource_ids)
+                      .values_list('resource_id', 'privilege'))
+    flags = {}
+    for resource_id, kind in UserResourceFlags.objects\
+            .filter(user=user, resource_id__in=resource_ids,
+                    kind__in=(FlagCodes.FAVORITE, FlagCodes.MINE))\
+            .values_list('resource_id', 'kind'):
+        flags.setdefault(resource_id, set()).add(kind)
+    labels = {}
+    for resource_id, label in UserResourceLabels.objects\
+            .filter(user=user, resource_id__in=resource_ids)\
+            .order_by('label').values_list('resource_id', 'label'):
+        labels.setdefault(resource_id, []).append(label)
+
+    for res in resources:
+        privilege = privileges.get(res.id, PrivilegeCodes.NONE)
+        if privilege == PrivilegeCodes.CHANGE and res.raccess.immutable:
+            privilege = PrivilegeCodes.VIEW
+        res.owned = privilege == PrivilegeCodes.OWNER
+        res.editable = privilege == PrivilegeCodes.CHANGE
+        res.viewable = privilege == PrivilegeCodes.VIEW
+        res.discovered = FlagCodes.MINE in flags.get(res.id, ())
+        res.is_favorite = FlagCodes.FAVORITE in flags.get(res.id, ())
+        if res.id in labels:
+            res.labels = labels[res.id]
+    return resources
+
+
+def get_my_resources_list(request, start=None, count=None):
+    """
+    Get the resources listed on the "My Resources" page of the requesting user.
+
+    :param request: request whose user's resources are listed.
+    :param start: index of the first resource to return, or None to start at the first.
+    :param count: maximum number of resources to return, or None for all.
+    :return: list of resources, annotated as in annotate_my_resources.
+    """
+    resources = get_my_resources_queryset(request.user)
+    if start is not None and count is not None:
+        resources = resources[start:start + count]
+    elif start:
+        resources = resources[start:]
+    elif count:
+        resources = resources[:count]
+    return annotate_my_resources(request.user, list(resources))
 
 
 def send_action_to_take_email(request, user, action_type, **kwargs):
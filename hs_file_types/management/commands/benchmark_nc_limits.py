@@ -0,0 +1,89 @@
+"""
+This times the coordinate limit computation of NetCDF metadata extraction.
+
+A synthetic curvilinear lat/lon grid (default 2000x1500, with some fill values) is written
+with netCDF4, and the limits of each coordinate variable are computed both by reading the
+whole variable and in slabs by nc_utils.get_nc_variable_limits.
+"""
+
+import os
+import shutil
+import tempfile
+import time
+
+import netCDF4
+import numpy
+from django.core.management.base import BaseCommand, CommandError
+
+from hs_file_types.nc_functions import nc_utils
+
+
+def write_curvilinear_grid(path, rows, columns, chunk_rows):
+    """Write a synthetic curvilinear lat/lon grid with some fill values to path."""
+    dataset = netCDF4.Dataset(path, 'w')
+    dataset.createDimension('y', rows)
+    dataset.createDimension('x', columns)
+    y, x = numpy.meshgrid(numpy.linspace(0, 1, rows), numpy.linspace(0, 1, columns),
+                          indexing='ij')
+    for name, values in (('lat', 30 + 10 * y + x), ('lon', -120 + 10 * x - y)):
+        var = dataset.createVariable(name, 'f8', ('y', 'x'),
+                                     chunksizes=(min(chunk_rows, rows), columns),
+                                     fill_value=-9999.0)
+        values[0, :10] = -9999.0
+        var[:] = values
+    dataset.close()
+
+
+class Command(BaseCommand):
+    help = "Time NetCDF coordinate limits read in slabs against a full read."
+
+    def add_arguments(self, parser):
+
+        parser.add_argument(
+            '--rows',
+            type=int,
+            default=2000,
+            help='number of grid rows (default: 2000)',
+        )
+        parser.add_argument(
+            '--columns',
+            type=int,
+            default=1500,
+            help='number of grid columns (default: 1500)',
+        )
+        parser.add_argument(
+            '--memory-budget',
+            type=int,
+            default=4,
+            dest='memory_budget',
+            help='megabytes read at a time by the slab computation (default: 4)',
+        )
+
+    def handle(self, *args, **options):
+        if options['rows'] < 1 or options['columns'] < 1 or options['memory_budget'] < 1:
+            raise CommandError("--rows, --columns and --memory-budget must be positive")
+
+        temp_dir = tempfile.mkdtemp()
+        try:
+            path = os.path.join(temp_dir, 'grid.nc')
+            write_curvilinear_grid(path, options['rows'], options['columns'], 100)
+            dataset = netCDF4.Dataset(path)
+            for name in ('lat', 'lon'):
+                var = dataset.variables[name]
+                start = time.time()
+                data = var[:]
+                full = (data.min(), data.max())
+                full_time = time.time() - start
+                del data
+
+                start = time.time()
+                slabs = nc_utils.get_nc_variable_limits(
+                    var, memory_budget=options['memory_budget'] * 1024 ** 2)
+                slab_time = time.time() - start
+                print("{} limits of a {}x{} grid: full read {:.3f}s, {}MB slabs {:.3f}s{}"
+                      .format(name, options['rows'], options['columns'], full_time,
+                              options['memory_budget'], slab_time,
+                              '' if slabs == full else ' (limits differ!)'))
+            dataset.close()
+        finally:
+            shutil.rmtree(temp_dir)
@@ -2,6 +2,8 @@ import os
 import copy
 
 from django.db import models
+from django.db.models.signals import post_save, post_delete
+from django.dispatch import receiver
 from django.contrib.contenttypes.models import ContentType
 from django.contrib.contenttypes.fields import GenericRelation
 from django.core.exceptions import ValidationError, ObjectDoesNotExist
@@ -773,3 +775,37 @@ class AbstractLogicalFile(models.Model):
             # this should also delete on all metadata elements that have generic relations with
             # the metadata object
             metadata.delete()
+
+
+def _bump_logical_file_metadata_xml_version(logical_file):
+    """Invalidate the cached metadata XML of the resource that contains logical_file."""
+    resource_ids = ResourceFile.objects.filter(
+        logical_file_content_type=ContentType.objects.get_for_model(logical_file),
+        logical_file_object_id=logical_file.id).values('object_id')
+    CoreMetaData.bump_xml_version(resource_ids=resource_ids)
+
+
+@receiver(post_save)
+@receiver(post_delete)
+def _bump_resource_metadata_xml_version(sender, instance, **kwargs):
+    """Invalidate the cached metadata XML of a resource when one of its logical files changes.
+
+    The metadata XML of a resource that supports logical files includes the metadata of its
+    logical files (see CompositeResource).
+    """
+    if isinstance(instance, AbstractMetaDataElement):
+        container_model = ContentType.objects.get_for_id(instance.content_type_id).model_class()
+        if container_model is None or not issubclass(container_model, AbstractFileMetaData):
+            return
+        instance = container_model.objects.filter(id=instance.object_id).first()
+        if instance is None:
+            return
+
+    if isinstance(instance, AbstractFileMetaData):
+        try:
+            instance = instance.logical_file
+        except ObjectDoesNotExist:  # the logical file is created after its metadata
+            return
+
+    if isinstance(instance, AbstractLogicalFile):
+        _bump_logical_file_metadata_xml_version(instance)
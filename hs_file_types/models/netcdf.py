@@ -2,6 +2,9 @@ import os
 import shutil
 import logging
 import re
+import json
+
+from collections import OrderedDict
 
 from functools import partial, wraps
 import netCDF4
@@ -32,6 +35,9 @@ import hs_file_types.nc_functions.nc_meta as nc_meta
 class NetCDFFileMetaData(NetCDFMetaDataMixin, AbstractFileMetaData):
     # the metadata element models are from the netcdf resource type app
     model_app_label = 'hs_app_netCDF'
+    # the netcdf header info (see nc_dump.get_nc_dump_dict) as json, stored when the file type
+    # is set or the netcdf file is updated so that it is displayed without reading any file
+    header_info_json = models.TextField(null=True, blank=True)
 
     def get_metadata_elements(self):
         elements = super(NetCDFFileMetaData, self).get_metadata_elements()
@@ -201,24 +207,32 @@ class NetCDFFileMetaData(NetCDFMetaDataMixin, AbstractFileMetaData):
 
     def get_ncdump_html(self):
         """
-        Generates html code to display the contents of the ncdump text file. The generated html
+        Generates html code to display the netcdf header information. The generated html
         is used for netcdf file type metadata view and edit modes.
         :return:
         """
 
         nc_dump_div = div()
         nc_dump_res_file = None
+        nc_file_name = ''
         for f in self.logical_file.files.all():
             if f.extension == ".txt":
                 nc_dump_res_file = f
-                break
+            elif f.extension == ".nc":
+                nc_file_name = f.file_name[:-len(f.extension)]
         if nc_dump_res_file is not None:
             nc_dump_div = div(style="clear: both", cls="col-xs-12")
             with nc_dump_div:
                 legend("NetCDF Header Information")
                 p(nc_dump_res_file.full_path[33:])
-                header_info = nc_dump_res_file.resource_file.read()
-                header_info = header_info.decode('utf-8')
+                if self.header_info_json:
+                    header_info = nc_dump.get_nc_dump_string_from_dict(
+                        nc_file_name, json.loads(self.header_info_json,
+                                                 object_pairs_hook=OrderedDict))
+                else:
+                    # header info of file types set before it was stored
+                    header_info = nc_dump_res_file.resource_file.read()
+                    header_info = header_info.decode('utf-8')
                 textarea(header_info, readonly="", rows="15",
                          cls="input-xlarge", style="min-width: 100%")
 
@@ -293,6 +307,15 @@ class NetCDFLogicalFile(AbstractLogicalFile):
         netcdf_metadata = NetCDFFileMetaData.objects.create(keywords=[])
         return cls.objects.create(metadata=netcdf_metadata)
 
+    def get_copy(self):
+        """Overrides the base class method"""
+
+        copy_of_logical_file = super(NetCDFLogicalFile, self).get_copy()
+        copy_of_logical_file.metadata.header_info_json = self.metadata.header_info_json
+        copy_of_logical_file.metadata.save()
+        copy_of_logical_file.save()
+        return copy_of_logical_file
+
     @property
     def supports_resource_file_move(self):
         """resource files that are part of this logical file can't be moved"""
@@ -404,6 +427,8 @@ class NetCDFLogicalFile(AbstractLogicalFile):
                     else:
                         logical_file.dataset_name = nc_file_name
                     logical_file.save()
+                    logical_file.metadata.header_info_json = get_header_info_json(nc_dataset)
+                    logical_file.metadata.save()
 
                     try:
                         # create a folder for the netcdf file type using the base file
@@ -798,6 +823,21 @@ def create_header_info_txt_file(nc_temp_file, nc_file_name):
     return dump_file
 
 
+def get_header_info_json(nc_dataset):
+    """
+    Returns the header info of the netcdf dataset as json, or None if it can't be read, in
+    which case the header info text file is displayed instead
+    :param nc_dataset: an open netCDF4.Dataset
+    :return:
+    """
+    try:
+        return json.dumps(nc_dump.get_nc_dump_dict(nc_dataset))
+    except Exception as ex:
+        log = logging.getLogger()
+        log.exception("Failed to read netcdf header info. Error:{}".format(ex.message))
+        return None
+
+
 def netcdf_file_update(instance, nc_res_file, txt_res_file, user):
     log = logging.getLogger()
     # check the instance type
@@ -994,6 +1034,11 @@ def netcdf_file_update(instance, nc_res_file, txt_res_file, user):
 
     metadata = instance.metadata
     metadata.is_dirty = False
+    if file_type:
+        nc_dataset = nc_utils.get_nc_dataset(temp_nc_file)
+        if nc_dataset is not None:
+            metadata.header_info_json = get_header_info_json(nc_dataset)
+            nc_dataset.close()
     metadata.save()
 
     # cleanup the temp dir
@@ -10,6 +10,7 @@ from gdalconst import GA_ReadOnly
 
 from functools import partial, wraps
 
+from django.conf import settings
 from django.db import models, transaction
 from django.core.files.uploadedfile import UploadedFile
 from django.core.exceptions import ValidationError
@@ -460,7 +461,10 @@ def raster_file_validation(raster_file):
 
 def extract_metadata(temp_vrt_file_path):
     metadata = []
-    res_md_dict = raster_meta_extract.get_raster_meta_dict(temp_vrt_file_path)
+    # bands larger than this number of cells get approximate statistics
+    approximate_pixels = getattr(settings, 'RASTER_APPROXIMATE_STATISTICS_PIXELS', None)
+    res_md_dict = raster_meta_extract.get_raster_meta_dict(temp_vrt_file_path,
+                                                           approximate_pixels)
     wgs_cov_info = res_md_dict['spatial_coverage_info']['wgs84_coverage_info']
     # add core metadata coverage - box
     if wgs_cov_info:
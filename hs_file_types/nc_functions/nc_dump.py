@@ -91,6 +91,62 @@ def get_nc_dump_string(nc_file_name):
     return nc_dump_string
 
 
+def get_nc_dump_string_from_dict(nc_file_name, nc_dump_dict):
+    """
+    (string, dict) -> string
+
+    Return: string laid out like the output of "ncdump -h", built from the header info dict
+            returned by get_nc_dump_dict() without opening the netcdf file
+    """
+    lines = [u'netcdf {0} {{'.format(nc_file_name)]
+    lines.extend(get_nc_dump_group_lines(nc_dump_dict, ''))
+    lines.append('}')
+    return '\n'.join(lines)
+
+
+def get_nc_dump_group_lines(nc_dump_dict, indent):
+    """
+    (dict, string) -> list
+
+    Return: the lines of the "ncdump -h" layout for the header info dict of a netcdf group
+    """
+    def attr_value(value):
+        return '\\n'.join(value) if isinstance(value, list) else value
+
+    lines = []
+    if nc_dump_dict.get('dimensions'):
+        lines.append(indent + 'dimensions:')
+        for dim_name, dim_size in nc_dump_dict['dimensions'].items():
+            # unlimited dimensions are recorded as 'UNLIMITED; // (n currently)'
+            dim_size = unicode(dim_size).replace('UNLIMITED;', 'UNLIMITED ;') \
+                if 'UNLIMITED' in unicode(dim_size) else '{0} ;'.format(dim_size)
+            lines.append(u'{0}\t{1} = {2}'.format(indent, dim_name, dim_size))
+    if nc_dump_dict.get('variables'):
+        lines.append(indent + 'variables:')
+        for var_title, var_attrs in nc_dump_dict['variables'].items():
+            lines.append(u'{0}\t{1} ;'.format(indent, var_title))
+            # the title is '<type> <name>(<dimensions>)', where the type may be two words
+            var_type = 'variable length' if var_title.startswith('variable length ') \
+                else var_title.split(' ', 1)[0]
+            var_name = var_title[len(var_type) + 1:].rsplit('(', 1)[0]
+            for name, value in var_attrs.items():
+                lines.append(u'{0}\t\t{1}:{2} = {3} ;'.format(indent, var_name, name,
+                                                            attr_value(value)))
+    if nc_dump_dict.get('global attributes'):
+        lines.append('')
+        lines.append(indent + '// global attributes:')
+        for name, value in nc_dump_dict['global attributes'].items():
+            lines.append(u'{0}\t\t:{1} = {2} ;'.format(indent, name, attr_value(value)))
+    for key, value in nc_dump_dict.items():
+        if key.startswith('group: '):
+            lines.append('')
+            lines.append(u'{0}{1} {{'.format(indent, key))
+            lines.extend(get_nc_dump_group_lines(value, indent + '\t'))
+            lines.append(u'{0}}} // {1}'.format(indent, key))
+
+    return lines
+
+
 def get_nc_dump_dict(nc_group):
     """
     (obj) -> dict
@@ -16,6 +16,9 @@ import osr
 import netCDF4
 import numpy
 
+# the most bytes of a coordinate variable that are read into memory at a time
+COORDINATE_MEMORY_BUDGET = 64 * 1024 * 1024
+
 
 # Functions for General Purpose
 def get_nc_dataset(nc_file_name):
@@ -153,15 +156,14 @@ def get_nc_variable_coordinate_meta(nc_dataset, nc_variable_name):
     nc_variable_coordinate_meta = {}
     if nc_variable_name in nc_variables_coordinate_type_mapping.keys():
         nc_variable = nc_dataset.variables[nc_variable_name]
-        nc_variable_data = nc_variable[:]
         nc_variable_coordinate_type = nc_variables_coordinate_type_mapping[nc_variable_name]
-        coordinate_max = None
-        coordinate_min = None
-        if nc_variable_data.size:
-            coordinate_min = nc_variable_data[numpy.unravel_index(nc_variable_data.argmin(),
-                                                                  nc_variable_data.shape)]
-            coordinate_max = nc_variable_data[numpy.unravel_index(nc_variable_data.argmax(),
-                                                                  nc_variable_data.shape)]
+        if nc_variable_coordinate_type.endswith('C') or \
+                nc_variable_coordinate_type.endswith('C_bnd'):
+            coordinate_min, coordinate_max = \
+                get_array_limits(get_nc_variable_end_values(nc_variable))
+        else:
+            coordinate_min, coordinate_max = get_nc_variable_limits(nc_variable)
+        if coordinate_min is not None:
             coordinate_units = nc_variable.units if hasattr(nc_variable, 'units') else ''
 
             if nc_variable_coordinate_type in ['TC', 'TA', 'TC_bnd', 'TA_bnd']:
@@ -192,6 +194,68 @@ def get_nc_variable_coordinate_meta(nc_dataset, nc_variable_name):
     return nc_variable_coordinate_meta
 
 
+def get_nc_variable_end_values(nc_variable):
+    """
+    (object)-> masked array
+
+    Return: the first and last elements of a variable along its first dimension
+
+    Coordinate variables are monotonic (CF conventions 5.1), and so are their bounds, so these
+    elements hold their limits. Reading only them keeps the data read from the file small
+    however long the coordinate is.
+    """
+    if nc_variable.shape[0] <= 2:
+        return nc_variable[:]
+    return numpy.ma.concatenate([nc_variable[:1], nc_variable[-1:]])
+
+
+def get_array_limits(data):
+    """
+    (array)-> tuple
+
+    Return: the minimum and maximum of the unmasked values of an array, or (None, None) if
+            it has no such values
+    """
+    data = numpy.ma.masked_invalid(data)
+    if not data.count():
+        return None, None
+    return data.min(), data.max()
+
+
+def get_nc_variable_limits(nc_variable, memory_budget=None):
+    """
+    (object, int)-> tuple
+
+    Return: the minimum and maximum of the values of a variable that are not missing or
+            fill values, or (None, None) if there are none
+
+    The variable is read in slabs along its first dimension, each of at most memory_budget
+    bytes (default COORDINATE_MEMORY_BUDGET) and aligned with the chunks the variable is
+    stored in, so a large curvilinear grid is never loaded as a whole.
+    """
+    shape = nc_variable.shape
+    if not shape:
+        return get_array_limits(nc_variable[...])
+    if memory_budget is None:
+        memory_budget = COORDINATE_MEMORY_BUDGET
+
+    row_bytes = numpy.dtype(nc_variable.dtype).itemsize * int(numpy.prod(shape[1:]))
+    rows = max(1, memory_budget // max(row_bytes, 1))
+    chunking = nc_variable.chunking()
+    if chunking != 'contiguous' and chunking and rows >= chunking[0]:
+        # whole chunks are decompressed once
+        rows -= rows % chunking[0]
+
+    limits = []
+    for start in range(0, shape[0], rows):
+        slab_limits = get_array_limits(nc_variable[start:start + rows])
+        if slab_limits[0] is not None:
+            limits.append(slab_limits)
+    if not limits:
+        return None, None
+    return min(low for low, _ in limits), max(high for _, high in limits)
+
+
 # Functions for Coordinate Variable
 # coordinate variable has the following attributes:
 # 1) it has 1 dimension
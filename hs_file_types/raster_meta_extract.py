@@ -10,6 +10,8 @@ using-python-gdal-bindings
 
 Update Notes
 This is used to process the vrt raster and to extract max, min value of each raster band.
+Band statistics already stored with the raster (in the vrt or its .aux.xml file) are used as is;
+statistics computed here are stored there by GDAL.
 """
 
 
@@ -17,23 +19,27 @@ import gdal
 from gdalconst import GA_ReadOnly
 from osgeo import osr
 from collections import OrderedDict
+import os
 import re
 import logging
 import pycrs
 import numpy
+import xml.etree.ElementTree as ET
 
 
-def get_raster_meta_dict(raster_file_name):
+def get_raster_meta_dict(raster_file_name, approximate_pixels=None):
     """
-    (string)-> dict
+    (string, int)-> dict
 
-    Return: the raster science metadata extracted from the raster file
+    Return: the raster science metadata extracted from the raster file. Band statistics of bands
+    with more than approximate_pixels cells are approximated by GDAL from overviews or a
+    subsample of the cells.
     """
 
     # get the metadata info from raster files
     spatial_coverage_info = get_spatial_coverage_info(raster_file_name)
     cell_info = get_cell_info(raster_file_name)
-    band_info = get_band_info(raster_file_name)
+    band_info = get_band_info(raster_file_name, approximate_pixels)
 
     # write meta as dictionary
     raster_meta_dict = {
@@ -45,6 +51,33 @@ def get_raster_meta_dict(raster_file_name):
     return raster_meta_dict
 
 
+def open_raster(raster_file_name):
+    """
+    (string) --> object
+
+    Return: the raster dataset opened read only. Source files of a vrt given by a relative path
+    that is not relative to the vrt are resolved against the folder of the vrt, rather than
+    against the working directory of the process.
+    """
+    if os.path.splitext(raster_file_name)[1] == '.vrt':
+        try:
+            root = ET.parse(raster_file_name).getroot()
+        except Exception:
+            root = None
+        if root is not None:
+            vrt_dir = os.path.dirname(os.path.abspath(raster_file_name))
+            sources = [source for source in root.iter('SourceFilename')
+                       if source.get('relativeToVRT') != '1' and source.text and
+                       not os.path.isabs(source.text)]
+            for source in sources:
+                source.text = os.path.join(vrt_dir, source.text)
+            if sources:
+                # GDAL opens a vrt given as its xml content
+                return gdal.Open(ET.tostring(root), GA_ReadOnly)
+
+    return gdal.Open(raster_file_name, GA_ReadOnly)
+
+
 def get_spatial_coverage_info(raster_file_name):
     """
     (string) --> dict
@@ -52,7 +85,7 @@ def get_spatial_coverage_info(raster_file_name):
     Return: meta of spatial extent and projection of raster includes both original info
     and wgs84 info
     """
-    raster_dataset = gdal.Open(raster_file_name, GA_ReadOnly)
+    raster_dataset = open_raster(raster_file_name)
     original_coverage_info = get_original_coverage_info(raster_dataset)
     wgs84_coverage_info = get_wgs84_coverage_info(raster_dataset)
     spatial_coverage_info = {
@@ -242,7 +275,7 @@ def get_cell_info(raster_file_name):
     Return: meta info of cells in raster
     """
 
-    raster_dataset = gdal.Open(raster_file_name, GA_ReadOnly)
+    raster_dataset = open_raster(raster_file_name)
 
     # get cell size info
     if raster_dataset:
@@ -274,22 +307,34 @@ def get_cell_info(raster_file_name):
     return cell_info
 
 
-def get_band_info(raster_file_name):
+def get_band_statistics(band, approximate):
+    """
+    (object, bool) --> list
+
+    Return: [minimum, maximum, mean, stddev] of a raster band, computed only if no statistics
+    are stored with the raster. With approximate, approximate statistics are acceptable.
+    """
+    statistics = band.GetStatistics(approximate, False)
+    # a negative standard deviation means there are no stored statistics
+    if not statistics or statistics[3] < 0:
+        statistics = band.ComputeStatistics(approximate)
+    return statistics
+
 
-    raster_dataset = gdal.Open(raster_file_name, GA_ReadOnly)
+def get_band_info(raster_file_name, approximate_pixels=None):
 
-    import os
-    ori_dir = os.getcwd()
-    os.chdir(os.path.dirname(raster_file_name))
+    raster_dataset = open_raster(raster_file_name)
 
     # get raster band count
     if raster_dataset:
         band_info = {}
         band_count = raster_dataset.RasterCount
+        approximate = approximate_pixels is not None and \
+            raster_dataset.RasterXSize * raster_dataset.RasterYSize > approximate_pixels
 
         for i in range(0, band_count):
             band = raster_dataset.GetRasterBand(i+1)
-            minimum, maximum, _, _ = band.ComputeStatistics(False)
+            minimum, maximum, _, _ = get_band_statistics(band, approximate)
             no_data = band.GetNoDataValue()
             new_no_data = None
 
@@ -300,7 +345,7 @@ def get_band_info(raster_file_name):
 
             if new_no_data is not None:
                 band.SetNoDataValue(new_no_data)
-                minimum, maximum, _, _ = band.ComputeStatistics(False)
+                minimum, maximum, _, _ = band.ComputeStatistics(approximate)
 
             band_info[i+1] = {
                 'name': 'Band_'+str(i+1),
@@ -321,5 +366,4 @@ def get_band_info(raster_file_name):
         }
 
     raster_dataset = None
-    os.chdir(ori_dir)
     return band_info
@@ -0,0 +1,95 @@
+import json
+import os
+import shutil
+import tempfile
+from collections import OrderedDict
+from unittest import TestCase
+
+import netCDF4
+import numpy
+
+from hs_file_types.nc_functions import nc_dump, nc_utils
+
+
+class TestNCFunctions(TestCase):
+    def setUp(self):
+        self.temp_dir = tempfile.mkdtemp()
+
+    def tearDown(self):
+        shutil.rmtree(self.temp_dir)
+
+    def _curvilinear_grid(self, ny, nx):
+        """Write a synthetic curvilinear lat/lon grid with some fill values; return its path."""
+        path = os.path.join(self.temp_dir, 'grid.nc')
+        dataset = netCDF4.Dataset(path, 'w')
+        dataset.createDimension('y', ny)
+        dataset.createDimension('x', nx)
+        y, x = numpy.meshgrid(numpy.linspace(0, 1, ny), numpy.linspace(0, 1, nx), indexing='ij')
+        for name, values in (('lat', 30 + 10 * y + x), ('lon', -120 + 10 * x - y)):
+            var = dataset.createVariable(name, 'f8', ('y', 'x'), chunksizes=(100, nx),
+                                         fill_value=-9999.0)
+            values[0, :10] = -9999.0
+            var[:] = values
+        dataset.close()
+        return path
+
+    def test_variable_limits(self):
+        dataset = netCDF4.Dataset(self._curvilinear_grid(400, 300))
+        for name in ('lat', 'lon'):
+            var = dataset.variables[name]
+            data = var[:]
+            # a budget of less than a chunk makes the variable be read in several slabs
+            limits = nc_utils.get_nc_variable_limits(var, memory_budget=64 * 1024)
+            # fill values are ignored
+            self.assertNotEqual(limits[0], -9999.0)
+            self.assertEqual(limits, (data.min(), data.max()))
+        dataset.close()
+
+    def test_array_limits(self):
+        data = numpy.ma.masked_equal([3.0, -9999.0, numpy.nan, 1.0], -9999.0)
+        self.assertEqual(nc_utils.get_array_limits(data), (1.0, 3.0))
+        self.assertEqual(nc_utils.get_array_limits(numpy.ma.masked_all((3,))), (None, None))
+
+    def test_end_values(self):
+        path = os.path.join(self.temp_dir, 'time.nc')
+        dataset = netCDF4.Dataset(path, 'w')
+        dataset.createDimension('time', None)
+        dataset.createDimension('nv', 2)
+        var = dataset.createVariable('time', 'f8', ('time',))
+        var[:] = numpy.arange(100, 0, -1)
+        self.assertEqual(nc_utils.get_nc_variable_end_values(var).tolist(), [100, 1])
+        # bounds keep their second dimension
+        bounds = dataset.createVariable('time_bnds', 'f8', ('time', 'nv'))
+        bounds[:] = numpy.arange(200).reshape(100, 2)
+        self.assertEqual(nc_utils.get_nc_variable_end_values(bounds).tolist(),
+                         [[0, 1], [198, 199]])
+        # a short coordinate is read whole
+        short = dataset.createVariable('short', 'f8', ('nv',))
+        short[:] = [5, 6]
+        self.assertEqual(nc_utils.get_nc_variable_end_values(short).tolist(), [5, 6])
+        dataset.close()
+
+    def test_header_from_dict(self):
+        path = self._curvilinear_grid(200, 5)
+        dataset = netCDF4.Dataset(path, 'a')
+        dataset.title = 'Synthetic grid'
+        dataset.variables['lat'].units = 'degrees_north'
+        header_info = json.loads(json.dumps(nc_dump.get_nc_dump_dict(dataset)),
+                                 object_pairs_hook=OrderedDict)
+        dataset.close()
+
+        lines = nc_dump.get_nc_dump_string_from_dict('grid', header_info).split('\n')
+        self.assertEqual(lines[0], 'netcdf grid {')
+        self.assertEqual(lines[-1], '}')
+        for line in ('dimensions:', '\ty = 200 ;', '\tx = 5 ;', 'variables:',
+                     '\tfloat64 lat(y,x) ;', '\t\tlat:units = degrees_north ;',
+                     '// global attributes:', '\t\t:title = Synthetic grid ;'):
+            self.assertIn(line, lines)
+
+    def test_header_from_dict_variable_types(self):
+        header_info = OrderedDict([('variables', OrderedDict([
+            ('variable length names(station)', OrderedDict([('long_name', 'station names')])),
+            ('float32 temp(time,station)', OrderedDict([('units', 'degC')]))]))])
+        lines = nc_dump.get_nc_dump_string_from_dict('vlen', header_info).split('\n')
+        self.assertIn('\t\tnames:long_name = station names ;', lines)
+        self.assertIn('\t\ttemp:units = degC ;', lines)
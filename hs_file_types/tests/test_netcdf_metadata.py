@@ -2,6 +2,8 @@ import os
 import tempfile
 import shutil
 
+from mock import patch
+
 from django.test import TransactionTestCase
 from django.contrib.auth.models import Group
 from django.core.files.uploadedfile import UploadedFile
@@ -88,6 +90,23 @@ class NetCDFFileTypeMetaDataTest(MockIRODSTestCaseMixin, TransactionTestCase):
         self.assertEqual(logical_file.metadata.keywords[0], 'Snow water equivalent')
         self.composite_resource.delete()
 
+    def test_set_file_type_to_netcdf_unreadable_header_info(self):
+        # a failure to read the header info does not stop the file type from being set
+        self.netcdf_file_obj = open(self.netcdf_file, 'r')
+        self._create_composite_resource()
+        res_file = self.composite_resource.files.first()
+
+        error = UnicodeEncodeError('ascii', u'\xb0C', 0, 1, 'ordinal not in range(128)')
+        with patch('hs_file_types.models.netcdf.nc_dump.get_nc_dump_dict', side_effect=error):
+            NetCDFLogicalFile.set_file_type(self.composite_resource, res_file.id, self.user)
+        self.assertEqual(NetCDFLogicalFile.objects.count(), 1)
+        logical_file = NetCDFLogicalFile.objects.first()
+        # the header info text file is displayed instead
+        self.assertEqual(logical_file.metadata.header_info_json, None)
+        self.assertIn('NetCDF Header Information',
+                      logical_file.metadata.get_ncdump_html().render())
+        self.composite_resource.delete()
+
     def test_set_file_type_to_netcdf_resource_title(self):
         # here we are using a valid nc file for setting it
         # to NetCDF file type which includes metadata extraction
@@ -17,7 +17,9 @@ from hs_core.hydroshare.utils import resource_post_create_actions, \
     get_resource_file_name_and_extension
 from hs_core.views.utils import remove_folder, move_or_rename_file_or_folder
 
+from hs_file_types import raster_meta_extract
 from hs_file_types.models import GeoRasterLogicalFile, GeoRasterFileMetaData, GenericLogicalFile
+from hs_file_types.models.raster import create_vrt_file
 from utils import assert_raster_file_type_metadata
 from hs_geo_raster_resource.models import OriginalCoverage, CellInformation, BandInformation
 
@@ -202,6 +204,26 @@ class RasterFileTypeMetaData(MockIRODSTestCaseMixin, TransactionTestCase):
 
         self.composite_resource.delete()
 
+    def test_band_statistics(self):
+        vrt_file = create_vrt_file(os.path.join(self.temp_dir, self.raster_file_name))
+        cwd = os.getcwd()
+        band_info = raster_meta_extract.get_band_info(vrt_file)[1]
+        # extraction does not change the working directory of the process
+        self.assertEqual(os.getcwd(), cwd)
+        self.assertAlmostEqual(band_info['maximumValue'], 2880.00708008, places=5)
+        self.assertAlmostEqual(band_info['minimumValue'], 2274.95898438, places=5)
+
+        # a vrt written by a user may give source files relative to the working directory
+        with open(vrt_file) as f:
+            vrt_content = f.read().replace('relativeToVRT="1"', 'relativeToVRT="0"')
+        user_vrt_file = os.path.join(self.temp_dir, 'user.vrt')
+        with open(user_vrt_file, 'w') as f:
+            f.write(vrt_content)
+        approximate_info = raster_meta_extract.get_band_info(user_vrt_file,
+                                                             approximate_pixels=0)[1]
+        self.assertLessEqual(approximate_info['maximumValue'], band_info['maximumValue'])
+        self.assertGreaterEqual(approximate_info['minimumValue'], band_info['minimumValue'])
+
     def test_set_file_type_to_geo_raster_invalid_file_1(self):
         # here we are using an invalid raster tif file for setting it
         # to Geo Raster file type which should fail
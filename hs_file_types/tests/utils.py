@@ -125,6 +125,10 @@ def assert_netcdf_file_type_metadata(self, title):
     self.assertIn('.nc', file_extensions)
     self.assertIn('.txt', file_extensions)
 
+    # the header info shown on the landing page is stored with the metadata
+    self.assertNotEqual(logical_file.metadata.header_info_json, None)
+    self.assertIn('dimensions:', logical_file.metadata.get_ncdump_html().render())
+
     # test extracted netcdf file type metadata
     # there should 2 content file
     self.assertEqual(self.composite_resource.files.all().count(), 2)
@@ -107,6 +107,10 @@ urlpatterns = patterns(
         core_views.resource_ticket_rest_api.CreateResourceTicket.as_view(),
         name='create_ticket'),
 
+    url(r'^resource/(?P<pk>[0-9a-f-]+)/bag/$',
+        core_views.resource_rest_api.BagBuildStatus.as_view(),
+        name='bag_build_status'),
+
     url(r'^resource/(?P<pk>[0-9a-f-]+)/ticket/bag/$',
         core_views.resource_ticket_rest_api.CreateBagTicket.as_view(),
         name='create_bag_ticket'),
@@ -1,3 +1,4 @@
+from collections import Counter
 from datetime import datetime, timedelta
 
 from django.db import models
@@ -160,6 +161,24 @@ class Variable(models.Model):
         return Variable.objects.create(session=session, name=name, type=type_code,
                                        value=cls.encode(value))
 
+    @classmethod
+    def top_downloaded_resources(cls, count, since):
+        """Return the short ids of the count resources downloaded most often since a time.
+
+        Downloads are the 'download' variables recorded by hs_tracking.signals, most
+        downloaded first.
+        """
+        downloads = Counter()
+        values = cls.objects.filter(name='download', timestamp__gte=since)\
+            .values_list('value', flat=True).iterator()
+        for value in values:
+            for item in value.split('|'):
+                key, _, short_id = item.partition('=')
+                if key == 'resource_guid':
+                    downloads[short_id] += 1
+                    break
+        return [guid for guid, _count in downloads.most_common(count)]
+
     @classmethod
     def encode(cls, value):
         if value is None:
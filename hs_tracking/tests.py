@@ -6,6 +6,7 @@ from django.test import TestCase
 from django.contrib.auth.models import User
 from django.test import Client
 from django.http import HttpRequest, QueryDict, response
+from django.utils.timezone import now
 from mock import patch, Mock
 
 from .models import Variable, Session, Visitor, SESSION_TIMEOUT, VISITOR_FIELDS
@@ -154,6 +155,18 @@ class TrackingTests(TestCase):
         self.assertEqual("X", Variable(name='var', value='X', type=2).get_value())
         self.assertEqual(None, Variable(name='var', value='', type=4).get_value())
 
+    def test_top_downloaded_resources(self):
+        for guid, count in (('abc', 3), ('def', 1), ('ghi', 2)):
+            for _ in range(count):
+                self.session.record('download', Variable.format_kwargs(
+                    filename='{}.zip'.format(guid), resource_guid=guid))
+        self.session.record('create', Variable.format_kwargs(resource_guid='def'))
+
+        since = now() - timedelta(days=1)
+        self.assertEqual(Variable.top_downloaded_resources(2, since), ['abc', 'ghi'])
+        self.assertEqual(Variable.top_downloaded_resources(2, now() + timedelta(days=1)),
+                         [])
+
     def test_for_request_new(self):
         request = self.createRequest(user=self.user)
         request.session = {}
@@ -679,7 +679,7 @@ var updateMapFaceting = function (){
         success: function (data) {
             raw_results = [];
             for (var j = 0; j < data.length; j++) {
-                var item = $.parseJSON(data[j]);
+                var item = data[j];
                 raw_results.push(item);
             }
 
@@ -920,7 +920,7 @@ $(document).ready(function () {
                 success: function (data) {
                     var json_results = [];
                     for (var j = 0; j < data.length; j++) {
-                        var item = $.parseJSON(data[j]);
+                        var item = data[j];
                         json_results.push(item);
                         raw_results.push(item);
                     }